@@ -0,0 +1,72 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+from skbio import OrdinationResults
+from qiime2 import Metadata
+
+
+def synthetic_cohort(n_subjects, n_timepoints, n_pcs, seed=0,
+                     individual_id_column='host_subject_id'):
+    """ Generates a longitudinal cohort with an ordination of it.
+
+    Every subject gets `n_timepoints` samples scattered around its own
+    center, so hulls have a realistic spread of sizes.
+
+    Parameters
+    ----------
+    n_subjects: int
+        Number of subjects.
+
+    n_timepoints: int
+        Number of samples per subject.
+
+    n_pcs: int
+        Number of PCs of the ordination.
+
+    seed: int
+        Seed of the random coordinates.
+
+    individual_id_column: str
+        Name of the subject column of the metadata.
+
+    Returns
+    -------
+    metadata: qiime2.Metadata
+        Subject of every sample.
+    pcoa: skbio.OrdinationResults
+        Ordination with decreasing eigenvalues over `n_pcs` PCs.
+    """
+
+    rng = np.random.default_rng(seed)
+    n_samples = n_subjects * n_timepoints
+    index = pd.Index([f'sample{i}' for i in range(n_samples)],
+                     name='sampleid')
+    columns = [f'PC{i + 1}' for i in range(n_pcs)]
+
+    scale = 1 / np.arange(1, n_pcs + 1)
+    centers = rng.normal(size=(n_subjects, n_pcs)) * scale
+    spread = rng.uniform(0.05, 0.5, size=(n_subjects, 1))
+    coords = (np.repeat(centers, n_timepoints, axis=0) +
+              rng.normal(size=(n_samples, n_pcs)) * scale *
+              np.repeat(spread, n_timepoints, axis=0))
+
+    eigvals = pd.Series(scale ** 2, index=columns)
+    pcoa = OrdinationResults(
+        'PCoA',
+        'Principal Coordinate Analysis',
+        eigvals,
+        pd.DataFrame(coords, index=index, columns=columns),
+        proportion_explained=eigvals / eigvals.sum())
+
+    subjects = np.repeat([f'subject{i}' for i in range(n_subjects)],
+                         n_timepoints)
+    metadata = Metadata(pd.DataFrame({individual_id_column: subjects},
+                                     index=index))
+    return metadata, pcoa
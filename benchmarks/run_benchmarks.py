@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+""" Times the steps of the convex hull pipeline on synthetic cohorts.
+
+Results are written as JSON, one record per benchmark and cohort, so
+runs of different versions can be compared with `--compare`. Nothing
+is downloaded, everything runs on generated data in a temporary
+directory.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import warnings
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+import scipy
+
+from cohort import synthetic_cohort
+
+# steps of the pipeline, in the order they run
+BENCHMARKS = ['validate', 'ordination_read', 'convex_hull',
+              'hulls_to_format', 'hulls_format_validate_min',
+              'hulls_format_validate_max', 'hulls_format_to_dataframe',
+              'hulls_format_to_metadata', 'hulls_to_artifact',
+              'hulls_artifact_to_dataframe']
+
+
+def timed(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_cohort(params, repeat, directory):
+    """ Times every benchmark on one synthetic cohort.
+
+    Only public entry points are timed, so the same script runs
+    against older versions of the plugin. Steps a version lacks are
+    recorded as skipped.
+    """
+
+    from skbio import OrdinationResults
+    from qiime2 import Artifact, Metadata
+    from q2_convexhull import convexhull
+    from q2_convexhull._format import HullsFormat
+
+    column = 'host_subject_id'
+    metadata, pcoa = synthetic_cohort(params['subjects'],
+                                      params['timepoints'],
+                                      params['pcs'],
+                                      individual_id_column=column)
+    ordination = os.path.join(directory, 'ordination.txt')
+    pcoa.write(ordination)
+    pcoa = OrdinationResults.read(ordination)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        hulls = convexhull.convex_hull(metadata, pcoa, column,
+                                       params['dimensions'])
+    hulls_path = os.path.join(directory, 'hulls.tsv')
+
+    def hulls_to_format():
+        # the layout of the hulls TSV every version reads
+        hulls.to_csv(hulls_path, sep='\t', na_rep='nan', index_label='id')
+
+    hulls_to_format()
+    steps = {
+        'ordination_read': lambda: OrdinationResults.read(ordination),
+        'convex_hull': lambda: convexhull.convex_hull(
+            metadata, pcoa, column, params['dimensions']),
+        'hulls_to_format': hulls_to_format,
+        'hulls_format_validate_min': lambda: HullsFormat(
+            hulls_path, mode='r').validate('min'),
+        'hulls_format_validate_max': lambda: HullsFormat(
+            hulls_path, mode='r').validate('max'),
+        'hulls_format_to_dataframe': lambda: Metadata.load(
+            hulls_path).to_dataframe(),
+        'hulls_format_to_metadata': lambda: Metadata.load(hulls_path),
+    }
+    skipped = {}
+
+    validate = getattr(convexhull, 'validate', None)
+    if validate is None:
+        skipped['validate'] = 'convexhull.validate not found'
+    else:
+        steps['validate'] = lambda: validate(metadata, pcoa, column)
+
+    # artifacts go through whichever format and transformers the
+    # installed version registers for SampleData[Hulls]
+    try:
+        artifact = Artifact.import_data('SampleData[Hulls]', hulls)
+    except Exception as error:
+        skipped['hulls_to_artifact'] = skipped[
+            'hulls_artifact_to_dataframe'] = str(error)
+    else:
+        steps['hulls_to_artifact'] = lambda: Artifact.import_data(
+            'SampleData[Hulls]', hulls)
+        steps['hulls_artifact_to_dataframe'] = lambda: artifact.view(
+            pd.DataFrame)
+
+    results = []
+    for name in BENCHMARKS:
+        if name in skipped:
+            results.append({'benchmark': name, 'params': params,
+                            'skipped': skipped[name]})
+            continue
+        # the hull methods warn about skipped subjects
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            times = timed(steps[name], repeat)
+        results.append({'benchmark': name, 'params': params,
+                        'best': min(times),
+                        'median': statistics.median(times),
+                        'times': times})
+    return results
+
+
+def environment():
+    import q2_convexhull
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'pandas': pd.__version__,
+            'q2_convexhull': getattr(q2_convexhull, '__version__',
+                                     'unknown')}
+
+
+def compare(results, baseline, threshold):
+    """ Prints the change of the best time of every benchmark against
+    a previous run and returns the number of regressions.
+    """
+
+    def key(record):
+        return (record['benchmark'],
+                tuple(sorted(record['params'].items())))
+
+    previous = {key(record): record for record in baseline['results']}
+    regressions = 0
+    for record in results:
+        old = previous.get(key(record))
+        if old is None or 'skipped' in record or 'skipped' in old:
+            continue
+        ratio = record['best'] / old['best']
+        flag = ''
+        if ratio > threshold:
+            regressions += 1
+            flag = '  REGRESSION'
+        print(f"{record['benchmark']:28} {record['params']} "
+              f"{old['best']:.4f}s -> {record['best']:.4f}s "
+              f"({ratio:.2f}x){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--subjects', type=int, nargs='+',
+                        default=[100, 1000])
+    parser.add_argument('--timepoints', type=int, nargs='+',
+                        default=[5, 20])
+    parser.add_argument('--pcs', type=int, nargs='+', default=[10])
+    parser.add_argument('--dimensions', type=int, nargs='+',
+                        default=[2, 3])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='JSON file of the results.')
+    parser.add_argument('--compare',
+                        help='JSON file of a previous run to compare to.')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Slowdown reported as a regression.')
+    args = parser.parse_args(argv)
+
+    results = []
+    with TemporaryDirectory() as directory:
+        for subjects, timepoints, pcs, dimensions in itertools.product(
+                args.subjects, args.timepoints, args.pcs, args.dimensions):
+            params = {'subjects': subjects, 'timepoints': timepoints,
+                      'pcs': pcs, 'dimensions': dimensions}
+            results.extend(run_cohort(params, args.repeat, directory))
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=1)
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    if not args.output:
+        json.dump(report, sys.stdout, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
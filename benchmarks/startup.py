@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+""" Times loading the plugin in fresh interpreters, as every qiime
+command does.
+
+The time of importing qiime2 and q2-types, which any plugin pays, is
+measured separately and subtracted, leaving the plugin's own cost.
+Results are written as JSON; `--compare` fails when the plugin's own
+import time grew beyond `--threshold` times that of a previous run.
+
+    python benchmarks/startup.py --output startup.json
+    python benchmarks/startup.py --compare startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+BASELINE = 'import qiime2.plugin, q2_types.sample_data, q2_types.ordination'
+PLUGIN = BASELINE + '; import q2_convexhull.plugin_setup'
+
+
+def import_time(code, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='JSON file of the results.')
+    parser.add_argument('--compare',
+                        help='JSON file of a previous run to compare to.')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='Slowdown reported as a regression.')
+    args = parser.parse_args(argv)
+
+    baseline = import_time(BASELINE, args.repeat)
+    plugin = import_time(PLUGIN, args.repeat)
+    # medians, a single slow interpreter start should not count
+    report = {'baseline': statistics.median(baseline),
+              'plugin': statistics.median(plugin),
+              'plugin_own': max(statistics.median(plugin) -
+                                statistics.median(baseline), 0.0),
+              'baseline_times': baseline,
+              'plugin_times': plugin}
+    print(f"plugin import {report['plugin']:.3f}s, of which "
+          f"{report['plugin_own']:.3f}s beyond qiime2 and q2-types")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=1)
+    if args.compare:
+        with open(args.compare) as fh:
+            previous = json.load(fh)
+        # a floor keeps noise on a near zero cost from failing the run
+        allowed = max(previous['plugin_own'] * args.threshold, 0.05)
+        if report['plugin_own'] > allowed:
+            print(f"REGRESSION: {previous['plugin_own']:.3f}s -> "
+                  f"{report['plugin_own']:.3f}s")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
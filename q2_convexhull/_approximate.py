@@ -0,0 +1,97 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import time
+
+import numpy as np
+
+from q2_convexhull._defaults import (APPROXIMATE_MIN_DIRECTIONS,
+                                     BATCH_RELATIVE_TOLERANCE)
+
+
+def radial_volume(points, time_budget, max_directions, confidence, rng):
+    """ Estimates the convex hull volume of a point set by Monte Carlo
+    integration of its radial function.
+
+    For a convex body K around an interior point c, the volume is
+    the volume of the unit ball times the mean of r(u) ** d over
+    uniformly random directions u, where r(u) is the distance from c
+    to the boundary along u. r(u) is found with one small linear
+    program per direction over the polar of the hull, so no facets
+    are ever enumerated. The points are whitened first, which makes
+    the hull rounder and the estimate less variable, and directions
+    are drawn in antithetic pairs.
+
+    Parameters
+    ----------
+    points: numpy.ndarray
+        Coordinates of shape (n_points, n_dimensions).
+
+    time_budget: float
+        Seconds after which no more directions are drawn. At least
+        `APPROXIMATE_MIN_DIRECTIONS` directions are always used.
+
+    max_directions: int
+        Maximum number of directions.
+
+    confidence: float
+        Coverage of the returned confidence interval.
+
+    rng: numpy.random.Generator
+        Source of the random directions.
+
+    Returns
+    -------
+    volume, lower, upper: float
+        Volume estimate and its normal-approximation confidence
+        bounds. All zero when the points do not span the space.
+    n_directions: int
+        Number of directions used.
+    """
+
+    from scipy.optimize import linprog
+    from scipy.special import gammaln
+    from scipy.stats import norm
+
+    points = np.asarray(points, dtype=np.float64)
+    n_points, n_dimensions = points.shape
+    centered = points - points.mean(axis=0)
+
+    # whiten, vol(K) = |det(A)| vol(A^-1 K)
+    values, vectors = np.linalg.eigh(np.cov(centered, rowvar=False))
+    if values.min() <= BATCH_RELATIVE_TOLERANCE * values.max():
+        return 0.0, 0.0, 0.0, 0
+    whitened = centered @ (vectors / np.sqrt(values))
+    log_scale = 0.5 * np.log(values).sum()
+
+    log_ball = (0.5 * n_dimensions * np.log(np.pi) -
+                gammaln(0.5 * n_dimensions + 1))
+    ones = np.ones(n_points)
+    bounds = [(None, None)] * n_dimensions
+
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_directions and (
+            len(samples) < APPROXIMATE_MIN_DIRECTIONS or
+            time.perf_counter() - start < time_budget):
+        direction = rng.normal(size=n_dimensions)
+        direction /= np.linalg.norm(direction)
+        for u in (direction, -direction):
+            # the gauge of the hull along u is the support function
+            # of its polar {y : whitened @ y <= 1}
+            result = linprog(-u, A_ub=whitened, b_ub=ones, bounds=bounds,
+                             method='highs')
+            samples.append(n_dimensions * np.log(-1 / result.fun))
+
+    samples = np.exp(np.array(samples) + log_ball + log_scale)
+    volume = samples.mean()
+    # antithetic pairs are averaged before taking the spread
+    pairs = samples.reshape(-1, 2).mean(axis=1)
+    margin = (norm.ppf(0.5 + confidence / 2) *
+              pairs.std(ddof=1) / np.sqrt(len(pairs)))
+    return volume, max(volume - margin, 0.0), volume + margin, len(samples)
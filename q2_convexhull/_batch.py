@@ -0,0 +1,152 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from itertools import combinations
+
+import numpy as np
+
+from q2_convexhull._defaults import (BATCH_MAX_ELEMENTS,
+                                     BATCH_RELATIVE_TOLERANCE)
+
+
+def batch_hull_measures(points):
+    """ Computes convex hull volume and area of many small point
+    sets at once.
+
+    Every candidate facet (edge in 2D, triangle in 3D) is tested
+    against all points of its set with array math, so the cost per
+    set grows combinatorially with the number of points. Only use
+    this for sets of a handful to a few dozen points.
+
+    Parameters
+    ----------
+    points: numpy.ndarray
+        Array of shape (n_sets, n_points, n_dimensions) with
+        n_dimensions either 2 or 3.
+
+    Returns
+    -------
+    volumes: numpy.ndarray
+        Hull volume of each set (area in 2D, as in
+        `scipy.spatial.ConvexHull`).
+    areas: numpy.ndarray
+        Hull area of each set (perimeter in 2D).
+    ok: numpy.ndarray
+        Boolean mask of the sets whose measures could be computed.
+        Sets with coplanar (collinear in 2D) boundary points,
+        duplicate points or an inconsistent facet structure are
+        left to Qhull and reported as False.
+
+    Raises
+    ------
+    ValueError
+        If the points are not 2 or 3 dimensional.
+    """
+
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 3 or points.shape[2] not in (2, 3):
+        raise ValueError('Batched hulls are only supported '
+                         'for 2 or 3 dimensions.')
+    n_sets, n_points, n_dimensions = points.shape
+
+    volumes = np.zeros(n_sets)
+    areas = np.zeros(n_sets)
+    ok = np.zeros(n_sets, dtype=bool)
+    if n_points <= n_dimensions:
+        return volumes, areas, ok
+
+    measure = _measures_2d if n_dimensions == 2 else _measures_3d
+    facets = np.array(list(combinations(range(n_points), n_dimensions)))
+    step = max(1, BATCH_MAX_ELEMENTS // (len(facets) * n_points))
+    for start in range(0, n_sets, step):
+        chunk = slice(start, start + step)
+        volumes[chunk], areas[chunk], ok[chunk] = measure(
+            points[chunk], facets)
+    return volumes, areas, ok
+
+
+def _centered(points):
+    # hull measures are translation invariant, centering keeps the
+    # orientation tests well conditioned
+    points = points - points.mean(axis=1, keepdims=True)
+    scale = np.abs(points).max(axis=(1, 2))
+    return points, scale
+
+
+def _supporting(orientation, facets, n_points, tolerance):
+    """ Finds the candidate facets that have every other point of
+    their set on one side, and the sets where that test is ambiguous.
+    """
+    own = np.zeros((len(facets), n_points), dtype=bool)
+    np.put_along_axis(own, facets, True, axis=1)
+
+    tolerance = tolerance[:, None, None]
+    above = (orientation > tolerance) & ~own
+    below = (orientation < -tolerance) & ~own
+    flat = ~(above | below | own)
+
+    lower = ~above.any(axis=2)
+    upper = ~below.any(axis=2)
+    facet = lower | upper
+    degenerate = (facet & flat.any(axis=2)).any(axis=1)
+    return facet, np.where(lower, 1.0, -1.0), degenerate, own
+
+
+def _measures_2d(points, edges):
+    n_points = points.shape[1]
+    points, scale = _centered(points)
+    start = points[:, edges[:, 0]]
+    end = points[:, edges[:, 1]]
+    direction = end - start
+
+    offset = points[:, None, :, :] - start[:, :, None, :]
+    orientation = (direction[..., 0, None] * offset[..., 1] -
+                   direction[..., 1, None] * offset[..., 0])
+    edge, sign, degenerate, own = _supporting(
+        orientation, edges, n_points,
+        BATCH_RELATIVE_TOLERANCE * scale ** 2)
+
+    # every hull vertex must close the polygon with exactly two edges
+    degree = edge.astype(np.float64) @ own
+    n_edges = edge.sum(axis=1)
+    ok = (~degenerate & (n_edges >= 3) &
+          ((degree == 0) | (degree == 2)).all(axis=1) &
+          ((degree > 0).sum(axis=1) == n_edges))
+
+    # edges with the rest of the set on their left (above) run
+    # counterclockwise
+    cross = start[..., 0] * end[..., 1] - start[..., 1] * end[..., 0]
+    volumes = -0.5 * (edge * sign * cross).sum(axis=1)
+    areas = (edge * np.linalg.norm(direction, axis=2)).sum(axis=1)
+    return volumes, areas, ok
+
+
+def _measures_3d(points, triangles):
+    n_points = points.shape[1]
+    points, scale = _centered(points)
+    first = points[:, triangles[:, 0]]
+    normal = np.cross(points[:, triangles[:, 1]] - first,
+                      points[:, triangles[:, 2]] - first)
+
+    orientation = (np.einsum('stc,snc->stn', normal, points) -
+                   np.einsum('stc,stc->st', normal, first)[..., None])
+    facet, sign, degenerate, own = _supporting(
+        orientation, triangles, n_points,
+        BATCH_RELATIVE_TOLERANCE * scale ** 3)
+
+    # a simplicial polytope with V vertices has exactly 2V - 4 facets
+    n_facets = facet.sum(axis=1)
+    n_vertices = ((facet.astype(np.float64) @ own) > 0).sum(axis=1)
+    ok = (~degenerate & (n_vertices >= 4) &
+          (n_facets == 2 * n_vertices - 4))
+
+    # normals point away from the set when it lies below the facet
+    volumes = (facet * sign *
+               np.einsum('stc,stc->st', normal, first)).sum(axis=1) / 6
+    areas = 0.5 * (facet * np.linalg.norm(normal, axis=2)).sum(axis=1)
+    return volumes, areas, ok
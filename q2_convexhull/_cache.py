@@ -0,0 +1,127 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from q2_convexhull._defaults import DEFAULT_CACHE_SIZE
+
+# SQLite limits the number of parameters of a single statement
+_QUERY_BATCH = 500
+
+
+class HullCache:
+    """ On-disk cache of per-subject convex hull volume and area.
+
+    Entries are keyed by a hash of a subject's coordinate block
+    (which also fixes the number of dimensions), so overlapping runs
+    on the same ordination share results no matter how the metadata
+    was filtered. The cache holds at most `size` entries, evicting
+    the least recently used ones.
+
+    Parameters
+    ----------
+    directory: str
+        Directory holding the cache database, created if needed.
+
+    size: int (Default `DEFAULT_CACHE_SIZE`)
+        Maximum number of cached subjects.
+
+    Attributes
+    ----------
+    hits, misses: int
+        Number of blocks found and not found by `get`.
+    """
+
+    def __init__(self, directory, size=DEFAULT_CACHE_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._used = time.time_ns()
+        self._connection = sqlite3.connect(
+            os.path.join(directory, 'hulls.sqlite'))
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS hulls ('
+                'key BLOB PRIMARY KEY, volume REAL, area REAL, '
+                'used INTEGER)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS hulls_used ON hulls (used)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    @staticmethod
+    def key(block):
+        block = np.ascontiguousarray(block, dtype=np.float64)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.array(block.shape, dtype=np.int64).tobytes())
+        digest.update(block.tobytes())
+        return digest.digest()
+
+    def get(self, keys):
+        """ Looks up cached measures.
+
+        Returns
+        -------
+        volumes, areas: numpy.ndarray
+            Cached measures, NaN where not found.
+        found: numpy.ndarray
+            Boolean mask of the keys found in the cache.
+        """
+
+        position = {key: i for i, key in enumerate(keys)}
+        volumes = np.full(len(keys), np.nan)
+        areas = np.full(len(keys), np.nan)
+        found = np.zeros(len(keys), dtype=bool)
+
+        with self._connection:
+            for start in range(0, len(keys), _QUERY_BATCH):
+                batch = keys[start:start + _QUERY_BATCH]
+                marks = ', '.join('?' * len(batch))
+                rows = self._connection.execute(
+                    f'SELECT key, volume, area FROM hulls '
+                    f'WHERE key IN ({marks})', batch).fetchall()
+                for key, volume, area in rows:
+                    i = position[key]
+                    volumes[i], areas[i], found[i] = volume, area, True
+                self._connection.execute(
+                    f'UPDATE hulls SET used = ? WHERE key IN ({marks})',
+                    [self._used] + list(batch))
+
+        self.hits += int(found.sum())
+        self.misses += int((~found).sum())
+        return volumes, areas, found
+
+    def put(self, keys, volumes, areas):
+        """ Stores measures, then evicts the least recently used
+        entries beyond the cache size.
+        """
+
+        rows = [(key, float(volume), float(area), self._used)
+                for key, volume, area in zip(keys, volumes, areas)]
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO hulls VALUES (?, ?, ?, ?)', rows)
+            count, = self._connection.execute(
+                'SELECT COUNT(*) FROM hulls').fetchone()
+            if count > self.size:
+                self._connection.execute(
+                    'DELETE FROM hulls WHERE key IN (SELECT key FROM hulls '
+                    'ORDER BY used LIMIT ?)', (count - self.size,))
@@ -7,3 +7,54 @@
 # ----------------------------------------------------------------------------
 
 DEFAULT_N_DIMENSIONS = 3
+
+# largest subjects (in number of timepoints) whose hulls are computed
+# with batched array math rather than one Qhull call each
+BATCH_MAX_POINTS = {2: 14, 3: 9}
+# upper bound on the number of array elements of one batched chunk
+BATCH_MAX_ELEMENTS = 2 ** 22
+# orientation tests closer to zero than this (relative to the subject
+# extent) are considered degenerate and left to Qhull
+BATCH_RELATIVE_TOLERANCE = 1e-10
+# smallest number of subjects handed to a worker at once when
+# computing hulls with n_jobs > 1
+PARALLEL_MIN_CHUNK_SIZE = 512
+# maximum number of subjects kept in an on-disk hull cache
+DEFAULT_CACHE_SIZE = 1000000
+# subjects with at least this many timepoints have points that can
+# not be hull vertices removed before calling Qhull
+PREFILTER_MIN_POINTS = 1000
+# fewest random directions used by the approximate hull volume,
+# regardless of its time budget
+APPROXIMATE_MIN_DIRECTIONS = 32
+# approximate_convex_hull computes exact hulls up to this many
+# dimensions and estimates volumes above it
+DEFAULT_EXACT_MAX_DIMENSIONS = 5
+# seconds and random directions spent per estimated subject
+DEFAULT_TIME_BUDGET = 1.0
+DEFAULT_MAX_DIRECTIONS = 10000
+# records checked by the 'min' validation level of hull tables, and
+# rows parsed at once by the 'max' level
+HULLS_MIN_RECORDS = 100
+HULLS_VALIDATION_CHUNK = 100000
+# environment variable naming the JSON file a profile of each hull
+# run is written to, and the number of slowest subjects it lists
+PROFILE_ENVIRONMENT = 'Q2_CONVEXHULL_PROFILE'
+PROFILE_N_SLOWEST = 10
+# bootstrap replicates per subject, and replicates of all subjects
+# drawn and measured at once
+DEFAULT_N_REPLICATES = 1000
+BOOTSTRAP_CHUNK_REPLICATES = 2 ** 16
+# permutations of the hull permutation test, and permuted values
+# held at once by each of its threads
+DEFAULT_PERMUTATIONS = 999
+PERMUTATION_CHUNK_ELEMENTS = 2 ** 24
+# individuals named in a warning about skipped or failed individuals,
+# the rest are only counted
+WARN_MAX_SUBJECTS = 20
+# samples whose coordinates chunked_convex_hull holds in memory at
+# once, a larger subject is still read whole
+CHUNKED_MAX_SAMPLES = 2 ** 18
+# PCs computed beyond those kept by the randomized PCoA of a distance
+# matrix, for accuracy of the kept ones
+DISTANCE_PCOA_OVERSAMPLING = 10
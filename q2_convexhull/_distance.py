@@ -0,0 +1,50 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+
+class Distances:
+    """ Pairwise distances between samples.
+
+    A light-weight stand-in for `skbio.DistanceMatrix`, read without
+    loading scikit-bio, which is only imported once the distances are
+    ordinated.
+
+    Attributes
+    ----------
+    ids: list of str
+        Sample IDs, in the order of the rows and columns of `data`.
+    data: numpy.ndarray
+        Square float64 array of distances.
+    """
+
+    def __init__(self, ids, data):
+        self.ids = ids
+        self.data = data
+
+    @classmethod
+    def read(cls, path):
+        """ Reads a distance matrix in scikit-bio's lsmat format.
+
+        Raises
+        ------
+        ValueError
+            If the matrix is not square or its row and column IDs
+            differ.
+        """
+
+        with open(path) as fh:
+            ids = fh.readline().rstrip('\n').split('\t')[1:]
+        frame = pd.read_csv(path, sep='\t', skiprows=1, header=None,
+                            index_col=0, dtype={0: str})
+        if list(frame.index) != ids or frame.shape[1] != len(ids):
+            raise ValueError('Distance matrix should be square, with the '
+                             'same IDs on its rows and columns.')
+        return cls(ids, frame.to_numpy(dtype=np.float64))
@@ -1,5 +1,12 @@
+from itertools import islice
+import numpy as np
+import pandas as pd
 import qiime2.plugin.model as model
 from qiime2.plugin import ValidationError
+from ._defaults import HULLS_MIN_RECORDS, HULLS_VALIDATION_CHUNK
+
+# spellings of NaN written by pandas and accepted by float()
+_NAN_VALUES = ['nan', 'NaN', 'NAN', '-nan', '+nan']
 
 
 class HullsFormat(model.TextFileFormat):
@@ -9,30 +16,254 @@ class HullsFormat(model.TextFileFormat):
             header = fh.readline()
             comp_columns = [head.replace('\n', '')
                             for head in header.split('\t')][1:]
-            # ensure there at least two components
-            if len(comp_columns) != 3:
-                raise ValidationError('There should only be three '
-                                      'columns in the hull format')
-            if comp_columns[1] != 'convexhull_volume':
-                raise ValidationError('The second column '
-                                      'should be the volume.')
-            if comp_columns[2] != 'convexhull_area':
-                raise ValidationError('The third column '
-                                      'should be the volume.')
+            n_keys = _hull_columns(comp_columns)
             # validate the body of the data
+            if n_records is not None:
+                _validate_lines(fh, comp_columns, n_keys, n_records)
+                return
+
+            # parse the measures in C, chunk by chunk, and only go line
+            # by line to locate a bad value once parsing failed
+            n_columns = len(comp_columns) + 1
+            try:
+                reader = pd.read_csv(fh, sep='\t', header=None,
+                                     names=range(n_columns),
+                                     usecols=range(n_keys + 1, n_columns),
+                                     dtype=np.float64,
+                                     na_values=_NAN_VALUES,
+                                     keep_default_na=False,
+                                     chunksize=HULLS_VALIDATION_CHUNK)
+                for _ in reader:
+                    pass
+            except (ValueError, pd.errors.ParserError) as e:
+                error = e
+            else:
+                return
+
+        with self.open() as fh:
+            fh.readline()
+            _validate_lines(fh, comp_columns, n_keys)
+        if isinstance(error, pd.errors.ParserError):
+            raise ValidationError(str(error))
+
+    def _validate_(self, level):
+        record_count_map = {'min': HULLS_MIN_RECORDS, 'max': None}
+        self._validate(record_count_map[level])
+
+
+def _hull_columns(columns):
+    """ Checks the columns of a hull table: one or more key columns
+    (such as the subject ID), then the volume and the area, then any
+    other convexhull_ measures. Wide tables name the volume and area
+    of each ordination, e.g. convexhull_volume_unifrac_3d, and start
+    with such a pair. Returns the number of key columns.
+    """
+    if len(columns) < 3:
+        raise ValidationError('There should be at least three '
+                              'columns in the hull format')
+    measures = [i for i, column in enumerate(columns)
+                if column.startswith('convexhull_')]
+    n_keys = measures[0] if measures else len(columns)
+    if n_keys == 0 or not columns[n_keys].startswith('convexhull_volume'):
+        raise ValidationError('The volume should be the first measure, '
+                              'after the key columns.')
+    if not (n_keys + 1 < len(columns) and
+            columns[n_keys + 1] == columns[n_keys].replace('_volume',
+                                                           '_area', 1)):
+        raise ValidationError('The area should follow the volume.')
+    if len(measures) != len(columns) - n_keys:
+        raise ValidationError('Additional columns should be '
+                              'convexhull_ measures.')
+    return n_keys
+
+
+def _validate_lines(fh, comp_columns, n_keys, n_records=None):
+    for line_number, line in enumerate(islice(fh, n_records), start=2):
+        cells = line.replace('\n', '').split('\t')
+        for column, value in zip(comp_columns[n_keys:], cells[n_keys + 1:]):
+            if not is_float(value.strip()):
+                raise ValidationError(f'Non float value {value!r} in '
+                                      f'{column} on line {line_number}.')
+
+
+class HullVerticesFormat(model.TextFileFormat):
+    def _validate(self, n_records=None):
+        with self.open() as fh:
+            header = fh.readline()
+            columns = [head.replace('\n', '')
+                       for head in header.split('\t')][1:]
+            if len(columns) != 2:
+                raise ValidationError('There should only be two '
+                                      'columns in the hull vertices '
+                                      'format')
+            if columns[1] != 'hull_vertex':
+                raise ValidationError('The second column '
+                                      'should be hull_vertex.')
             for line_number, line in enumerate(fh):
-                cells = line.split('\t')
-                num_types = [is_float(v.strip()) for v in cells[2:]]
-                num_types = [is_float(v.strip()) for v in cells[2:]]
-                if not all(num_types):
-                    raise ValidationError('Non float values '
-                                          'in volume or area.')
-                if not isinstance(cells[1], str):
-                    raise ValidationError('Subject IDs '
-                                          'should be strings.')
+                if n_records is not None and line_number >= n_records:
+                    break
+                cells = line.replace('\n', '').split('\t')
+                if len(cells) != 3 or cells[2] not in ('0', '1'):
+                    raise ValidationError('hull_vertex values should '
+                                          'be 0 or 1.')
+
+    def _validate_(self, level):
+        record_count_map = {'min': 5, 'max': None}
+        self._validate(record_count_map[level])
+
+
+class HullsNPZFormat(model.BinaryFileFormat):
+    """ Hull table stored column by column in an uncompressed NumPy
+    .npz archive, keeping each column's dtype.
+
+    The archive holds `index`, `index_name` and `columns` arrays and
+    one `column_<i>` array per column.
+    """
+
+    def _validate(self):
+        try:
+            with np.load(str(self), allow_pickle=False) as npz:
+                names = set(npz.files)
+                if not {'index', 'index_name', 'columns'} <= names:
+                    raise ValidationError('Hulls archive is missing its '
+                                          'index or column names.')
+                columns = list(npz['columns'])
+                n_rows = npz['index'].shape[0]
+                for i, column in enumerate(columns):
+                    values = npz[f'column_{i}']
+                    if values.shape != (n_rows,):
+                        raise ValidationError(f'Column {column} should '
+                                              f'have {n_rows} values.')
+                    if (column.startswith('convexhull_') and
+                            values.dtype.kind != 'f'):
+                        raise ValidationError(f'Column {column} should '
+                                              f'be floats.')
+        except (OSError, ValueError, KeyError) as e:
+            raise ValidationError(f'Not a valid hulls archive: {e}')
+        _hull_columns([str(column) for column in columns])
+
+    def _validate_(self, level):
+        self._validate()
+
+
+class HullGeometryFormat(model.BinaryFileFormat):
+    """ Hull vertices and simplices in an uncompressed NumPy .npz
+    archive, as written by `HullSurfaces.write`.
+    """
+
+    def _validate(self):
+        try:
+            with np.load(str(self), allow_pickle=False) as npz:
+                names = set(npz.files)
+                arrays = {'key_columns', 'vertex_offsets', 'vertex_ids',
+                          'vertex_coordinates', 'simplex_offsets',
+                          'simplices'}
+                if not arrays <= names:
+                    raise ValidationError(
+                        f'Hull geometry archive is missing '
+                        f'{", ".join(sorted(arrays - names))}.')
+                n_vertices = _offsets(npz['vertex_offsets'], 'vertex')
+                n_simplices = _offsets(npz['simplex_offsets'], 'simplex')
+                n_hulls = len(npz['vertex_offsets']) - 1
+                if len(npz['simplex_offsets']) != n_hulls + 1:
+                    raise ValidationError('There should be vertex and '
+                                          'simplex offsets of every hull.')
+                for i in range(len(npz['key_columns'])):
+                    if npz[f'key_{i}'].shape != (n_hulls,):
+                        raise ValidationError(f'Key column {i} should have '
+                                              f'{n_hulls} values.')
+                coordinates = npz['vertex_coordinates']
+                if (npz['vertex_ids'].shape != (n_vertices,) or
+                        coordinates.ndim != 2 or
+                        len(coordinates) != n_vertices):
+                    raise ValidationError(f'There should be {n_vertices} '
+                                          f'vertex IDs and coordinates.')
+                simplices = npz['simplices']
+                if (simplices.ndim != 2 or len(simplices) != n_simplices or
+                        simplices.shape[1] != coordinates.shape[1]):
+                    raise ValidationError(f'There should be {n_simplices} '
+                                          f'simplices of '
+                                          f'{coordinates.shape[1]} '
+                                          f'vertices.')
+                # every simplex indexes the vertices of its own hull
+                hulls = np.repeat(np.arange(n_hulls),
+                                  np.diff(npz['simplex_offsets']))
+                offsets = npz['vertex_offsets']
+                if np.any((simplices < offsets[hulls, None]) |
+                          (simplices >= offsets[hulls + 1, None])):
+                    raise ValidationError('Simplices should index the '
+                                          'vertices of their own hull.')
+        except (OSError, ValueError, KeyError) as e:
+            raise ValidationError(f'Not a valid hull geometry archive: {e}')
+
+    def _validate_(self, level):
+        self._validate()
+
+
+def _offsets(offsets, name):
+    if (offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0 or
+            np.any(np.diff(offsets) < 0)):
+        raise ValidationError(f'The {name} offsets should start at 0 and '
+                              f'not decrease.')
+    return offsets[-1]
+
+
+class HullSignificanceFormat(model.TextFileFormat):
+    def _validate(self, n_records=None):
+        with self.open() as fh:
+            header = fh.readline()
+            columns = [head.replace('\n', '')
+                       for head in header.split('\t')][1:]
+            for column in ('test statistic', 'p-value'):
+                if column not in columns:
+                    raise ValidationError(f'There should be a {column} '
+                                          f'column.')
+            p_value = columns.index('p-value') + 1
+            for line_number, line in enumerate(fh, start=2):
+                if n_records is not None and line_number > n_records + 1:
+                    break
+                cells = line.replace('\n', '').split('\t')
+                if len(cells) != len(columns) + 1:
+                    raise ValidationError(f'Wrong number of values on '
+                                          f'line {line_number}.')
+                if not is_float(cells[p_value]) or not (
+                        0 <= float(cells[p_value]) <= 1 or
+                        cells[p_value] in _NAN_VALUES):
+                    raise ValidationError(f'p-value on line {line_number} '
+                                          f'should be between 0 and 1.')
 
     def _validate_(self, level):
-        record_count_map = {'min': 1, 'max': None}
+        record_count_map = {'min': 5, 'max': None}
+        self._validate(record_count_map[level])
+
+
+class HullOverlapFormat(model.TextFileFormat):
+    def _validate(self, n_records=None):
+        with self.open() as fh:
+            header = fh.readline()
+            columns = [head.replace('\n', '')
+                       for head in header.split('\t')][1:]
+            for column in ('overlap_volume', 'overlap_jaccard'):
+                if column not in columns:
+                    raise ValidationError(f'There should be an {column} '
+                                          f'column.')
+            jaccard = columns.index('overlap_jaccard') + 1
+            for line_number, line in enumerate(fh, start=2):
+                if n_records is not None and line_number > n_records + 1:
+                    break
+                cells = line.replace('\n', '').split('\t')
+                if len(cells) != len(columns) + 1:
+                    raise ValidationError(f'Wrong number of values on '
+                                          f'line {line_number}.')
+                if not is_float(cells[jaccard]) or not (
+                        0 <= float(cells[jaccard]) <= 1 or
+                        cells[jaccard] in _NAN_VALUES):
+                    raise ValidationError(f'overlap_jaccard on line '
+                                          f'{line_number} should be '
+                                          f'between 0 and 1.')
+
+    def _validate_(self, level):
+        record_count_map = {'min': 5, 'max': None}
         self._validate(record_count_map[level])
 
 
@@ -47,3 +278,23 @@ def is_float(str):
 HullsDirectoryFormat = model.SingleFileDirectoryFormat(
     'HullsDirectoryFormat', 'hulls.tsv',
     HullsFormat)
+
+HullVerticesDirectoryFormat = model.SingleFileDirectoryFormat(
+    'HullVerticesDirectoryFormat', 'hull_vertices.tsv',
+    HullVerticesFormat)
+
+HullsNPZDirectoryFormat = model.SingleFileDirectoryFormat(
+    'HullsNPZDirectoryFormat', 'hulls.npz',
+    HullsNPZFormat)
+
+HullSignificanceDirectoryFormat = model.SingleFileDirectoryFormat(
+    'HullSignificanceDirectoryFormat', 'significance.tsv',
+    HullSignificanceFormat)
+
+HullOverlapDirectoryFormat = model.SingleFileDirectoryFormat(
+    'HullOverlapDirectoryFormat', 'overlap.tsv',
+    HullOverlapFormat)
+
+HullGeometryDirectoryFormat = model.SingleFileDirectoryFormat(
+    'HullGeometryDirectoryFormat', 'hull_geometry.npz',
+    HullGeometryFormat)
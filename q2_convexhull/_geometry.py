@@ -0,0 +1,84 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+
+class HullSurfaces:
+    """ Vertices and boundary simplices of the convex hull of every
+    subject, held in flat arrays.
+
+    The vertices of hull `i` are rows `vertex_offsets[i]` to
+    `vertex_offsets[i + 1]` of `vertex_ids` and `vertex_coordinates`,
+    and its simplices (triangles in 3 dimensions, edges in 2) are rows
+    `simplex_offsets[i]` to `simplex_offsets[i + 1]` of `simplices`,
+    which index the vertex rows. A hull Qhull failed on has neither.
+
+    Attributes
+    ----------
+    subjects: pandas.DataFrame
+        Key columns of each hull, as in the hulls table.
+    vertex_offsets, simplex_offsets: numpy.ndarray
+        Start of each hull's vertices and simplices, followed by
+        their total number.
+    vertex_ids: numpy.ndarray
+        Sample ID of each vertex.
+    vertex_coordinates: numpy.ndarray
+        Coordinates of each vertex, shape (n_vertices, n_dimensions).
+    simplices: numpy.ndarray
+        Vertex rows of each simplex, shape (n_simplices, n_dimensions).
+    """
+
+    def __init__(self, subjects, vertex_offsets, vertex_ids,
+                 vertex_coordinates, simplex_offsets, simplices):
+        self.subjects = subjects
+        self.vertex_offsets = vertex_offsets
+        self.vertex_ids = vertex_ids
+        self.vertex_coordinates = vertex_coordinates
+        self.simplex_offsets = simplex_offsets
+        self.simplices = simplices
+
+    def __len__(self):
+        return len(self.subjects)
+
+    def hull(self, i):
+        """ Vertex sample IDs, vertex coordinates and simplices of
+        hull `i`, the simplices indexing its own vertices.
+        """
+        start, end = self.vertex_offsets[i], self.vertex_offsets[i + 1]
+        simplices = self.simplices[
+            self.simplex_offsets[i]:self.simplex_offsets[i + 1]]
+        return (self.vertex_ids[start:end],
+                self.vertex_coordinates[start:end], simplices - start)
+
+    def write(self, fh):
+        """ Writes the arrays to an uncompressed NumPy .npz archive,
+        text as fixed width unicode so it loads without pickle.
+        """
+        arrays = {'key_columns': np.array(self.subjects.columns, dtype=str),
+                  'vertex_offsets': self.vertex_offsets,
+                  'vertex_ids': np.asarray(self.vertex_ids).astype(str),
+                  'vertex_coordinates': self.vertex_coordinates,
+                  'simplex_offsets': self.simplex_offsets,
+                  'simplices': self.simplices}
+        for i, column in enumerate(self.subjects.columns):
+            arrays[f'key_{i}'] = self.subjects[column].to_numpy().astype(str)
+        np.savez(fh, **arrays)
+
+    @classmethod
+    def read(cls, path):
+        with np.load(path, allow_pickle=False) as npz:
+            columns = [str(column) for column in npz['key_columns']]
+            subjects = pd.DataFrame(
+                {column: npz[f'key_{i}'].astype(object)
+                 for i, column in enumerate(columns)}, columns=columns)
+            return cls(subjects, npz['vertex_offsets'],
+                       npz['vertex_ids'].astype(object),
+                       npz['vertex_coordinates'], npz['simplex_offsets'],
+                       npz['simplices'])
@@ -0,0 +1,100 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+
+class SubjectGroups:
+    """ Samples grouped by subject.
+
+    The coordinates of all samples are held in one C-contiguous
+    float64 array sorted by subject, so the points of each subject
+    are a contiguous view into it rather than a copy.
+
+    Attributes
+    ----------
+    subjects: pandas.Index
+        Sorted unique subject IDs, a MultiIndex when grouped by
+        several columns.
+    coords: numpy.ndarray
+        Coordinates of all samples, sorted by subject.
+    offsets: numpy.ndarray
+        Start of each subject's block in `coords`, followed by the
+        total number of samples.
+    sample_ids: pandas.Index
+        Sample ID of each row of `coords`.
+    """
+
+    def __init__(self, subjects, coords, offsets, sample_ids):
+        self.subjects = subjects
+        self.coords = coords
+        self.offsets = offsets
+        self.sample_ids = sample_ids
+
+    def __len__(self):
+        return len(self.subjects)
+
+    @property
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    def block(self, i):
+        return self.coords[self.offsets[i]:self.offsets[i + 1]]
+
+    def blocks(self, which=None):
+        if which is None:
+            which = range(len(self))
+        return [self.block(i) for i in which]
+
+
+def group_subjects(subject_ids, coords):
+    """ Groups sample coordinates by subject in a single sort.
+
+    Parameters
+    ----------
+    subject_ids: pandas.Series or pandas.DataFrame
+        Subject ID of each sample, indexed by sample ID and aligned
+        with the rows of `coords`. A data frame groups by the
+        combination of its columns, e.g. subject and body site.
+        Samples with a missing subject ID are dropped, as in
+        `pandas.DataFrame.groupby`.
+
+    coords: numpy.ndarray
+        Sample coordinates, shape (n_samples, n_dimensions).
+
+    Returns
+    -------
+    SubjectGroups
+        Subjects in sorted order, with the samples of each subject
+        kept in their input order.
+    """
+
+    if isinstance(subject_ids, pd.DataFrame):
+        codes = np.full(len(subject_ids), -1, dtype=np.intp)
+        complete = subject_ids.notna().all(axis=1).to_numpy()
+        codes[complete], subjects = pd.MultiIndex.from_frame(
+            subject_ids[complete]).factorize(sort=True)
+        subjects = pd.MultiIndex.from_tuples(
+            list(subjects), names=list(subject_ids.columns))
+    else:
+        codes, subjects = pd.factorize(subject_ids, sort=True)
+        subjects = pd.Index(subjects)
+    positions = np.flatnonzero(codes >= 0)
+    codes = codes[positions]
+    # a stable sort keeps each subject's samples in input order
+    positions = positions[np.argsort(codes, kind='stable')]
+
+    coords = np.ascontiguousarray(np.asarray(coords)[positions],
+                                  dtype=np.float64)
+    offsets = np.zeros(len(subjects) + 1, dtype=np.intp)
+    np.cumsum(np.bincount(codes, minlength=len(subjects)),
+              out=offsets[1:])
+    sample_ids = subject_ids.index[positions]
+
+    return SubjectGroups(subjects, coords, offsets, sample_ids)
@@ -0,0 +1,133 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# rows parsed at once while streaming the sample coordinates
+_CHUNK = 65536
+
+
+class OrdinationCoordinates:
+    """ Leading PCs of the sample coordinates of an ordination.
+
+    A light-weight stand-in for `skbio.OrdinationResults` exposing the
+    `samples` data frame that the hull methods use, holding only the
+    PCs they need.
+
+    Attributes
+    ----------
+    samples: pandas.DataFrame
+        Sample coordinates along the leading PCs, indexed by sample
+        ID, backed by one float64 array.
+    n_components: int
+        Number of PCs of the full ordination.
+    """
+
+    def __init__(self, samples, n_components):
+        self.samples = samples
+        self.n_components = n_components
+
+    @classmethod
+    def read(cls, path, number_of_dimensions, memmap=None):
+        """ Streams the sample coordinates of an ordination file in
+        scikit-bio's text format, parsing only the leading PCs.
+
+        Parameters
+        ----------
+        path: str
+            Ordination file.
+
+        number_of_dimensions: int or None
+            Number of leading PCs to keep, all of them when None.
+
+        memmap: str, optional
+            Path of a .npy file the coordinates are written to and
+            memory-mapped from, instead of being held in memory.
+
+        Returns
+        -------
+        OrdinationCoordinates
+
+        Raises
+        ------
+        ValueError
+            If the file has no sample coordinates section.
+        """
+
+        with open(path) as fh:
+            for line in iter(fh.readline, ''):
+                fields = line.rstrip('\n').split('\t')
+                if fields[0] == 'Site':
+                    n_samples, n_components = map(int, fields[1:3])
+                    break
+            else:
+                raise ValueError('Ordination file has no sample '
+                                 'coordinates.')
+
+            n_columns = n_components
+            if number_of_dimensions is not None:
+                n_columns = min(number_of_dimensions, n_components)
+            shape = (n_samples, n_columns)
+            if memmap is None:
+                coords = np.empty(shape)
+            else:
+                coords = np.lib.format.open_memmap(
+                    memmap, mode='w+', dtype=np.float64, shape=shape)
+
+            # splitting off only the leading fields skips tokenizing
+            # every trailing PC of the line
+            ids = []
+            for start in range(0, n_samples, _CHUNK):
+                lines = [fh.readline().split('\t', n_columns + 1)
+                         for _ in range(min(_CHUNK, n_samples - start))]
+                ids.extend(fields[0] for fields in lines)
+                values = [value for fields in lines
+                          for value in fields[1:n_columns + 1]]
+                coords[start:start + len(lines)] = np.array(
+                    values, dtype=np.float64).reshape(len(lines), n_columns)
+
+        index = pd.Index(ids, dtype=object)
+        columns = [f'PC{i + 1}' for i in range(n_columns)]
+        samples = pd.DataFrame(coords, index=index, columns=columns,
+                               copy=False)
+        return cls(samples, n_components)
+
+
+class MappedOrdinationCoordinates(OrdinationCoordinates):
+    """ Leading PCs of the sample coordinates of an ordination,
+    memory-mapped from a temporary file rather than held in memory.
+    """
+
+    @classmethod
+    def read(cls, path, number_of_dimensions):
+        fd, memmap = tempfile.mkstemp(suffix='.npy')
+        os.close(fd)
+        try:
+            return super().read(path, number_of_dimensions, memmap=memmap)
+        finally:
+            # the mapping outlives the file name, nothing is left behind
+            os.remove(memmap)
+
+
+class AllOrdinationCoordinates(OrdinationCoordinates):
+    """ Sample coordinates along every PC of an ordination, for
+    methods that choose the number of PCs at run time.
+    """
+
+
+def n_components(pcoa):
+    """ Number of PCs of an ordination, `skbio.OrdinationResults` or
+    `OrdinationCoordinates`.
+    """
+    if isinstance(pcoa, OrdinationCoordinates):
+        return pcoa.n_components
+    return len(pcoa.samples.columns)
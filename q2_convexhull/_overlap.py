@@ -0,0 +1,119 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import numpy as np
+
+from q2_convexhull._defaults import BATCH_RELATIVE_TOLERANCE
+
+
+def candidate_pairs(lower, upper, partitions=None):
+    """ Finds the pairs of axis-aligned boxes that intersect.
+
+    Sweep and prune: the boxes are sorted by their lower bound along
+    the first axis, so the boxes that may intersect a box along that
+    axis are the contiguous run starting after it up to its upper
+    bound. Only those are checked along the other axes.
+
+    Parameters
+    ----------
+    lower, upper: numpy.ndarray
+        Bounds of the boxes, shape (n_boxes, n_dimensions).
+
+    partitions: numpy.ndarray, optional
+        Integer label of each box. Only boxes with the same label are
+        paired.
+
+    Returns
+    -------
+    first, second: numpy.ndarray
+        Indices of the boxes of each intersecting pair, with
+        first < second, sorted by first and then second. Boxes that
+        only touch are included.
+    """
+
+    n_boxes = len(lower)
+    if partitions is None:
+        partitions = np.zeros(n_boxes, dtype=np.intp)
+    order = np.lexsort((lower[:, 0], partitions))
+    lower, upper, partitions = lower[order], upper[order], partitions[order]
+    ends = np.searchsorted(partitions, partitions, side='right')
+
+    first, second = [], []
+    for i in range(n_boxes):
+        end = i + 1 + np.searchsorted(lower[i + 1:ends[i], 0], upper[i, 0],
+                                      side='right')
+        others = np.arange(i + 1, end)
+        hit = (np.all(lower[others, 1:] <= upper[i, 1:], axis=1) &
+               np.all(upper[others, 1:] >= lower[i, 1:], axis=1))
+        second.append(others[hit])
+        first.append(np.full(hit.sum(), i))
+
+    first = order[np.concatenate(first or [np.empty(0, dtype=np.intp)])]
+    second = order[np.concatenate(second or [np.empty(0, dtype=np.intp)])]
+    first, second = np.minimum(first, second), np.maximum(first, second)
+    pairs = np.lexsort((second, first))
+    return first[pairs], second[pairs]
+
+
+def intersection_volume(c_hull, other):
+    """ Volume of the intersection of two convex hulls.
+
+    Hulls with every vertex of one outside a facet of the other are
+    disjoint and skipped. Otherwise the largest ball inside both
+    hulls is found with a linear program; when there is none the
+    hulls at most touch. Its center seeds the half-space
+    intersection, and the volume is that of the hull of the
+    intersection vertices.
+
+    Parameters
+    ----------
+    c_hull, other: scipy.spatial.ConvexHull
+        Full-dimensional hulls.
+
+    Returns
+    -------
+    float
+        Intersection volume, zero when the hulls do not overlap and
+        NaN when Qhull fails on the intersection.
+    """
+
+    from scipy.optimize import linprog
+    from scipy.spatial import (ConvexHull, HalfspaceIntersection,
+                               QhullError)
+
+    for facets, vertices in ((c_hull, other), (other, c_hull)):
+        distance = (facets.equations[:, :-1] @
+                    vertices.points[vertices.vertices].T +
+                    facets.equations[:, -1:])
+        if np.any(np.all(distance > 0, axis=1)):
+            return 0.0
+
+    # facet equations hold unit normals and offsets, with interior
+    # points x satisfying normal @ x + offset <= 0
+    halfspaces = np.vstack([c_hull.equations, other.equations])
+    normals, offsets = halfspaces[:, :-1], halfspaces[:, -1]
+    n_dimensions = normals.shape[1]
+
+    # Chebyshev center: maximize r with normal @ x + r <= -offset
+    objective = np.zeros(n_dimensions + 1)
+    objective[-1] = -1
+    result = linprog(objective,
+                     A_ub=np.hstack([normals, np.ones((len(normals), 1))]),
+                     b_ub=-offsets,
+                     bounds=[(None, None)] * n_dimensions + [(0, None)],
+                     method='highs')
+    scale = max(np.ptp(c_hull.points, axis=0).max(),
+                np.ptp(other.points, axis=0).max())
+    if result.status != 0 or result.x[-1] <= BATCH_RELATIVE_TOLERANCE * scale:
+        return 0.0
+
+    try:
+        intersection = HalfspaceIntersection(halfspaces, result.x[:-1])
+        return ConvexHull(intersection.intersections).volume
+    except QhullError:
+        return np.nan
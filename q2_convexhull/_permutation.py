@@ -0,0 +1,95 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from q2_convexhull._defaults import PERMUTATION_CHUNK_ELEMENTS
+
+
+def permutation_f_test(values, codes, permutations, random_state=0,
+                       n_jobs=1):
+    """ One-way permutation test of a difference in the mean of
+    `values` between groups.
+
+    The statistic is the pseudo-F ratio of between to within group
+    sums of squares. The total sum of squares does not change under
+    permutation, so each permutation only needs the sum of every
+    group. Values are sorted by group once, making every group a
+    contiguous segment; a block of permutations is then one row-wise
+    shuffle of the values and one segment sum per row. Every block
+    has its own random stream, so blocks run on threads (the shuffle
+    releases the GIL) without changing the result.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        Measure of each subject.
+
+    codes: numpy.ndarray
+        Integer group of each subject, from 0 to the number of groups
+        minus one, with every group present.
+
+    permutations: int
+        Number of permutations. No p-value is computed when 0.
+
+    random_state: int (Default 0)
+        Seed of the permutations.
+
+    n_jobs: int (Default 1)
+        Number of threads shuffling blocks of permutations.
+
+    Returns
+    -------
+    statistic: float
+        Pseudo-F of the observed grouping.
+    p_value: float
+        Fraction of permutations, counting the observed grouping,
+        with a statistic at least as large. NaN without
+        permutations.
+    """
+
+    order = np.argsort(codes, kind='stable')
+    values = np.asarray(values, dtype=np.float64)[order]
+    sizes = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    n_values, n_groups = len(values), len(sizes)
+
+    centered = values - values.mean()
+    total = (centered ** 2).sum()
+    # group sums of centered values make the between group sum of
+    # squares a plain weighted sum
+    observed = _pseudo_f(np.add.reduceat(centered, starts), sizes, total,
+                         n_values, n_groups)
+    if permutations == 0:
+        return observed, np.nan
+
+    chunk = max(PERMUTATION_CHUNK_ELEMENTS // n_values, 1)
+    blocks = [min(chunk, permutations - start)
+              for start in range(0, permutations, chunk)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(blocks))
+
+    def exceeding(rows, seed):
+        shuffled = np.random.default_rng(seed).permuted(
+            np.broadcast_to(centered, (rows, n_values)), axis=1)
+        statistics = _pseudo_f(np.add.reduceat(shuffled, starts, axis=1),
+                               sizes, total, n_values, n_groups)
+        return int((statistics >= observed).sum())
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        exceed = sum(executor.map(exceeding, blocks, seeds))
+
+    return observed, (exceed + 1) / (permutations + 1)
+
+
+def _pseudo_f(sums, sizes, total, n_values, n_groups):
+    between = (sums ** 2 / sizes).sum(axis=-1)
+    within = total - between
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (between / (n_groups - 1)) / (within / (n_values - n_groups))
@@ -0,0 +1,81 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from itertools import product
+
+import numpy as np
+
+from q2_convexhull._defaults import BATCH_RELATIVE_TOLERANCE
+
+_CHUNK = 4096
+
+
+def hull_candidates(points):
+    """ Finds the points that may be vertices of the convex hull.
+
+    Akl-Toussaint elimination: the points extreme along the axis and
+    diagonal directions span a polytope inside the hull, and every
+    point strictly inside that polytope can not be a hull vertex.
+    Removing them leaves the hull, and so its volume and area,
+    unchanged.
+
+    Parameters
+    ----------
+    points: numpy.ndarray
+        Coordinates of shape (n_points, n_dimensions).
+
+    Returns
+    -------
+    numpy.ndarray
+        Sorted indices of the points that were not eliminated. All
+        points are kept when the extreme points are degenerate.
+    """
+
+    from scipy.spatial import ConvexHull, QhullError
+
+    points = np.asarray(points, dtype=np.float64)
+    n_points, n_dimensions = points.shape
+    everything = np.arange(n_points)
+
+    # work on cache sized (n_dimensions, chunk) blocks so the
+    # projections are never materialized for all points at once
+    transposed = np.ascontiguousarray(points.T)
+    chunks = [slice(start, start + _CHUNK)
+              for start in range(0, n_points, _CHUNK)]
+
+    directions = np.array([direction for direction
+                           in product((-1, 0, 1), repeat=n_dimensions)
+                           if any(direction)], dtype=np.float64)
+    best = np.full(len(directions), -np.inf)
+    extreme = np.zeros(len(directions), dtype=np.intp)
+    for chunk in chunks:
+        projection = directions @ transposed[:, chunk]
+        arg = projection.argmax(axis=1)
+        value = projection[np.arange(len(directions)), arg]
+        better = value > best
+        best[better] = value[better]
+        extreme[better] = arg[better] + chunk.start
+    extreme = np.unique(extreme)
+    if len(extreme) <= n_dimensions:
+        return everything
+
+    try:
+        inner = ConvexHull(points[extreme])
+    except QhullError:
+        return everything
+
+    # keep anything on or near the boundary of the inner polytope,
+    # facet normals are unit length so distances are in point units
+    scale = np.ptp(points[extreme], axis=0).max()
+    tolerance = BATCH_RELATIVE_TOLERANCE * scale
+    normals, offsets = inner.equations[:, :-1], inner.equations[:, -1:]
+    distance = np.empty(n_points)
+    for chunk in chunks:
+        np.max(normals @ transposed[:, chunk] + offsets, axis=0,
+               out=distance[chunk])
+    return np.flatnonzero(distance >= -tolerance)
@@ -0,0 +1,122 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2022--, convex-hull development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from q2_convexhull._defaults import PROFILE_ENVIRONMENT, PROFILE_N_SLOWEST
+
+
+class Profile:
+    """ Opt-in record of where a hull run spends its time.
+
+    Every stage gets its wall time and the peak memory traced while
+    it ran. Subjects passed to Qhull get their own time, point count,
+    vertex and facet count, batched subjects are recorded per batch,
+    and runs with a hull cache record its hits and misses. Subjects
+    skipped or failed are all listed with the reason, warnings only
+    name the first few.
+    Memory tracing slows allocation heavy code, so a profile is only
+    created on request, see `from_environment`.
+
+    Parameters
+    ----------
+    path: str, optional
+        JSON file the report is written to on `close`.
+
+    n_slowest: int (Default `PROFILE_N_SLOWEST`)
+        Number of slowest subjects listed in the report.
+    """
+
+    def __init__(self, path=None, n_slowest=PROFILE_N_SLOWEST):
+        self.path = path
+        self.n_slowest = n_slowest
+        self.stages = []
+        self.subjects = []
+        self.batches = []
+        self.cache = None
+        self.excluded = []
+        self._tracing = not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+    @classmethod
+    def from_environment(cls):
+        """ Profile written to the path in the `PROFILE_ENVIRONMENT`
+        variable, None when it is not set.
+        """
+        path = os.environ.get(PROFILE_ENVIRONMENT)
+        return cls(path) if path else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def stage(self, name):
+        start_memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            self.stages.append({'stage': name, 'seconds': seconds,
+                                'peak_bytes': peak - start_memory})
+
+    def subject(self, subject, seconds, n_points, c_hull):
+        self.subjects.append({'subject': str(subject), 'seconds': seconds,
+                              'n_points': n_points,
+                              'n_vertices': len(c_hull.vertices),
+                              'n_facets': len(c_hull.simplices)})
+
+    def batch(self, n_subjects, n_points, seconds):
+        self.batches.append({'n_subjects': n_subjects,
+                             'n_points': n_points, 'seconds': seconds})
+
+    def cached(self, hits, misses):
+        self.cache = {'hits': hits, 'misses': misses}
+
+    def exclude(self, reason, subjects):
+        self.excluded.append({'reason': reason,
+                              'n_subjects': len(subjects),
+                              'subjects': [str(subject)
+                                           for subject in subjects]})
+
+    def report(self):
+        slowest = sorted(self.subjects, key=lambda record: -record['seconds'])
+        return {'stages': self.stages,
+                'qhull': {'n_subjects': len(self.subjects),
+                          'seconds': sum(record['seconds']
+                                         for record in self.subjects)},
+                'batched': {'n_subjects': sum(record['n_subjects']
+                                              for record in self.batches),
+                            'seconds': sum(record['seconds']
+                                           for record in self.batches)},
+                'cache': self.cache,
+                'excluded': self.excluded,
+                'slowest_subjects': slowest[:self.n_slowest],
+                'subjects': self.subjects,
+                'batches': self.batches}
+
+    def close(self):
+        """ Stops memory tracing and writes the report to `path`,
+        when read from the environment.
+        """
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        if self.path is not None:
+            with open(self.path, 'w') as fh:
+                json.dump(self.report(), fh, indent=1)
@@ -1,15 +1,26 @@
 import numpy as np
 import pandas as pd
 from qiime2 import Metadata
+from q2_types.ordination import OrdinationFormat
+from q2_types.distance_matrix import LSMatFormat
 from .plugin_setup import plugin
-from ._format import HullsFormat
+from ._format import (HullsFormat, HullVerticesFormat, HullsNPZFormat,
+                      HullsDirectoryFormat, HullsNPZDirectoryFormat,
+                      HullSignificanceFormat, HullOverlapFormat,
+                      HullGeometryFormat)
+from ._ordination import (OrdinationCoordinates, AllOrdinationCoordinates,
+                          MappedOrdinationCoordinates)
+from ._distance import Distances
+from ._geometry import HullSurfaces
+from ._defaults import DEFAULT_N_DIMENSIONS
 
 
 @plugin.register_transformer
 def _1(data: pd.DataFrame) -> (HullsFormat):
     ff = HullsFormat()
     with ff.open() as fh:
-        data.to_csv(fh, sep='\t', header=True, na_rep=np.nan)
+        data.to_csv(fh, sep='\t', header=True, na_rep=np.nan,
+                    index_label=data.index.name or 'id')
     return ff
 
 
@@ -23,3 +34,175 @@ def _2(ff: HullsFormat) -> (pd.DataFrame):
 def _3(ff: HullsFormat) -> (Metadata):
     # with ff.open() as fh:
     return Metadata.load(str(ff))
+
+
+@plugin.register_transformer
+def _4(data: pd.DataFrame) -> (HullVerticesFormat):
+    ff = HullVerticesFormat()
+    with ff.open() as fh:
+        data.astype({'hull_vertex': int}).to_csv(
+            fh, sep='\t', header=True,
+            index_label=data.index.name or 'id')
+    return ff
+
+
+@plugin.register_transformer
+def _5(ff: HullVerticesFormat) -> (pd.DataFrame):
+    data = pd.read_csv(str(ff), sep='\t', index_col=0, dtype=str)
+    data['hull_vertex'] = data['hull_vertex'] == '1'
+    return data
+
+
+@plugin.register_transformer
+def _6(ff: OrdinationFormat) -> (OrdinationCoordinates):
+    # exact hulls use at most DEFAULT_N_DIMENSIONS PCs, leave the rest
+    # of the file unparsed
+    return OrdinationCoordinates.read(str(ff), DEFAULT_N_DIMENSIONS)
+
+
+def _write_hulls_npz(data, fh):
+    # one array per column, text columns as fixed width unicode so the
+    # archive loads without pickle
+    arrays = {'index': data.index.to_numpy().astype(str),
+              'index_name': np.array(data.index.name or 'id'),
+              'columns': np.array(data.columns, dtype=str)}
+    for i, column in enumerate(data.columns):
+        values = data[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        arrays[f'column_{i}'] = values
+    np.savez(fh, **arrays)
+
+
+def _read_hulls_npz(ff):
+    with np.load(str(ff), allow_pickle=False) as npz:
+        index = pd.Index(npz['index'], dtype=object,
+                         name=str(npz['index_name']))
+        columns = [str(column) for column in npz['columns']]
+        data = {column: npz[f'column_{i}']
+                for i, column in enumerate(columns)}
+    data = pd.DataFrame(data, index=index, columns=columns)
+    # restore text columns as python strings, as read from the TSV
+    text = [column for column in columns if data[column].dtype.kind == 'U']
+    data[text] = data[text].astype(object)
+    return data
+
+
+@plugin.register_transformer
+def _7(data: pd.DataFrame) -> (HullsNPZFormat):
+    ff = HullsNPZFormat()
+    with ff.open() as fh:
+        _write_hulls_npz(data, fh)
+    return ff
+
+
+@plugin.register_transformer
+def _8(ff: HullsNPZFormat) -> (pd.DataFrame):
+    return _read_hulls_npz(ff)
+
+
+@plugin.register_transformer
+def _9(ff: HullsNPZFormat) -> (Metadata):
+    return Metadata(_read_hulls_npz(ff).rename_axis('id'))
+
+
+def _read_hulls_tsv(ff):
+    # parse the TSV once, measures as floats and everything else as
+    # text, without the type inference of Metadata
+    hulls = pd.read_csv(str(ff), sep='\t', index_col=0, dtype=str,
+                        keep_default_na=False)
+    measures = [column for column in hulls.columns
+                if column.startswith('convexhull_')]
+    hulls[measures] = hulls[measures].astype(np.float64)
+    return hulls
+
+
+@plugin.register_transformer
+def _10(data: HullsDirectoryFormat) -> (HullsNPZDirectoryFormat):
+    result = HullsNPZDirectoryFormat()
+    result.file.write_data(_read_hulls_tsv(data.file.view(HullsFormat)),
+                           pd.DataFrame)
+    return result
+
+
+@plugin.register_transformer
+def _11(data: pd.DataFrame) -> (HullSignificanceFormat):
+    ff = HullSignificanceFormat()
+    with ff.open() as fh:
+        data.to_csv(fh, sep='\t', header=True, na_rep=np.nan,
+                    index_label=data.index.name or 'id')
+    return ff
+
+
+@plugin.register_transformer
+def _12(ff: HullSignificanceFormat) -> (pd.DataFrame):
+    return pd.read_csv(str(ff), sep='\t', index_col=0)
+
+
+@plugin.register_transformer
+def _13(ff: HullSignificanceFormat) -> (Metadata):
+    return Metadata.load(str(ff))
+
+
+@plugin.register_transformer
+def _14(ff: OrdinationFormat) -> (AllOrdinationCoordinates):
+    return AllOrdinationCoordinates.read(str(ff), None)
+
+
+@plugin.register_transformer
+def _15(ff: OrdinationFormat) -> (MappedOrdinationCoordinates):
+    return MappedOrdinationCoordinates.read(str(ff), DEFAULT_N_DIMENSIONS)
+
+
+@plugin.register_transformer
+def _16(ff: LSMatFormat) -> (Distances):
+    return Distances.read(str(ff))
+
+
+@plugin.register_transformer
+def _17(data: pd.DataFrame) -> (HullOverlapFormat):
+    ff = HullOverlapFormat()
+    with ff.open() as fh:
+        data.to_csv(fh, sep='\t', header=True, na_rep=np.nan,
+                    index_label=data.index.name or 'id')
+    return ff
+
+
+@plugin.register_transformer
+def _18(ff: HullOverlapFormat) -> (pd.DataFrame):
+    return pd.read_csv(str(ff), sep='\t', index_col=0)
+
+
+@plugin.register_transformer
+def _19(ff: HullOverlapFormat) -> (Metadata):
+    return Metadata.load(str(ff))
+
+
+@plugin.register_transformer
+def _20(data: HullSurfaces) -> (HullGeometryFormat):
+    ff = HullGeometryFormat()
+    with ff.open() as fh:
+        data.write(fh)
+    return ff
+
+
+@plugin.register_transformer
+def _21(ff: HullGeometryFormat) -> (HullSurfaces):
+    return HullSurfaces.read(str(ff))
+
+
+@plugin.register_transformer
+def _22(ff: HullsFormat) -> (HullsNPZDirectoryFormat):
+    # hull tables streamed to a TSV, as by chunked_convex_hull
+    result = HullsNPZDirectoryFormat()
+    result.file.write_data(_read_hulls_tsv(ff), pd.DataFrame)
+    return result
+
+
+@plugin.register_transformer
+def _23(data: HullsNPZDirectoryFormat) -> (HullsDirectoryFormat):
+    # exports hull artifacts as the TSV earlier versions stored
+    result = HullsDirectoryFormat()
+    result.file.write_data(
+        _read_hulls_npz(data.file.view(HullsNPZFormat)), pd.DataFrame)
+    return result
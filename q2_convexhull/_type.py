@@ -3,3 +3,12 @@ from q2_types.sample_data import SampleData
 
 Hulls = SemanticType(
     'Hulls', variant_of=SampleData.field['type'])
+
+HullVertices = SemanticType(
+    'HullVertices', variant_of=SampleData.field['type'])
+
+HullSignificance = SemanticType('HullSignificance')
+
+HullOverlap = SemanticType('HullOverlap')
+
+HullGeometry = SemanticType('HullGeometry')
@@ -6,38 +6,97 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import time
+import numpy as np
 import pandas as pd
-from scipy.spatial import ConvexHull
-from skbio import OrdinationResults
-from q2_convexhull._defaults import (DEFAULT_N_DIMENSIONS)
-from warnings import warn
+from q2_convexhull._approximate import radial_volume
+from q2_convexhull._batch import batch_hull_measures
+from q2_convexhull._cache import HullCache
+from q2_convexhull._distance import Distances
+from q2_convexhull._format import HullsFormat
+from q2_convexhull._geometry import HullSurfaces
+from q2_convexhull._grouping import group_subjects
+from q2_convexhull._ordination import (OrdinationCoordinates,
+                                       AllOrdinationCoordinates,
+                                       MappedOrdinationCoordinates,
+                                       n_components)
+from q2_convexhull._overlap import candidate_pairs, intersection_volume
+from q2_convexhull._permutation import permutation_f_test
+from q2_convexhull._prefilter import hull_candidates
+from q2_convexhull._profile import Profile
+from q2_convexhull._defaults import (DEFAULT_N_DIMENSIONS,
+                                     DEFAULT_CACHE_SIZE,
+                                     DEFAULT_EXACT_MAX_DIMENSIONS,
+                                     DEFAULT_TIME_BUDGET,
+                                     DEFAULT_MAX_DIRECTIONS,
+                                     DEFAULT_N_REPLICATES,
+                                     DEFAULT_PERMUTATIONS,
+                                     DISTANCE_PCOA_OVERSAMPLING,
+                                     BATCH_MAX_POINTS,
+                                     BOOTSTRAP_CHUNK_REPLICATES,
+                                     CHUNKED_MAX_SAMPLES,
+                                     PARALLEL_MIN_CHUNK_SIZE,
+                                     PREFILTER_MIN_POINTS,
+                                     WARN_MAX_SUBJECTS)
+from warnings import catch_warnings, simplefilter, warn
 from qiime2 import Metadata
 
+# scipy and scikit-bio are imported by the functions using them, so
+# that loading the plugin, which every qiime command does, does not pay
+# for them
 
 
-def validate(metadata, pcoa, individual_id_column):
+def validate(metadata, pcoa, individual_id_column, strata_columns=None):
+    """ Aligns the subject ID column of `metadata` to the PCoA samples.
 
-    meta = metadata.to_dataframe()
+    Only `individual_id_column` and `strata_columns` are read from
+    `metadata`, the rest of the table is never converted to a data
+    frame.
 
-    if not all(z in meta.index for z in list(pcoa.samples.index)):
-        raise KeyError('PCoA result indeces do not match metadata.')
+    Returns
+    -------
+    pandas.DataFrame
+        Data frame of subject IDs, followed by any strata columns,
+        indexed by the PCoA sample IDs, in PCoA order.
+    """
+
+    samples = pcoa.samples.index
+    missing = samples.difference(pd.Index(metadata.ids))
+    if len(missing) > 0:
+        raise KeyError(f'PCoA result indeces do not match metadata. '
+                       f'Missing sample IDs: '
+                       f'{", ".join(map(str, missing))}')
 
     if individual_id_column not in metadata.columns:
         raise ValueError(f'Unique column id {individual_id_column} '
                          f'not found in metadata columns.')
+    for column in strata_columns or []:
+        if column not in metadata.columns:
+            raise ValueError(f'Strata column {column} not found in '
+                             f'metadata columns.')
 
-    if len(pcoa.samples.columns) < 2:
+    if n_components(pcoa) < 2:
         raise ValueError('PCoA result has too few dimensions.')
 
-    meta = meta.loc[list(pcoa.samples.index)]
+    columns = [individual_id_column] + list(strata_columns or [])
+    meta = pd.concat([metadata.get_column(column).to_series().loc[samples]
+                      for column in columns], axis=1)
 
     return meta
 
 
 def convex_hull(metadata: Metadata,
-                pcoa: OrdinationResults,
+                pcoa: OrdinationCoordinates,
                 individual_id_column: str,
-                number_of_dimensions: int = DEFAULT_N_DIMENSIONS) \
+                number_of_dimensions: int = DEFAULT_N_DIMENSIONS,
+                n_jobs: int = 1,
+                cache_dir: str = None,
+                cache_size: int = DEFAULT_CACHE_SIZE,
+                strata_columns: list = None,
+                joggle: bool = False,
+                extended_metrics: bool = False) \
                     -> (pd.DataFrame):
     """ Computes Convex Hull of a set of samples with multiple
     timepoints for each sample.
@@ -47,8 +106,8 @@ def convex_hull(metadata: Metadata,
     metadata: qiime2.Metadata table
         Metadata table associated with PCoA results.
 
-    pcoa: skbio.OrdinationResults
-        PCoA result.
+    pcoa: OrdinationCoordinates or skbio.OrdinationResults
+        PCoA result. Only the first 3 PCs are used.
 
     individual_id_column: str
         Unique subject identifier column in `metadata`. Must
@@ -59,18 +118,1251 @@ def convex_hull(metadata: Metadata,
         Number of dimensions along which to calculate the
         convex hull volume and area.
 
+    n_jobs: int (Default 1)
+        Number of threads used to compute the hulls. Subjects
+        are split into contiguous chunks, so the output order
+        does not depend on this value.
+
+    cache_dir: str (Default None)
+        Directory of an on-disk cache of hull measures, keyed by
+        each subject's coordinates. Subjects found in the cache
+        skip the hull computation. Not used when None.
+
+    cache_size: int (Default `DEFAULT_CACHE_SIZE`)
+        Maximum number of subjects kept in the cache, evicting
+        the least recently used ones.
+
+    strata_columns: list of str (Default None)
+        Further columns of `metadata`, such as body site, splitting
+        each subject's samples into strata with a hull each. All
+        strata are grouped in the same pass.
+
+    joggle: bool (Default False)
+        Retry subjects Qhull fails on, e.g. with coplanar or
+        duplicate points, with joggled input ('QJ'). Subjects that
+        still fail get NaN volume and area.
+
+    extended_metrics: bool (Default False)
+        Also report the number of hull vertices, the centroid of the
+        hull, its diameter over the hull vertices and the number of
+        timepoints per unit volume, from the same Qhull call. Every
+        subject then goes through Qhull, and the cache is not used.
+
     Returns
     -------
     pandas.DataFrame
         Data frame with unique ID, convex hull volume,
         and convex hull area. Columns are
-        `column`, convexhull_volume, convexhull_area.
+        `column`, any `strata_columns`, convexhull_volume,
+        convexhull_area, and with `extended_metrics`
+        convexhull_n_vertices, convexhull_centroid_<PC> for each PC,
+        convexhull_diameter and convexhull_density.
 
     Raises
     ------
     TypeError, ValueError
         If inputs are of incorrect type. If column ID not
         found in metadata.
+
+    Notes
+    -----
+    Setting the `Q2_CONVEXHULL_PROFILE` environment variable to a file
+    path writes a JSON profile of the run to it: wall time and peak
+    memory of each stage, Qhull time, point, vertex and facet count
+    of each subject, the slowest subjects, the hits and misses of
+    the hull cache, and every subject skipped or failed.
+    """
+
+    with Profile.from_environment() or nullcontext() as profile:
+        groups, keep = _subject_groups(metadata, pcoa,
+                                       individual_id_column,
+                                       number_of_dimensions, profile=profile,
+                                       strata_columns=strata_columns)
+        people = groups.subjects[keep]
+        blocks = groups.blocks(np.flatnonzero(keep))
+        n_dimensions = groups.coords.shape[1]
+        extended = {}
+        if extended_metrics:
+            with _stage(profile, 'hulls'):
+                metrics = hull_metrics(blocks, n_dimensions, n_jobs,
+                                       profile=profile, labels=people,
+                                       joggle=joggle)
+            volumes, areas = metrics[:, 0], metrics[:, 1]
+            names = (['convexhull_n_vertices'] +
+                     [f'convexhull_centroid_{column}' for column
+                      in pcoa.samples.columns[:n_dimensions]] +
+                     ['convexhull_diameter', 'convexhull_density'])
+            extended = dict(zip(names, metrics[:, 2:].T))
+        elif cache_dir is None:
+            with _stage(profile, 'hulls'):
+                volumes, areas = hull_measures(blocks, n_dimensions, n_jobs,
+                                               profile=profile,
+                                               labels=people, joggle=joggle)
+        else:
+            with HullCache(cache_dir, cache_size) as cache:
+                with _stage(profile, 'cache_get'):
+                    keys = [cache.key(block) for block in blocks]
+                    volumes, areas, found = cache.get(keys)
+                missing = np.flatnonzero(~found)
+                with _stage(profile, 'hulls'):
+                    volumes[missing], areas[missing] = hull_measures(
+                        [blocks[i] for i in missing], n_dimensions, n_jobs,
+                        profile=profile, labels=people[missing],
+                        joggle=joggle)
+                with _stage(profile, 'cache_put'):
+                    # failed subjects are retried on the next run
+                    missing = missing[~np.isnan(volumes[missing])]
+                    cache.put([keys[i] for i in missing],
+                              volumes[missing], areas[missing])
+            if profile is not None:
+                profile.cached(cache.hits, cache.misses)
+        with _stage(profile, 'assemble'):
+            keys = [individual_id_column] + list(strata_columns or [])
+            hulls = {key: people.get_level_values(i)
+                     for i, key in enumerate(keys)}
+            hulls['convexhull_volume'] = volumes
+            hulls['convexhull_area'] = areas
+            hulls.update(extended)
+            hulls = pd.DataFrame(hulls, index=range(len(people)))
+
+    return hulls
+
+
+def convex_hull_geometry(metadata: Metadata,
+                         pcoa: OrdinationCoordinates,
+                         individual_id_column: str,
+                         number_of_dimensions: int = DEFAULT_N_DIMENSIONS,
+                         n_jobs: int = 1,
+                         strata_columns: list = None,
+                         joggle: bool = False) \
+        -> (pd.DataFrame, HullSurfaces):
+    """ Computes the convex hulls of `convex_hull`, also keeping the
+    vertices and boundary simplices of every hull.
+
+    Every subject goes through Qhull once, and its volume, area,
+    vertices and simplices are all read from that call, so hulls can
+    be drawn or reused later without recomputing them from the
+    ordination.
+
+    Parameters
+    ----------
+    metadata, pcoa, individual_id_column, number_of_dimensions,
+    n_jobs, strata_columns, joggle:
+        As in `convex_hull`.
+
+    Returns
+    -------
+    hulls: pandas.DataFrame
+        Data frame with unique ID, convex hull volume,
+        and convex hull area, as returned by `convex_hull`.
+    hull_geometry: HullSurfaces
+        Vertex sample IDs, vertex coordinates and simplices of each
+        hull, in the order of `hulls`.
+    """
+
+    groups, keep = _subject_groups(metadata, pcoa, individual_id_column,
+                                   number_of_dimensions,
+                                   strata_columns=strata_columns)
+    which = np.flatnonzero(keep)
+    people = groups.subjects[which]
+    n_dimensions = groups.coords.shape[1]
+    volumes, areas, n_vertices, vertices, n_simplices, simplices = \
+        _map_chunks(
+            lambda chunk, _: _hull_surfaces(chunk, n_dimensions, joggle),
+            groups.blocks(which), people, n_jobs, PARALLEL_MIN_CHUNK_SIZE)
+    _warn_failed(volumes, people)
+
+    vertex_offsets = np.zeros(len(which) + 1, dtype=np.int64)
+    np.cumsum(n_vertices, out=vertex_offsets[1:])
+    simplex_offsets = np.zeros(len(which) + 1, dtype=np.int64)
+    np.cumsum(n_simplices, out=simplex_offsets[1:])
+    # rows of each block to rows of all coordinates, and simplices from
+    # the vertices of their hull to all vertices
+    rows = vertices + np.repeat(groups.offsets[which], n_vertices)
+    simplices += np.repeat(vertex_offsets[:-1], n_simplices)[:, None]
+
+    keys = [individual_id_column] + list(strata_columns or [])
+    subjects = pd.DataFrame({key: people.get_level_values(i)
+                             for i, key in enumerate(keys)},
+                            index=range(len(which)))
+    hulls = subjects.assign(convexhull_volume=volumes,
+                            convexhull_area=areas)
+    surfaces = HullSurfaces(subjects, vertex_offsets,
+                            groups.sample_ids[rows].to_numpy(),
+                            groups.coords[rows], simplex_offsets, simplices)
+    return hulls, surfaces
+
+
+def distance_convex_hull(metadata: Metadata,
+                         distance_matrix: Distances,
+                         individual_id_column: str,
+                         number_of_dimensions: int = DEFAULT_N_DIMENSIONS,
+                         n_jobs: int = 1,
+                         random_state: int = 0) -> (pd.DataFrame):
+    """ Computes the convex hulls of `convex_hull` from a distance
+    matrix, ordinating only the PCs the hulls use.
+
+    Rather than a full eigendecomposition of the distance matrix, the
+    PCoA is computed with scikit-bio's randomized 'fsvd' method for
+    the leading `number_of_dimensions` PCs plus
+    `DISTANCE_PCOA_OVERSAMPLING` more, which makes the leading PCs
+    close to exact when the eigenvalues decay, and only the leading
+    PCs are kept.
+
+    Parameters
+    ----------
+    metadata: qiime2.Metadata table
+        Metadata table associated with the distance matrix.
+
+    distance_matrix: Distances
+        Distances between the samples.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata`.
+
+    number_of_dimensions: int (Default 3)
+        Number of PCs kept, and of dimensions along which to
+        calculate the convex hull volume and area.
+
+    n_jobs: int (Default 1)
+        Number of threads used to compute the hulls.
+
+    random_state: int (Default 0)
+        Seed of the randomized PCoA, so the same distance matrix
+        always gives the same hulls.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Data frame with unique ID, convex hull volume,
+        and convex hull area, as returned by `convex_hull`.
+    """
+
+    from inspect import signature
+    from skbio import DistanceMatrix
+    from skbio.stats.ordination import pcoa
+
+    distances = DistanceMatrix(distance_matrix.data, distance_matrix.ids)
+    # convex_hull warns about more than 3 dimensions
+    n_pcs = min(number_of_dimensions, 3)
+    n_computed = min(n_pcs + DISTANCE_PCOA_OVERSAMPLING, len(distances.ids))
+    # the number of PCs is passed positionally, its keyword was renamed
+    # in scikit-bio 0.6, which also added the seed; before, fsvd drew
+    # from the global numpy random state
+    if 'seed' in signature(pcoa).parameters:
+        ordination = pcoa(distances, 'fsvd', n_computed, seed=random_state)
+    else:
+        state = np.random.get_state()
+        np.random.seed(random_state)
+        try:
+            ordination = pcoa(distances, 'fsvd', n_computed)
+        finally:
+            np.random.set_state(state)
+
+    coordinates = OrdinationCoordinates(ordination.samples.iloc[:, :n_pcs],
+                                        n_pcs)
+    return convex_hull(metadata, coordinates, individual_id_column,
+                       number_of_dimensions, n_jobs)
+
+
+def chunked_convex_hull(metadata: Metadata,
+                        pcoa: MappedOrdinationCoordinates,
+                        individual_id_column: str,
+                        number_of_dimensions: int = DEFAULT_N_DIMENSIONS,
+                        max_samples: int = CHUNKED_MAX_SAMPLES,
+                        n_jobs: int = 1) -> (HullsFormat):
+    """ Computes the convex hulls of `convex_hull` for cohorts whose
+    coordinates do not fit in memory.
+
+    The PCoA coordinates stay memory-mapped on disk. Subjects are
+    taken in sorted order in batches of at most `max_samples`
+    samples, and the coordinates of each batch are read, their hulls
+    computed and their rows written to the output before the next
+    batch is read. Peak memory is then bounded by the larger of
+    `max_samples` and the largest subject, plus the subject ID of
+    every sample.
+
+    Parameters
+    ----------
+    metadata: qiime2.Metadata table
+        Metadata table associated with PCoA results.
+
+    pcoa: MappedOrdinationCoordinates
+        PCoA result. Only the first 3 PCs are used.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata`.
+
+    number_of_dimensions: int (Default 3)
+        Number of dimensions along which to calculate the
+        convex hull volume and area.
+
+    max_samples: int (Default `CHUNKED_MAX_SAMPLES`)
+        Number of samples whose coordinates are read at once. A
+        subject with more samples is read whole.
+
+    n_jobs: int (Default 1)
+        Number of threads used to compute the hulls of a batch.
+
+    Returns
+    -------
+    HullsFormat
+        The table `convex_hull` returns, in the same order.
+    """
+
+    number_of_dimensions = _cap_dimensions(pcoa, number_of_dimensions)
+    subject_ids = validate(metadata, pcoa,
+                           individual_id_column)[individual_id_column]
+    coords = pcoa.samples.to_numpy()[:, :number_of_dimensions]
+    n_dimensions = coords.shape[1]
+
+    # the same single sort as group_subjects, on the subject IDs only
+    codes, subjects = pd.factorize(subject_ids, sort=True)
+    positions = np.flatnonzero(codes >= 0)
+    positions = positions[np.argsort(codes[positions], kind='stable')]
+    offsets = np.zeros(len(subjects) + 1, dtype=np.intp)
+    np.cumsum(np.bincount(codes[codes >= 0], minlength=len(subjects)),
+              out=offsets[1:])
+
+    skipped, failed = [], []
+    ff = HullsFormat()
+    with ff.open() as fh:
+        fh.write('\t'.join(['id', individual_id_column, 'convexhull_volume',
+                            'convexhull_area']) + '\n')
+        n_rows, start = 0, 0
+        while start < len(subjects):
+            # whole subjects up to max_samples, at least one subject
+            end = max(np.searchsorted(offsets, offsets[start] + max_samples,
+                                      side='right') - 1, start + 1)
+            batch = positions[offsets[start]:offsets[end]]
+            # reading rows in file order keeps the disk access sequential
+            order = np.argsort(batch)
+            points = np.empty((len(batch), n_dimensions))
+            points[order] = coords[batch[order]]
+
+            bounds = offsets[start:end + 1] - offsets[start]
+            sizes = np.diff(bounds)
+            keep = np.flatnonzero(sizes > number_of_dimensions)
+            people = subjects[start:end]
+            skipped.extend(people[sizes <= number_of_dimensions])
+            labels = people[keep]
+            volumes, areas = _map_chunks(
+                lambda chunk, chunk_labels: _hull_measures(
+                    chunk, n_dimensions, None, chunk_labels),
+                [points[bounds[i]:bounds[i + 1]] for i in keep],
+                labels, n_jobs, PARALLEL_MIN_CHUNK_SIZE)
+            failed.extend(labels[np.isnan(volumes)])
+
+            pd.DataFrame({individual_id_column: labels,
+                          'convexhull_volume': volumes,
+                          'convexhull_area': areas},
+                         index=range(n_rows, n_rows + len(keep))).to_csv(
+                fh, sep='\t', header=False, na_rep=np.nan)
+            n_rows += len(keep)
+            start = end
+
+    _warn_subjects('Number of timepoints less than number of dimensions. '
+                   'Skipping', skipped)
+    _warn_subjects('Qhull failed, volume and area are NaN for', failed)
+    return ff
+
+
+def update_convex_hull(metadata: Metadata,
+                       pcoa: OrdinationCoordinates,
+                       individual_id_column: str,
+                       number_of_dimensions: int = DEFAULT_N_DIMENSIONS,
+                       previous_hulls: pd.DataFrame = None,
+                       previous_hull_vertices: pd.DataFrame = None,
+                       joggle: bool = False) \
+        -> (pd.DataFrame, pd.DataFrame):
+    """ Updates the convex hulls of a previous run with new samples.
+
+    Subjects whose samples are exactly those recorded in
+    `previous_hull_vertices` keep their previous volume and area.
+    Subjects that only gained samples are updated by seeding Qhull
+    with their previous hull vertices and adding the new samples
+    incrementally; points inside the previous hull cannot change it.
+    Every other subject is computed from scratch. Samples kept from a
+    previous run must keep their PCoA coordinates, e.g. new samples
+    projected into an existing ordination.
+
+    Parameters
+    ----------
+    metadata: qiime2.Metadata table
+        Metadata table associated with PCoA results.
+
+    pcoa: OrdinationCoordinates or skbio.OrdinationResults
+        PCoA result, including the samples of the previous run.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata`.
+
+    number_of_dimensions: int (Default 3)
+        Number of dimensions along which to calculate the
+        convex hull volume and area. Must match the previous run.
+
+    previous_hulls: pandas.DataFrame, optional
+        `hulls` output of a previous run.
+
+    previous_hull_vertices: pandas.DataFrame, optional
+        `hull_vertices` output of a previous run. When neither
+        previous output is given every hull is computed.
+
+    joggle: bool (Default False)
+        Retry subjects Qhull fails on with joggled input. Subjects
+        that still fail get NaN volume and area, have no vertices
+        marked, and are recomputed by the next update.
+
+    Returns
+    -------
+    hulls: pandas.DataFrame
+        Data frame with unique ID, convex hull volume,
+        and convex hull area, as returned by `convex_hull`.
+    hull_vertices: pandas.DataFrame
+        Data frame indexed by sample ID of every sample used in a
+        hull, with its subject ID and a boolean `hull_vertex`
+        column marking the vertices of its subject's hull.
+
+    Raises
+    ------
+    ValueError
+        If only one of the previous outputs is given.
+    """
+
+    from scipy.spatial import ConvexHull, QhullError
+
+    if (previous_hulls is None) != (previous_hull_vertices is None):
+        raise ValueError('previous_hulls and previous_hull_vertices '
+                         'must be given together.')
+
+    groups, keep = _subject_groups(metadata, pcoa, individual_id_column,
+                                   number_of_dimensions)
+    n_dimensions = groups.coords.shape[1]
+    sizes = groups.sizes
+    codes = np.repeat(np.arange(len(groups)), sizes)
+
+    carried = np.zeros(len(codes), dtype=bool)
+    was_vertex = np.zeros(len(codes), dtype=bool)
+    unchanged = np.zeros(len(groups), dtype=bool)
+    extend = np.zeros(len(groups), dtype=bool)
+    volumes = np.full(len(groups), np.nan)
+    areas = np.full(len(groups), np.nan)
+
+    if previous_hulls is not None:
+        subjects = _id_text(groups.subjects)
+        previous = previous_hull_vertices.reindex(groups.sample_ids)
+        carried = (_id_text(previous[individual_id_column]) ==
+                   subjects[codes])
+        was_vertex = (previous['hull_vertex']
+                      .to_numpy(dtype=bool, na_value=False) & carried)
+        n_carried = np.bincount(codes, weights=carried,
+                                minlength=len(groups))
+        n_vertices = np.bincount(codes, weights=was_vertex,
+                                 minlength=len(groups))
+        n_previous = (pd.Series(_id_text(
+                          previous_hull_vertices[individual_id_column]))
+                      .value_counts()
+                      .reindex(subjects, fill_value=0).to_numpy())
+
+        measures = (previous_hulls
+                    .set_index(pd.Index(_id_text(
+                        previous_hulls[individual_id_column])))
+                    .reindex(subjects))
+        volumes = measures['convexhull_volume'].to_numpy(dtype=float,
+                                                         copy=True)
+        areas = measures['convexhull_area'].to_numpy(dtype=float,
+                                                     copy=True)
+
+        # subjects that lost samples since the previous run are redone
+        known = (~np.isnan(volumes) & ~np.isnan(areas) &
+                 (n_previous == n_carried))
+        unchanged = known & (n_carried == sizes)
+        extend = known & ~unchanged & (n_vertices > n_dimensions)
+
+    hull_vertex = np.zeros(len(codes), dtype=bool)
+    for i in np.flatnonzero(keep):
+        start, end = groups.offsets[i], groups.offsets[i + 1]
+        if unchanged[i]:
+            hull_vertex[start:end] = was_vertex[start:end]
+            continue
+
+        block = groups.block(i)
+        c_hull = None
+        if extend[i]:
+            seed = np.flatnonzero(was_vertex[start:end])
+            new = np.flatnonzero(~carried[start:end])
+            order = np.concatenate([seed, new])
+            try:
+                c_hull = ConvexHull(block[seed], incremental=True)
+                c_hull.add_points(block[new])
+                c_hull.close()
+            except (QhullError, ValueError):
+                c_hull = None
+        if c_hull is None:
+            order = _hull_candidates(block)
+            c_hull = _qhull(block[order], joggle)
+        if c_hull is None:
+            volumes[i] = areas[i] = np.nan
+            continue
+        volumes[i] = c_hull.volume
+        areas[i] = c_hull.area
+        hull_vertex[start + order[c_hull.vertices]] = True
+
+    _warn_failed(volumes[keep], groups.subjects[keep])
+    hulls = pd.DataFrame({individual_id_column: groups.subjects[keep],
+                          'convexhull_volume': volumes[keep],
+                          'convexhull_area': areas[keep]})
+
+    used = keep[codes]
+    hull_vertices = pd.DataFrame(
+        {individual_id_column: groups.subjects[codes[used]],
+         'hull_vertex': hull_vertex[used]},
+        index=pd.Index(groups.sample_ids[used], name='id'))
+
+    return hulls, hull_vertices
+
+
+def approximate_convex_hull(
+        metadata: Metadata,
+        pcoa: AllOrdinationCoordinates,
+        individual_id_column: str,
+        number_of_dimensions: int,
+        exact_max_dimensions: int = DEFAULT_EXACT_MAX_DIMENSIONS,
+        time_budget: float = DEFAULT_TIME_BUDGET,
+        max_directions: int = DEFAULT_MAX_DIRECTIONS,
+        confidence: float = 0.95,
+        random_state: int = 0) -> (pd.DataFrame):
+    """ Computes convex hull volumes in any number of dimensions,
+    estimating them when an exact hull would be too expensive.
+
+    Parameters
+    ----------
+    metadata: qiime2.Metadata table
+        Metadata table associated with PCoA results.
+
+    pcoa: AllOrdinationCoordinates or skbio.OrdinationResults
+        PCoA result with at least `number_of_dimensions` PCs.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata`.
+
+    number_of_dimensions: int
+        Number of dimensions along which to calculate the
+        convex hull volume.
+
+    exact_max_dimensions: int (Default `DEFAULT_EXACT_MAX_DIMENSIONS`)
+        Hulls in up to this many dimensions are computed exactly
+        with Qhull, higher dimensional volumes are estimated.
+
+    time_budget: float (Default `DEFAULT_TIME_BUDGET`)
+        Seconds spent on the estimate of each subject.
+
+    max_directions: int (Default `DEFAULT_MAX_DIRECTIONS`)
+        Maximum number of random directions per subject.
+
+    confidence: float (Default 0.95)
+        Coverage of the estimated volume's confidence interval.
+
+    random_state: int (Default 0)
+        Seed of the random directions.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Data frame with unique ID, convex hull volume, convex hull
+        area and volume confidence bounds. Columns are `column`,
+        convexhull_volume, convexhull_area, convexhull_volume_lower,
+        convexhull_volume_upper. The area is NaN for estimated hulls,
+        and both bounds equal the volume for exact hulls.
+
+    Raises
+    ------
+    ValueError
+        If the PCoA result has fewer than `number_of_dimensions` PCs.
+    """
+
+    if len(pcoa.samples.columns) < number_of_dimensions:
+        raise ValueError(f'PCoA result has fewer than '
+                         f'{number_of_dimensions} dimensions.')
+
+    groups, keep = _subject_groups(metadata, pcoa, individual_id_column,
+                                   number_of_dimensions, truncate=False)
+    blocks = groups.blocks(np.flatnonzero(keep))
+
+    if number_of_dimensions <= exact_max_dimensions:
+        volumes, areas = hull_measures(blocks, number_of_dimensions,
+                                       labels=groups.subjects[keep])
+        lower, upper = volumes, volumes
+    else:
+        rng = np.random.default_rng(random_state)
+        estimates = np.array([
+            radial_volume(block, time_budget, max_directions,
+                          confidence, rng)[:3]
+            for block in blocks]).reshape(-1, 3)
+        volumes, lower, upper = estimates.T
+        areas = np.full(len(blocks), np.nan)
+
+    hulls = pd.DataFrame({individual_id_column: groups.subjects[keep],
+                          'convexhull_volume': volumes,
+                          'convexhull_area': areas,
+                          'convexhull_volume_lower': lower,
+                          'convexhull_volume_upper': upper})
+
+    return hulls
+
+
+def bootstrap_convex_hull(metadata: Metadata,
+                          pcoa: OrdinationCoordinates,
+                          individual_id_column: str,
+                          n_timepoints: int,
+                          number_of_dimensions: int = DEFAULT_N_DIMENSIONS,
+                          n_replicates: int = DEFAULT_N_REPLICATES,
+                          confidence: float = 0.95,
+                          random_state: int = 0,
+                          n_jobs: int = 1) -> (pd.DataFrame):
+    """ Computes convex hulls of random subsamples of each subject with
+    a fixed number of timepoints, so that subjects sampled at different
+    depths can be compared.
+
+    Every replicate of every subject is drawn up front and measured in
+    chunks of `BOOTSTRAP_CHUNK_REPLICATES` with `hull_measures`, so
+    small subsamples go through the batched engine and the work is
+    spread over `n_jobs` threads. Replicates Qhull fails on, e.g. with
+    duplicate samples drawn, are left out of the means and intervals,
+    and the number left out of each subject is reported in a single
+    warning.
+
+    Parameters
+    ----------
+    metadata: qiime2.Metadata table
+        Metadata table associated with PCoA results.
+
+    pcoa: OrdinationCoordinates or skbio.OrdinationResults
+        PCoA result. Only the first 3 PCs are used.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata`.
+
+    n_timepoints: int
+        Number of timepoints drawn, without replacement, for each
+        replicate. Subjects with fewer timepoints are skipped.
+
+    number_of_dimensions: int (Default 3)
+        Number of dimensions along which to calculate the
+        convex hull volume and area.
+
+    n_replicates: int (Default `DEFAULT_N_REPLICATES`)
+        Number of subsamples of each subject.
+
+    confidence: float (Default 0.95)
+        Coverage of the percentile intervals of volume and area.
+
+    random_state: int (Default 0)
+        Seed of the subsamples.
+
+    n_jobs: int (Default 1)
+        Number of threads used to compute the hulls. The output does
+        not depend on this value.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Data frame with unique ID, mean convex hull volume and area
+        over the successful replicates, and their interval bounds,
+        NaN when every replicate failed. Columns are
+        `column`, convexhull_volume, convexhull_area,
+        convexhull_volume_lower, convexhull_volume_upper,
+        convexhull_area_lower, convexhull_area_upper.
+
+    Raises
+    ------
+    ValueError
+        If `n_timepoints` is too small for a hull in
+        `number_of_dimensions`.
+    """
+
+    if n_timepoints <= min(number_of_dimensions, 3):
+        raise ValueError(f'n_timepoints must be greater than the number '
+                         f'of dimensions, got {n_timepoints}.')
+
+    groups, keep = _subject_groups(metadata, pcoa, individual_id_column,
+                                   number_of_dimensions)
+    short = keep & (groups.sizes < n_timepoints)
+    _warn_subjects('Number of timepoints less than n_timepoints. Skipping',
+                   groups.subjects[short])
+    subjects = np.flatnonzero(keep & ~short)
+
+    rng = np.random.default_rng(random_state)
+    n_dimensions = groups.coords.shape[1]
+    volumes = np.empty((len(subjects), n_replicates))
+    areas = np.empty((len(subjects), n_replicates))
+    per_chunk = max(BOOTSTRAP_CHUNK_REPLICATES // n_replicates, 1)
+    for start in range(0, len(subjects), per_chunk):
+        chunk = subjects[start:start + per_chunk]
+        replicates = np.concatenate([
+            _subsample(groups.block(i), n_timepoints, n_replicates, rng)
+            for i in chunk])
+        # failed replicates are counted per subject below rather than
+        # named one by one
+        chunk_volumes, chunk_areas = _map_chunks(
+            lambda blocks, labels: _hull_measures(blocks, n_dimensions,
+                                                  labels=labels),
+            list(replicates),
+            np.repeat(groups.subjects[chunk], n_replicates),
+            n_jobs, PARALLEL_MIN_CHUNK_SIZE)
+        volumes[start:start + len(chunk)] = chunk_volumes.reshape(
+            len(chunk), n_replicates)
+        areas[start:start + len(chunk)] = chunk_areas.reshape(
+            len(chunk), n_replicates)
+
+    n_failed = np.isnan(volumes).sum(axis=1)
+    failed = np.flatnonzero(n_failed)
+    _warn_subjects('Qhull failed on bootstrap replicates, left out of the '
+                   'estimates, for',
+                   [f'{groups.subjects[subjects[i]]} '
+                    f'({n_failed[i]} of {n_replicates})' for i in failed])
+
+    tails = [(1 - confidence) / 2, (1 + confidence) / 2]
+    with catch_warnings():
+        # subjects whose replicates all failed are NaN
+        simplefilter('ignore', RuntimeWarning)
+        volume_lower, volume_upper = np.nanquantile(volumes, tails, axis=1)
+        area_lower, area_upper = np.nanquantile(areas, tails, axis=1)
+        volume_mean = np.nanmean(volumes, axis=1)
+        area_mean = np.nanmean(areas, axis=1)
+
+    hulls = pd.DataFrame({individual_id_column: groups.subjects[subjects],
+                          'convexhull_volume': volume_mean,
+                          'convexhull_area': area_mean,
+                          'convexhull_volume_lower': volume_lower,
+                          'convexhull_volume_upper': volume_upper,
+                          'convexhull_area_lower': area_lower,
+                          'convexhull_area_upper': area_upper})
+
+    return hulls
+
+
+def _subsample(block, n_timepoints, n_replicates, rng):
+    """ `n_replicates` random subsets of `n_timepoints` rows of
+    `block`, shape (n_replicates, n_timepoints, n_dimensions).
+    """
+    n_points = len(block)
+    if n_points == n_timepoints:
+        return np.broadcast_to(block, (n_replicates,) + block.shape)
+    # the smallest of uniform random keys pick a uniform random subset
+    keys = rng.random((n_replicates, n_points))
+    rows = np.argpartition(keys, n_timepoints - 1, axis=1)
+    return block[rows[:, :n_timepoints]]
+
+
+def hull_permutation_test(hulls: pd.DataFrame,
+                          metadata: Metadata,
+                          individual_id_column: str,
+                          grouping_column: str,
+                          measure: str = 'convexhull_volume',
+                          permutations: int = DEFAULT_PERMUTATIONS,
+                          random_state: int = 0,
+                          n_jobs: int = 1) -> (pd.DataFrame):
+    """ Tests whether a hull measure differs between groups of
+    subjects with a one-way permutation test.
+
+    Parameters
+    ----------
+    hulls: pandas.DataFrame
+        Output of one of the hull methods.
+
+    metadata: qiime2.Metadata table
+        Metadata table with the subject and group of each sample.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata` and `hulls`.
+
+    grouping_column: str
+        Column of `metadata` with the group of each subject. Every
+        sample of a subject must be in the same group.
+
+    measure: str (Default 'convexhull_volume')
+        Column of `hulls` to compare.
+
+    permutations: int (Default `DEFAULT_PERMUTATIONS`)
+        Number of permutations of the groups.
+
+    random_state: int (Default 0)
+        Seed of the permutations.
+
+    n_jobs: int (Default 1)
+        Number of threads running the permutations. The result does
+        not depend on this value.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Single row indexed by `measure` with the test statistic
+        name, sample size, number of groups, test statistic, p-value
+        and number of permutations.
+
+    Raises
+    ------
+    ValueError
+        If a column is missing, no subject of `hulls` is in
+        `metadata`, a subject is in more than one group, or there are
+        too few groups or subjects to compare.
+    """
+
+    if measure not in hulls.columns:
+        raise ValueError(f'Measure {measure} not found in hulls columns.')
+    for column in (individual_id_column, grouping_column):
+        if column not in metadata.columns:
+            raise ValueError(f'Column {column} not found in metadata '
+                             f'columns.')
+
+    # hull tables and metadata may each read the subject IDs as text
+    # or as numbers
+    samples = pd.DataFrame({
+        'subject': metadata.get_column(individual_id_column).to_series(),
+        'group': metadata.get_column(grouping_column).to_series(),
+    }).dropna()
+    samples['subject'] = _id_text(samples['subject'])
+    n_groups = samples.groupby('subject')['group'].nunique()
+    mixed = n_groups.index[n_groups > 1]
+    if len(mixed) > 0:
+        raise ValueError(f'Subjects in more than one group: '
+                         f'{", ".join(mixed)}')
+    groups = samples.drop_duplicates('subject').set_index('subject')['group']
+
+    subjects = _id_text(hulls[individual_id_column])
+    labels = groups.reindex(subjects).to_numpy()
+    if pd.isna(labels).all():
+        raise ValueError(f'None of the subjects in hulls were found in '
+                         f'the {individual_id_column} column of '
+                         f'metadata.')
+    values = hulls[measure].to_numpy(dtype=float)
+    used = ~pd.isna(labels) & ~np.isnan(values)
+    codes, categories = pd.factorize(labels[used], sort=True)
+    if len(categories) < 2 or used.sum() <= len(categories):
+        raise ValueError('At least two groups and more subjects than '
+                         'groups are needed.')
+
+    statistic, p_value = permutation_f_test(values[used], codes,
+                                            permutations, random_state,
+                                            n_jobs)
+
+    return pd.DataFrame({'test statistic name': ['pseudo-F'],
+                         'sample size': [int(used.sum())],
+                         'number of groups': [len(categories)],
+                         'test statistic': [statistic],
+                         'p-value': [p_value],
+                         'number of permutations': [permutations]},
+                        index=pd.Index([measure], name='id'))
+
+
+def sliding_window_convex_hull(metadata: Metadata,
+                               pcoa: OrdinationCoordinates,
+                               individual_id_column: str,
+                               time_column: str,
+                               window_size: float,
+                               step: float = None,
+                               number_of_dimensions: int =
+                               DEFAULT_N_DIMENSIONS,
+                               n_jobs: int = 1) -> (pd.DataFrame):
+    """ Computes convex hulls of each subject over sliding windows of
+    time.
+
+    Windows of `window_size` start every `step` from the earliest
+    time of any sample, so windows line up between subjects. A window
+    is half open, [start, start + window_size). Overlapping windows
+    share work: the time axis of a subject is cut wherever a window
+    starts or ends, and every piece shared by several windows is
+    reduced once to its hull vertices. The hull of a window is the
+    hull of the vertices of its pieces.
+
+    Parameters
+    ----------
+    metadata: qiime2.Metadata table
+        Metadata table associated with PCoA results.
+
+    pcoa: OrdinationCoordinates or skbio.OrdinationResults
+        PCoA result. Only the first 3 PCs are used.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata`.
+
+    time_column: str
+        Numeric column of `metadata` with the time of each sample.
+        Samples without a time are left out.
+
+    window_size: float
+        Length of each window, in the units of `time_column`.
+
+    step: float (Default `window_size`)
+        Time between the starts of consecutive windows.
+
+    number_of_dimensions: int (Default 3)
+        Number of dimensions along which to calculate the
+        convex hull volume and area.
+
+    n_jobs: int (Default 1)
+        Number of threads used to compute the hulls.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Long format data frame with a row for every subject and window
+        holding more timepoints than dimensions. Columns are
+        `column`, window_start, window_end, convexhull_volume,
+        convexhull_area.
+
+    Raises
+    ------
+    ValueError
+        If `time_column` is missing or not numeric.
+    """
+
+    if step is None:
+        step = window_size
+    if time_column not in metadata.columns:
+        raise ValueError(f'Time column {time_column} not found in '
+                         f'metadata columns.')
+    times = metadata.get_column(time_column).to_series()
+    if not pd.api.types.is_numeric_dtype(times):
+        raise ValueError(f'Time column {time_column} should be numeric.')
+
+    groups, keep = _subject_groups(metadata, pcoa, individual_id_column,
+                                   number_of_dimensions)
+    n_dimensions = groups.coords.shape[1]
+    times = times.reindex(groups.sample_ids).to_numpy(dtype=float)
+    origin = np.nanmin(times) if len(times) else 0.0
+
+    subjects, starts, blocks = [], [], []
+    for i in np.flatnonzero(keep):
+        block_times = times[groups.offsets[i]:groups.offsets[i + 1]]
+        window_starts, window_blocks = _window_blocks(
+            groups.block(i), block_times, origin, window_size, step,
+            n_dimensions)
+        subjects.extend([groups.subjects[i]] * len(window_starts))
+        starts.extend(window_starts)
+        blocks.extend(window_blocks)
+
+    volumes, areas = hull_measures(blocks, n_dimensions, n_jobs,
+                                   labels=subjects)
+    starts = np.array(starts, dtype=float)
+
+    hulls = pd.DataFrame({individual_id_column: subjects,
+                          'window_start': starts,
+                          'window_end': starts + window_size,
+                          'convexhull_volume': volumes,
+                          'convexhull_area': areas})
+
+    return hulls
+
+
+def _window_blocks(points, times, origin, window_size, step,
+                   n_dimensions):
+    """ Points of one subject in every window with more timepoints
+    than dimensions, reduced to the hull vertices of the pieces they
+    share with other windows.
+
+    Returns
+    -------
+    starts: numpy.ndarray
+        Start of each window.
+    blocks: list of numpy.ndarray
+        Points whose hull is the hull of each window.
+    """
+
+    from scipy.spatial import ConvexHull, QhullError
+
+    timed = ~np.isnan(times)
+    order = np.argsort(times[timed], kind='stable')
+    points, times = points[timed][order], times[timed][order]
+    if len(times) <= n_dimensions:
+        return np.empty(0), []
+
+    # windows are contiguous runs of the time sorted points
+    first = max(int(np.floor((times[0] - window_size - origin) / step)), -1)
+    last = int(np.floor((times[-1] - origin) / step))
+    starts = origin + step * np.arange(first + 1, last + 1)
+    lo = np.searchsorted(times, starts, side='left')
+    hi = np.searchsorted(times, starts + window_size, side='left')
+    use = hi - lo > n_dimensions
+    starts, lo, hi = starts[use], lo[use], hi[use]
+
+    cuts = np.unique(np.concatenate([lo, hi]))
+    first_piece = np.searchsorted(cuts, lo)
+    last_piece = np.searchsorted(cuts, hi)
+    shared = np.zeros(len(cuts), dtype=int)
+    np.add.at(shared, first_piece, 1)
+    np.add.at(shared, last_piece, -1)
+    shared = np.cumsum(shared)
+
+    pieces = []
+    for start, end, n_windows in zip(cuts, cuts[1:], shared):
+        piece = points[start:end]
+        if n_windows > 1 and len(piece) > n_dimensions + 1:
+            try:
+                piece = piece[ConvexHull(piece).vertices]
+            except QhullError:
+                # flat pieces are kept whole, the window may not be
+                pass
+        pieces.append(piece)
+
+    blocks = [np.concatenate(pieces[begin:end])
+              for begin, end in zip(first_piece, last_piece)]
+    return starts, blocks
+
+
+def multi_convex_hull(metadata: Metadata,
+                      pcoas: OrdinationCoordinates,
+                      individual_id_column: str,
+                      dimensions: list = None,
+                      n_jobs: int = 1) -> (pd.DataFrame):
+    """ Computes convex hulls of every subject in several ordinations
+    of the same samples, each in several numbers of dimensions.
+
+    The metadata is aligned and the samples grouped by subject once,
+    for all ordinations together, and the hulls of every ordination
+    with the same number of dimensions are computed in one call of
+    `hull_measures`.
+
+    Parameters
+    ----------
+    metadata: qiime2.Metadata table
+        Metadata table associated with PCoA results.
+
+    pcoas: dict of OrdinationCoordinates or skbio.OrdinationResults
+        PCoA results of the same samples, by name. A list is named
+        by position.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata`.
+
+    dimensions: list of int (Default [2, 3])
+        Numbers of dimensions along which to calculate the convex
+        hull volume and area, each 2 or 3.
+
+    n_jobs: int (Default 1)
+        Number of threads used to compute the hulls.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Wide data frame with one row per subject. Columns are
+        `column`, then convexhull_volume_<name>_<d>d and
+        convexhull_area_<name>_<d>d for every ordination and number of
+        dimensions. Measures of subjects with too few timepoints for
+        a number of dimensions are NaN.
+
+    Raises
+    ------
+    ValueError
+        If a number of dimensions is not 2 or 3, or the ordinations
+        do not have the same samples.
+    """
+
+    dimensions = sorted(set(dimensions or [2, 3]))
+    if not set(dimensions) <= {2, 3}:
+        raise ValueError('Dimensions should be 2 or 3.')
+    if not isinstance(pcoas, dict):
+        pcoas = {str(i): pcoa for i, pcoa in enumerate(pcoas)}
+    names = list(pcoas)
+    n_columns = dimensions[-1]
+
+    # the first ordination fixes the sample order, the others are
+    # aligned to it and stacked side by side
+    samples = pcoas[names[0]].samples.index
+    meta = validate(metadata, pcoas[names[0]], individual_id_column)
+    coords = []
+    for name in names:
+        pcoa = pcoas[name]
+        if n_components(pcoa) < n_columns:
+            raise ValueError(f'PCoA result {name} has fewer than '
+                             f'{n_columns} dimensions.')
+        index = pcoa.samples.index
+        if len(index) != len(samples) or not index.isin(samples).all():
+            raise ValueError(f'PCoA result {name} does not have the same '
+                             f'samples as PCoA result {names[0]}.')
+        coords.append(pcoa.samples.iloc[:, :n_columns]
+                      .reindex(samples).to_numpy())
+    groups = group_subjects(meta[individual_id_column], np.hstack(coords))
+
+    keep = groups.sizes > dimensions[0]
+    _warn_subjects('Number of timepoints less than number of dimensions. '
+                   'Skipping', groups.subjects[~keep])
+
+    hulls = {individual_id_column: groups.subjects[keep]}
+    for d in dimensions:
+        which = np.flatnonzero(groups.sizes > d)
+        blocks = [groups.block(i)[:, k * n_columns:k * n_columns + d]
+                  for k in range(len(names)) for i in which]
+        volumes, areas = hull_measures(
+            blocks, d, n_jobs,
+            labels=np.tile(groups.subjects[which], len(names)))
+        for k, name in enumerate(names):
+            part = slice(k * len(which), (k + 1) * len(which))
+            for measure, values in (('volume', volumes), ('area', areas)):
+                column = np.full(len(groups), np.nan)
+                column[which] = values[part]
+                hulls[f'convexhull_{measure}_{name}_{d}d'] = column[keep]
+
+    columns = [individual_id_column] + [
+        f'convexhull_{measure}_{name}_{d}d'
+        for name in names for d in dimensions
+        for measure in ('volume', 'area')]
+    return pd.DataFrame(hulls, columns=columns)
+
+
+def hull_overlap(metadata: Metadata,
+                 pcoa: OrdinationCoordinates,
+                 individual_id_column: str,
+                 number_of_dimensions: int = DEFAULT_N_DIMENSIONS,
+                 strata_columns: list = None,
+                 within_subject: bool = False,
+                 n_jobs: int = 1) -> (pd.DataFrame):
+    """ Computes the intersection volume of the convex hulls of every
+    pair of overlapping subjects.
+
+    Pairs whose bounding boxes do not intersect can not overlap and
+    are pruned with a sweep over the boxes. The hulls of the remaining
+    candidate pairs are intersected as half-spaces, on `n_jobs`
+    threads, after a cheaper check for a facet separating them.
+
+    Parameters
+    ----------
+    metadata: qiime2.Metadata table
+        Metadata table associated with PCoA results.
+
+    pcoa: OrdinationCoordinates or skbio.OrdinationResults
+        PCoA result. Only the first 3 PCs are used.
+
+    individual_id_column: str
+        Unique subject identifier column in `metadata`.
+
+    number_of_dimensions: int (Default 3)
+        Number of dimensions of the hulls.
+
+    strata_columns: list of str (Default None)
+        Further columns of `metadata`, such as an early or late
+        period, splitting each subject's samples into strata with a
+        hull each, as in `convex_hull`.
+
+    within_subject: bool (Default False)
+        Only pair the strata of the same subject.
+
+    n_jobs: int (Default 1)
+        Number of threads used to compute the hulls and their
+        intersections.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Sparse long format data frame with a row for every pair of
+        hulls with a positive intersection volume. Columns are
+        `column`_1, then any `strata_columns`_1, the same for the
+        second hull with the suffix _2, overlap_volume, and
+        overlap_jaccard, the intersection volume over the union
+        volume.
+
+    Raises
+    ------
+    ValueError
+        If `within_subject` is set without `strata_columns`.
+    """
+
+    if within_subject and not strata_columns:
+        raise ValueError('within_subject needs strata_columns splitting '
+                         'the samples of each subject.')
+
+    groups, keep = _subject_groups(metadata, pcoa, individual_id_column,
+                                   number_of_dimensions,
+                                   strata_columns=strata_columns)
+    people = groups.subjects[keep]
+    blocks = groups.blocks(np.flatnonzero(keep))
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        hulls = list(executor.map(
+            lambda block: _qhull(block[_hull_candidates(block)], False),
+            blocks))
+    failed = np.array([c_hull is None for c_hull in hulls], dtype=bool)
+    _warn_subjects('Qhull failed, no overlap computed for',
+                   people[failed])
+    which = np.flatnonzero(~failed)
+    people = people[which]
+    hulls = [hulls[i] for i in which]
+    volumes = np.array([c_hull.volume for c_hull in hulls])
+
+    shape = (len(hulls), groups.coords.shape[1])
+    lower = np.array([c_hull.min_bound for c_hull in hulls]).reshape(shape)
+    upper = np.array([c_hull.max_bound for c_hull in hulls]).reshape(shape)
+    partitions = None
+    if within_subject:
+        partitions, _ = pd.factorize(people.get_level_values(0))
+    first, second = candidate_pairs(lower, upper, partitions)
+
+    pairs = np.column_stack([first, second])
+    overlaps, = _map_chunks(
+        lambda chunk, _: (np.array(
+            [intersection_volume(hulls[i], hulls[j]) for i, j in chunk],
+            dtype=np.float64),),
+        pairs, pairs, n_jobs, PARALLEL_MIN_CHUNK_SIZE)
+    failed = np.flatnonzero(np.isnan(overlaps))
+    _warn_subjects('Qhull failed, no overlap computed for',
+                   [f'{people[first[k]]} and {people[second[k]]}'
+                    for k in failed], 'pair(s)')
+    positive = np.flatnonzero(overlaps > 0)
+    first, second = first[positive], second[positive]
+    overlaps = overlaps[positive]
+
+    keys = [individual_id_column] + list(strata_columns or [])
+    overlap = {}
+    for suffix, side in (('_1', first), ('_2', second)):
+        for i, key in enumerate(keys):
+            overlap[key + suffix] = people.get_level_values(i)[side]
+    overlap['overlap_volume'] = overlaps
+    overlap['overlap_jaccard'] = overlaps / (volumes[first] +
+                                             volumes[second] - overlaps)
+    return pd.DataFrame(overlap, index=range(len(overlaps)))
+
+
+def _subject_groups(metadata, pcoa, individual_id_column,
+                    number_of_dimensions, truncate=True, profile=None,
+                    strata_columns=None):
+    """ Validates the inputs and groups the PCoA coordinates by
+    subject, warning about subjects with too few timepoints.
+
+    Exact hulls are limited to 3 dimensions, so unless `truncate` is
+    False, `number_of_dimensions` and the PCs used are capped at 3.
+
+    Returns
+    -------
+    groups: SubjectGroups
+        Coordinates of every subject.
+    keep: numpy.ndarray
+        Boolean mask of the subjects with enough timepoints for a
+        hull in `number_of_dimensions`.
+    """
+
+    if truncate:
+        number_of_dimensions = _cap_dimensions(pcoa, number_of_dimensions)
+
+    with _stage(profile, 'validate'):
+        meta = validate(metadata, pcoa, individual_id_column,
+                        strata_columns)
+    with _stage(profile, 'group'):
+        # a single column keeps plain subject IDs, several group by
+        # their combination
+        groups = group_subjects(
+            meta if strata_columns else meta[individual_id_column],
+            pcoa.samples.iloc[:, :number_of_dimensions].to_numpy())
+
+    keep = groups.sizes > number_of_dimensions
+    _warn_subjects('Number of timepoints less than number of dimensions. '
+                   'Skipping', groups.subjects[~keep], profile=profile)
+
+    return groups, keep
+
+
+def _cap_dimensions(pcoa, number_of_dimensions):
+    """ Caps `number_of_dimensions` at the 3 dimensions of exact hulls,
+    warning when it or the PCoA has more.
     """
 
     if number_of_dimensions > 3:
@@ -79,35 +1371,287 @@ def convex_hull(metadata: Metadata,
             Warning)
         number_of_dimensions = 3
 
-    if len(pcoa.samples.columns) > 3:
+    if n_components(pcoa) > 3:
 
         warn(
-            (f'PCoA result has {len(pcoa.samples.columns)} '
+            (f'PCoA result has {n_components(pcoa)} '
              f"dimensions. Truncating to 3 PC's"),
             Warning)
-        pcoa = OrdinationResults(pcoa.short_method_name,
-                                 pcoa.long_method_name,
-                                 pcoa.eigvals[:3],
-                                 pcoa.samples[pcoa.samples.columns[:3]])
-
-    meta = validate(metadata, pcoa, individual_id_column)
-    hulls = []
-    for person, group in meta.groupby(individual_id_column):
-        n_timepts = len(group)
-        if n_timepts <= number_of_dimensions:
-            warn((f'Number of timepoints less than '
-                  f'number of dimensions.'
-                  f'Skipping individual {person}'),
-                  Warning)
+
+    return number_of_dimensions
+
+
+def hull_measures(blocks, number_of_dimensions, n_jobs=1,
+                  chunk_size=PARALLEL_MIN_CHUNK_SIZE, profile=None,
+                  labels=None, joggle=False):
+    """ Computes convex hull volume and area of each block of
+    coordinates.
+
+    Blocks small enough for `BATCH_MAX_POINTS` are grouped by size
+    and computed together with batched array math, everything else
+    (including degenerate blocks the batched engine declines) is
+    passed to Qhull one block at a time. A block Qhull fails on does
+    not stop the others: it gets NaN volume and area, and all failed
+    blocks are reported in a single warning.
+
+    Parameters
+    ----------
+    blocks: list of numpy.ndarray
+        Coordinates of each subject, shape (n_timepoints,
+        number_of_dimensions).
+
+    number_of_dimensions: int
+        Number of dimensions of the coordinates.
+
+    n_jobs: int (Default 1)
+        Number of worker threads. Qhull and the batched array math
+        release the GIL, so threads avoid pickling the coordinates
+        to worker processes.
+
+    chunk_size: int (Default `PARALLEL_MIN_CHUNK_SIZE`)
+        Smallest number of blocks handed to a worker at once.
+
+    profile: Profile, optional
+        Records the time of each batch and Qhull call.
+
+    labels: sequence, optional
+        Subject ID of each block, as recorded in `profile` and named
+        in warnings. Defaults to the block positions.
+
+    joggle: bool (Default False)
+        Retry blocks Qhull fails on with joggled input.
+
+    Returns
+    -------
+    volumes, areas: numpy.ndarray
+        Convex hull volume and area of each block, in input order.
+    """
+
+    if labels is None:
+        labels = range(len(blocks))
+    volumes, areas = _map_chunks(
+        lambda chunk, chunk_labels: _hull_measures(
+            chunk, number_of_dimensions, profile, chunk_labels, joggle),
+        blocks, labels, n_jobs, chunk_size)
+    _warn_failed(volumes, labels, profile)
+    return volumes, areas
+
+
+def hull_metrics(blocks, number_of_dimensions, n_jobs=1,
+                 chunk_size=PARALLEL_MIN_CHUNK_SIZE, profile=None,
+                 labels=None, joggle=False):
+    """ Computes volume, area and further measures of the convex hull
+    of each block of coordinates, all from one Qhull call per block.
+
+    Parameters are those of `hull_measures`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (n_blocks, number_of_dimensions + 5) holding
+        the volume, area, number of vertices, centroid coordinates,
+        diameter (largest distance between two hull vertices) and
+        point density (points per unit volume) of each block, in
+        input order. All NaN for blocks Qhull fails on.
+    """
+
+    if labels is None:
+        labels = range(len(blocks))
+    metrics, = _map_chunks(
+        lambda chunk, chunk_labels: _hull_metrics(
+            chunk, number_of_dimensions, profile, chunk_labels, joggle),
+        blocks, labels, n_jobs, chunk_size)
+    _warn_failed(metrics[:, 0], labels, profile)
+    return metrics
+
+
+def _map_chunks(function, blocks, labels, n_jobs, chunk_size):
+    """ Applies `function(blocks, labels)` to contiguous chunks of the
+    blocks on `n_jobs` threads, concatenating the arrays it returns.
+    """
+
+    n_chunks = min(4 * n_jobs, len(blocks) // max(chunk_size, 1))
+    if n_jobs <= 1 or n_chunks <= 1:
+        return function(blocks, labels)
+
+    bounds = np.linspace(0, len(blocks), n_chunks + 1).astype(int)
+    chunks = [blocks[start:end] for start, end in zip(bounds, bounds[1:])]
+    chunk_labels = [labels[start:end]
+                    for start, end in zip(bounds, bounds[1:])]
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        # map yields in submission order, keeping the output deterministic
+        results = list(executor.map(function, chunks, chunk_labels))
+    return tuple(np.concatenate(arrays) for arrays in zip(*results))
+
+
+def _hull_measures(blocks, number_of_dimensions, profile=None, labels=None,
+                   joggle=False):
+    volumes = np.empty(len(blocks))
+    areas = np.empty(len(blocks))
+    sizes = np.array([len(block) for block in blocks], dtype=int)
+    qhull = np.ones(len(blocks), dtype=bool)
+
+    batch_max_points = BATCH_MAX_POINTS.get(number_of_dimensions, 0)
+    for size in np.unique(sizes[sizes <= batch_max_points]):
+        start = time.perf_counter()
+        which = np.flatnonzero(sizes == size)
+        points = np.stack([blocks[i] for i in which])
+        batch_volumes, batch_areas, ok = batch_hull_measures(points)
+        which = which[ok]
+        volumes[which] = batch_volumes[ok]
+        areas[which] = batch_areas[ok]
+        qhull[which] = False
+        if profile is not None:
+            profile.batch(len(which), int(size),
+                          time.perf_counter() - start)
+
+    for i in np.flatnonzero(qhull):
+        start = time.perf_counter()
+        block = blocks[i]
+        c_hull = _qhull(block[_hull_candidates(block)], joggle)
+        if c_hull is None:
+            volumes[i] = areas[i] = np.nan
             continue
-        coords = pcoa.samples.loc[group.index].values[:, :number_of_dimensions]
-        c_hull = ConvexHull(coords)
-        hulls.append([person, c_hull.volume, c_hull.area])
-    index = [i for i in range(len(hulls))]
-    hulls = pd.DataFrame(hulls,
-                         columns=[individual_id_column,
-                         'convexhull_volume',
-                         'convexhull_area'],
-                        index=index)
+        volumes[i] = c_hull.volume
+        areas[i] = c_hull.area
+        if profile is not None:
+            profile.subject(labels[i], time.perf_counter() - start,
+                            len(block), c_hull)
 
-    return hulls
+    return volumes, areas
+
+
+def _hull_metrics(blocks, number_of_dimensions, profile=None, labels=None,
+                  joggle=False):
+    from scipy.spatial.distance import pdist
+
+    d = number_of_dimensions
+    metrics = np.full((len(blocks), d + 5), np.nan)
+    for i, block in enumerate(blocks):
+        start = time.perf_counter()
+        c_hull = _qhull(block[_hull_candidates(block)], joggle)
+        if c_hull is None:
+            continue
+        vertices = c_hull.points[c_hull.vertices]
+        metrics[i, 0] = c_hull.volume
+        metrics[i, 1] = c_hull.area
+        metrics[i, 2] = len(vertices)
+        metrics[i, 3:d + 3] = _centroid(c_hull, vertices)
+        # the farthest pair of points are both hull vertices
+        metrics[i, d + 3] = pdist(vertices).max()
+        if profile is not None:
+            profile.subject(labels[i], time.perf_counter() - start,
+                            len(block), c_hull)
+
+    sizes = np.array([len(block) for block in blocks])
+    with np.errstate(divide='ignore'):
+        metrics[:, d + 4] = sizes / metrics[:, 0]
+    return metrics,
+
+
+def _hull_surfaces(blocks, number_of_dimensions, joggle=False):
+    """ Volume, area, vertices and simplices of the hull of each
+    block, vertices as block rows and simplices as positions among
+    the vertices of their hull, concatenated over the blocks.
+    """
+
+    volumes = np.full(len(blocks), np.nan)
+    areas = np.full(len(blocks), np.nan)
+    n_vertices = np.zeros(len(blocks), dtype=np.int64)
+    n_simplices = np.zeros(len(blocks), dtype=np.int64)
+    vertices = [np.empty(0, dtype=np.int64)]
+    simplices = [np.empty((0, number_of_dimensions), dtype=np.int64)]
+    for i, block in enumerate(blocks):
+        candidates = _hull_candidates(block)
+        c_hull = _qhull(block[candidates], joggle)
+        if c_hull is None:
+            continue
+        volumes[i], areas[i] = c_hull.volume, c_hull.area
+        position = np.empty(len(candidates), dtype=np.int64)
+        position[c_hull.vertices] = np.arange(len(c_hull.vertices))
+        vertices.append(candidates[c_hull.vertices])
+        simplices.append(position[c_hull.simplices])
+        n_vertices[i] = len(c_hull.vertices)
+        n_simplices[i] = len(c_hull.simplices)
+
+    return (volumes, areas, n_vertices, np.concatenate(vertices),
+            n_simplices, np.concatenate(simplices))
+
+
+def _centroid(c_hull, vertices):
+    """ Centroid of the solid hull, from the simplices joining each
+    facet to the mean of the vertices.
+    """
+    inner = vertices.mean(axis=0)
+    facets = c_hull.points[c_hull.simplices] - inner
+    weights = np.abs(np.linalg.det(facets))
+    if weights.sum() == 0:
+        return inner
+    # the inner point is the origin of each simplex, so its centroid
+    # is the sum of the facet points over d + 1
+    centroids = facets.sum(axis=1) / (facets.shape[1] + 1)
+    return inner + weights @ centroids / weights.sum()
+
+
+def _qhull(points, joggle):
+    """ Qhull hull of `points`, retried with joggled input when
+    `joggle` is set. None if Qhull fails.
+    """
+    from scipy.spatial import ConvexHull, QhullError
+
+    try:
+        return ConvexHull(points)
+    except (QhullError, ValueError):
+        if not joggle:
+            return None
+    try:
+        return ConvexHull(points, qhull_options='QJ')
+    except (QhullError, ValueError):
+        return None
+
+
+def _warn_failed(volumes, labels, profile=None):
+    failed = np.flatnonzero(np.isnan(volumes))
+    _warn_subjects('Qhull failed, volume and area are NaN for',
+                   [labels[i] for i in failed], profile=profile)
+
+
+def _warn_subjects(message, subjects, noun='individual(s)', profile=None):
+    """ Warns once about every subject skipped or failed for the same
+    reason, naming at most `WARN_MAX_SUBJECTS` of them. All of them
+    are listed in `profile`, when given.
+    """
+    if len(subjects) == 0:
+        return
+    if profile is not None:
+        profile.exclude(message, subjects)
+    names = ', '.join(str(subject)
+                      for subject in subjects[:WARN_MAX_SUBJECTS])
+    if len(subjects) > WARN_MAX_SUBJECTS:
+        names += f' and {len(subjects) - WARN_MAX_SUBJECTS} more'
+    warn(f'{message} {len(subjects)} {noun}: {names}', Warning)
+
+
+def _id_text(ids):
+    """ Subject IDs as text, numbers written one way so that IDs
+    match across tables whether read as text ('001') or, as Metadata
+    reads numeric looking columns, as numbers (1.0).
+    """
+    text = pd.Series(np.asarray(ids, dtype=object)).astype(str)
+    numbers = pd.to_numeric(text, errors='coerce').astype(float)
+    return text.where(numbers.isna(), numbers.astype(str)).to_numpy(
+        dtype=object)
+
+
+def _hull_candidates(block):
+    """ Indices of the points of `block` passed to Qhull, dropping
+    points of dense subjects that can not be hull vertices.
+    """
+    # the prefilter's direction count grows as 3 ** n_dimensions
+    if len(block) < PREFILTER_MIN_POINTS or block.shape[1] > 3:
+        return np.arange(len(block))
+    return hull_candidates(block)
+
+
+def _stage(profile, name):
+    return nullcontext() if profile is None else profile.stage(name)
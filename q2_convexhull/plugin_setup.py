@@ -1,11 +1,26 @@
 import importlib
-from qiime2.plugin import (Plugin, Int, Citations,
-                           Str, Range, Metadata)
-from ._type import Hulls
-from ._format import HullsDirectoryFormat
+from qiime2.plugin import (Plugin, Int, Float, Citations,
+                           Str, Range, Metadata, List, Collection, Bool)
+from ._type import (Hulls, HullVertices, HullSignificance, HullOverlap,
+                    HullGeometry)
+from ._format import (HullsDirectoryFormat, HullVerticesDirectoryFormat,
+                      HullsNPZDirectoryFormat,
+                      HullSignificanceDirectoryFormat,
+                      HullOverlapDirectoryFormat,
+                      HullGeometryDirectoryFormat)
 from q2_types.sample_data import SampleData
 from q2_types.ordination import PCoAResults
-from q2_convexhull.convexhull import convex_hull
+from q2_types.distance_matrix import DistanceMatrix
+from q2_convexhull.convexhull import (convex_hull, update_convex_hull,
+                                      approximate_convex_hull,
+                                      bootstrap_convex_hull,
+                                      hull_permutation_test,
+                                      sliding_window_convex_hull,
+                                      multi_convex_hull,
+                                      chunked_convex_hull,
+                                      distance_convex_hull,
+                                      hull_overlap,
+                                      convex_hull_geometry)
 
 citations = Citations.load('citations.bib', package='q2_convexhull')
 
@@ -28,6 +43,12 @@ plugin.methods.register_function(
         'individual_id_column': Str,
         'metadata': Metadata,
         'number_of_dimensions': Int % Range(2, 3, inclusive_end=True),
+        'n_jobs': Int % Range(1, None),
+        'cache_dir': Str,
+        'cache_size': Int % Range(1, None),
+        'strata_columns': List[Str],
+        'joggle': Bool,
+        'extended_metrics': Bool,
     },
     outputs=[
         ('hulls', SampleData[Hulls]),
@@ -47,6 +68,34 @@ plugin.methods.register_function(
         'number_of_dimensions': (
             'The number of components to use for convex hull calculations.'
         ),
+        'n_jobs': (
+            'The number of threads to use for convex hull calculations.'
+        ),
+        'cache_dir': (
+            'Directory of an on-disk cache of per-subject hull results, '
+            'shared between runs. Subjects with the same coordinates '
+            'and number of dimensions are not recomputed. No cache is '
+            'used if not given.'
+        ),
+        'cache_size': (
+            'Maximum number of subjects kept in the cache. The least '
+            'recently used subjects are evicted first.'
+        ),
+        'strata_columns': (
+            'Further metadata columns, such as body site or treatment '
+            'phase, splitting the samples of each subject into strata. '
+            'One hull is computed per combination, all in one pass.'
+        ),
+        'joggle': (
+            'Retry subjects whose points are degenerate, e.g. coplanar '
+            'or duplicated, with joggled input. Subjects that still '
+            'fail get NaN volume and area.'
+        ),
+        'extended_metrics': (
+            'Also report the number of hull vertices, the hull centroid, '
+            'the hull diameter and the number of timepoints per unit '
+            'volume. The cache is not used.'
+        ),
     },
     output_descriptions={
         'hulls':
@@ -59,9 +108,609 @@ plugin.methods.register_function(
     ]
 )
 
-plugin.register_semantic_types(Hulls)
+plugin.methods.register_function(
+    function=convex_hull_geometry,
+    inputs={
+        'pcoa': PCoAResults,
+    },
+    parameters={
+        'individual_id_column': Str,
+        'metadata': Metadata,
+        'number_of_dimensions': Int % Range(2, 3, inclusive_end=True),
+        'n_jobs': Int % Range(1, None),
+        'strata_columns': List[Str],
+        'joggle': Bool,
+    },
+    outputs=[
+        ('hulls', SampleData[Hulls]),
+        ('hull_geometry', HullGeometry),
+    ],
+    input_descriptions={
+        'pcoa': (
+            'Resulting dimensionality reduction for convex hull.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the PCoA results.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'number_of_dimensions': (
+            'The number of components to use for convex hull calculations.'
+        ),
+        'n_jobs': (
+            'The number of threads to use for convex hull calculations.'
+        ),
+        'strata_columns': (
+            'Further metadata columns, such as body site or treatment '
+            'phase, splitting the samples of each subject into strata. '
+            'One hull is computed per combination, all in one pass.'
+        ),
+        'joggle': (
+            'Retry subjects whose points are degenerate, e.g. coplanar '
+            'or duplicated, with joggled input. Subjects that still '
+            'fail get NaN volume and area and no vertices.'
+        ),
+    },
+    output_descriptions={
+        'hulls':
+            'Metadata containing the convex hulls.',
+        'hull_geometry':
+            'Vertex sample IDs, vertex coordinates and boundary '
+            'simplices of each hull.'
+    },
+    name='convex-hull-geometry',
+    description=('Applies convex hulls to dimensionality reduction, also '
+                 'keeping the vertices and simplices of every hull so '
+                 'they can be drawn without recomputing them.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=distance_convex_hull,
+    inputs={
+        'distance_matrix': DistanceMatrix,
+    },
+    parameters={
+        'individual_id_column': Str,
+        'metadata': Metadata,
+        'number_of_dimensions': Int % Range(2, 3, inclusive_end=True),
+        'n_jobs': Int % Range(1, None),
+        'random_state': Int,
+    },
+    outputs=[
+        ('hulls', SampleData[Hulls]),
+    ],
+    input_descriptions={
+        'distance_matrix': (
+            'Distances between the samples, ordinated with a randomized '
+            'PCoA of the leading components only.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the distance matrix.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'number_of_dimensions': (
+            'The number of components computed and used for convex hull '
+            'calculations.'
+        ),
+        'n_jobs': (
+            'The number of threads to use for convex hull calculations.'
+        ),
+        'random_state': (
+            'Seed of the randomized PCoA.'
+        ),
+    },
+    output_descriptions={
+        'hulls':
+            'Metadata containing the convex hulls.'
+    },
+    name='distance-convex-hull',
+    description=('Applies convex hulls to the leading components of a '
+                 'PCoA computed directly from a distance matrix, '
+                 'without a full eigendecomposition.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=chunked_convex_hull,
+    inputs={
+        'pcoa': PCoAResults,
+    },
+    parameters={
+        'individual_id_column': Str,
+        'metadata': Metadata,
+        'number_of_dimensions': Int % Range(2, 3, inclusive_end=True),
+        'max_samples': Int % Range(1, None),
+        'n_jobs': Int % Range(1, None),
+    },
+    outputs=[
+        ('hulls', SampleData[Hulls]),
+    ],
+    input_descriptions={
+        'pcoa': (
+            'Resulting dimensionality reduction for convex hull. Its '
+            'coordinates are memory-mapped from disk.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the PCoA results.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'number_of_dimensions': (
+            'The number of components to use for convex hull calculations.'
+        ),
+        'max_samples': (
+            'The number of samples whose coordinates are read at once. '
+            'Subjects with more samples are read whole.'
+        ),
+        'n_jobs': (
+            'The number of threads to use for convex hull calculations.'
+        ),
+    },
+    output_descriptions={
+        'hulls':
+            'Metadata containing the convex hulls.'
+    },
+    name='chunked-convex-hull',
+    description=('Applies convex hulls to dimensionality reduction in '
+                 'batches of subjects, streaming the hulls to the output '
+                 'so that memory is bounded by the largest batch rather '
+                 'than the whole cohort.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=update_convex_hull,
+    inputs={
+        'pcoa': PCoAResults,
+        'previous_hulls': SampleData[Hulls],
+        'previous_hull_vertices': SampleData[HullVertices],
+    },
+    parameters={
+        'individual_id_column': Str,
+        'metadata': Metadata,
+        'number_of_dimensions': Int % Range(2, 3, inclusive_end=True),
+        'joggle': Bool,
+    },
+    outputs=[
+        ('hulls', SampleData[Hulls]),
+        ('hull_vertices', SampleData[HullVertices]),
+    ],
+    input_descriptions={
+        'pcoa': (
+            'Resulting dimensionality reduction for convex hull. '
+            'Samples of the previous run must keep their coordinates.'
+        ),
+        'previous_hulls': (
+            'Convex hulls of a previous run to update.'
+        ),
+        'previous_hull_vertices': (
+            'Hull vertices of the same previous run.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the PCoA results.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'number_of_dimensions': (
+            'The number of components to use for convex hull calculations.'
+        ),
+        'joggle': (
+            'Retry subjects whose points are degenerate, e.g. coplanar '
+            'or duplicated, with joggled input. Subjects that still '
+            'fail get NaN volume and area.'
+        ),
+    },
+    output_descriptions={
+        'hulls':
+            'Metadata containing the convex hulls.',
+        'hull_vertices':
+            'Samples used in each convex hull, marking hull vertices.'
+    },
+    name='update-convex-hull',
+    description=('Recomputes convex hulls only for subjects with new '
+                 'samples since a previous run.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=approximate_convex_hull,
+    inputs={
+        'pcoa': PCoAResults,
+    },
+    parameters={
+        'individual_id_column': Str,
+        'metadata': Metadata,
+        'number_of_dimensions': Int % Range(2, None),
+        'exact_max_dimensions': Int % Range(2, None),
+        'time_budget': Float % Range(0, None, inclusive_start=False),
+        'max_directions': Int % Range(2, None),
+        'confidence': Float % Range(0, 1, inclusive_start=False),
+        'random_state': Int,
+    },
+    outputs=[
+        ('hulls', SampleData[Hulls]),
+    ],
+    input_descriptions={
+        'pcoa': (
+            'Resulting dimensionality reduction for convex hull.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the PCoA results.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'number_of_dimensions': (
+            'The number of components to use for convex hull calculations.'
+        ),
+        'exact_max_dimensions': (
+            'Hulls in up to this many dimensions are computed exactly. '
+            'Volumes in more dimensions are estimated by Monte Carlo '
+            'integration over random directions, and their area is '
+            'not reported.'
+        ),
+        'time_budget': (
+            'Seconds spent estimating the volume of each subject.'
+        ),
+        'max_directions': (
+            'Maximum number of random directions per subject.'
+        ),
+        'confidence': (
+            'Coverage of the confidence interval of estimated volumes.'
+        ),
+        'random_state': (
+            'Seed of the random directions.'
+        ),
+    },
+    output_descriptions={
+        'hulls':
+            'Metadata containing the convex hulls and volume '
+            'confidence bounds.'
+    },
+    name='approximate-convex-hull',
+    description=('Applies convex hulls to dimensionality reduction in '
+                 'any number of dimensions, estimating volumes where '
+                 'exact hulls are too expensive.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=bootstrap_convex_hull,
+    inputs={
+        'pcoa': PCoAResults,
+    },
+    parameters={
+        'individual_id_column': Str,
+        'metadata': Metadata,
+        'n_timepoints': Int % Range(3, None),
+        'number_of_dimensions': Int % Range(2, 3, inclusive_end=True),
+        'n_replicates': Int % Range(2, None),
+        'confidence': Float % Range(0, 1, inclusive_start=False),
+        'random_state': Int,
+        'n_jobs': Int % Range(1, None),
+    },
+    outputs=[
+        ('hulls', SampleData[Hulls]),
+    ],
+    input_descriptions={
+        'pcoa': (
+            'Resulting dimensionality reduction for convex hull.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the PCoA results.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'n_timepoints': (
+            'Number of timepoints drawn from each subject for every '
+            'replicate. Subjects with fewer timepoints are skipped.'
+        ),
+        'number_of_dimensions': (
+            'The number of components to use for convex hull calculations.'
+        ),
+        'n_replicates': (
+            'Number of random subsamples of each subject.'
+        ),
+        'confidence': (
+            'Coverage of the percentile intervals of volume and area.'
+        ),
+        'random_state': (
+            'Seed of the random subsamples.'
+        ),
+        'n_jobs': (
+            'The number of threads to use for convex hull calculations.'
+        ),
+    },
+    output_descriptions={
+        'hulls':
+            'Metadata containing the mean convex hull volume and area '
+            'of the subsamples, with their intervals.'
+    },
+    name='bootstrap-convex-hull',
+    description=('Applies convex hulls to random subsamples of each '
+                 'subject with a fixed number of timepoints, making '
+                 'hulls comparable between subjects sampled at '
+                 'different depths.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=sliding_window_convex_hull,
+    inputs={
+        'pcoa': PCoAResults,
+    },
+    parameters={
+        'individual_id_column': Str,
+        'metadata': Metadata,
+        'time_column': Str,
+        'window_size': Float % Range(0, None, inclusive_start=False),
+        'step': Float % Range(0, None, inclusive_start=False),
+        'number_of_dimensions': Int % Range(2, 3, inclusive_end=True),
+        'n_jobs': Int % Range(1, None),
+    },
+    outputs=[
+        ('hulls', SampleData[Hulls]),
+    ],
+    input_descriptions={
+        'pcoa': (
+            'Resulting dimensionality reduction for convex hull.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the PCoA results.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'time_column': (
+            'Numeric metadata column with the time of each sample.'
+        ),
+        'window_size': (
+            'Length of each time window.'
+        ),
+        'step': (
+            'Time between the starts of consecutive windows. Defaults '
+            'to the window size, giving windows that do not overlap.'
+        ),
+        'number_of_dimensions': (
+            'The number of components to use for convex hull calculations.'
+        ),
+        'n_jobs': (
+            'The number of threads to use for convex hull calculations.'
+        ),
+    },
+    output_descriptions={
+        'hulls':
+            'Metadata containing the convex hull of each subject in '
+            'each time window, one row per window.'
+    },
+    name='sliding-window-convex-hull',
+    description=('Applies convex hulls to each subject over sliding '
+                 'windows of time.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=multi_convex_hull,
+    inputs={
+        'pcoas': Collection[PCoAResults],
+    },
+    parameters={
+        'individual_id_column': Str,
+        'metadata': Metadata,
+        'dimensions': List[Int % Range(2, 3, inclusive_end=True)],
+        'n_jobs': Int % Range(1, None),
+    },
+    outputs=[
+        ('hulls', SampleData[Hulls]),
+    ],
+    input_descriptions={
+        'pcoas': (
+            'Dimensionality reductions of the same samples, e.g. one '
+            'per distance metric.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the PCoA results.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'dimensions': (
+            'The numbers of components to use for convex hull '
+            'calculations. Defaults to both 2 and 3.'
+        ),
+        'n_jobs': (
+            'The number of threads to use for convex hull calculations.'
+        ),
+    },
+    output_descriptions={
+        'hulls':
+            'Metadata containing the convex hull volume and area of '
+            'every subject for each PCoA result and number of '
+            'components, in one row per subject.'
+    },
+    name='multi-convex-hull',
+    description=('Applies convex hulls to several dimensionality '
+                 'reductions of the same samples, in several numbers '
+                 'of dimensions, in one pass.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=hull_permutation_test,
+    inputs={
+        'hulls': SampleData[Hulls],
+    },
+    parameters={
+        'metadata': Metadata,
+        'individual_id_column': Str,
+        'grouping_column': Str,
+        'measure': Str,
+        'permutations': Int % Range(0, None),
+        'random_state': Int,
+        'n_jobs': Int % Range(1, None),
+    },
+    outputs=[
+        ('significance', HullSignificance),
+    ],
+    input_descriptions={
+        'hulls': (
+            'Convex hulls of the subjects to compare.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with the subject and group of each sample.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'grouping_column': (
+            'Categorical metadata column with the group of each '
+            'subject.'
+        ),
+        'measure': (
+            'Hull measure compared between groups.'
+        ),
+        'permutations': (
+            'Number of random permutations of the groups.'
+        ),
+        'random_state': (
+            'Seed of the permutations.'
+        ),
+        'n_jobs': (
+            'The number of threads running the permutations.'
+        ),
+    },
+    output_descriptions={
+        'significance':
+            'Pseudo-F statistic and permutation p-value.'
+    },
+    name='hull-permutation-test',
+    description=('Tests whether a convex hull measure differs between '
+                 'groups of subjects with a one-way permutation test.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.methods.register_function(
+    function=hull_overlap,
+    inputs={
+        'pcoa': PCoAResults,
+    },
+    parameters={
+        'metadata': Metadata,
+        'individual_id_column': Str,
+        'number_of_dimensions': Int % Range(2, 3, inclusive_end=True),
+        'strata_columns': List[Str],
+        'within_subject': Bool,
+        'n_jobs': Int % Range(1, None),
+    },
+    outputs=[
+        ('overlap', HullOverlap),
+    ],
+    input_descriptions={
+        'pcoa': (
+            'Resulting dimensionality reduction for convex hull.'
+        ),
+    },
+    parameter_descriptions={
+        'metadata': (
+            'Metadata table with samples matching the PCoA results.'
+        ),
+        'individual_id_column': (
+            'Metadata column containing IDs for individual subjects.'
+        ),
+        'number_of_dimensions': (
+            'The number of components to use for convex hull calculations.'
+        ),
+        'strata_columns': (
+            'Further metadata columns, such as an early or late period, '
+            'splitting the samples of each subject into strata with a '
+            'hull each.'
+        ),
+        'within_subject': (
+            'Only compare the strata of the same subject.'
+        ),
+        'n_jobs': (
+            'The number of threads computing hulls and intersections.'
+        ),
+    },
+    output_descriptions={
+        'overlap':
+            'Intersection volume and Jaccard index of every pair of '
+            'overlapping hulls.'
+    },
+    name='hull-overlap',
+    description=('Computes the intersection volume of the convex hulls '
+                 'of every overlapping pair of subjects, pruning pairs '
+                 'whose bounding boxes do not intersect.'),
+    citations=[
+        citations['Song2021-wu'],
+    ]
+)
+
+plugin.register_semantic_types(Hulls, HullVertices, HullSignificance,
+                               HullOverlap, HullGeometry)
+# hull tables are stored column by column, so later steps load them
+# without parsing text; TSV artifacts of earlier versions are still read
 plugin.register_semantic_type_to_format(
     SampleData[Hulls],
-    artifact_format=HullsDirectoryFormat)
-plugin.register_formats(HullsDirectoryFormat)
+    artifact_format=HullsNPZDirectoryFormat)
+plugin.register_semantic_type_to_format(
+    SampleData[HullVertices],
+    artifact_format=HullVerticesDirectoryFormat)
+plugin.register_semantic_type_to_format(
+    HullSignificance,
+    artifact_format=HullSignificanceDirectoryFormat)
+plugin.register_semantic_type_to_format(
+    HullOverlap,
+    artifact_format=HullOverlapDirectoryFormat)
+plugin.register_semantic_type_to_format(
+    HullGeometry,
+    artifact_format=HullGeometryDirectoryFormat)
+plugin.register_formats(HullsDirectoryFormat, HullVerticesDirectoryFormat,
+                        HullsNPZDirectoryFormat,
+                        HullSignificanceDirectoryFormat,
+                        HullOverlapDirectoryFormat,
+                        HullGeometryDirectoryFormat)
 importlib.import_module('q2_convexhull._transformer')
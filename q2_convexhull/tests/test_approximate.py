@@ -0,0 +1,39 @@
+from unittest import TestCase
+import numpy as np
+from scipy.spatial import ConvexHull
+from q2_convexhull._approximate import radial_volume
+
+
+class TestRadialVolume(TestCase):
+
+    def test_covers_exact_volume(self):
+        rng = np.random.default_rng(2)
+        for n_dimensions in (2, 3, 4):
+            points = (rng.normal(size=(50, n_dimensions)) *
+                      np.arange(1, n_dimensions + 1))
+            exact = ConvexHull(points).volume
+
+            volume, lower, upper, n_directions = radial_volume(
+                points, 10.0, 600, 0.999, rng)
+
+            self.assertLessEqual(lower, exact)
+            self.assertGreaterEqual(upper, exact)
+            self.assertLess(abs(volume - exact) / exact, 0.15)
+            self.assertLessEqual(n_directions, 601)
+
+    def test_time_budget(self):
+        rng = np.random.default_rng(2)
+        points = rng.normal(size=(30, 6))
+
+        *_, n_directions = radial_volume(points, 0.0, 10 ** 6, 0.95, rng)
+
+        self.assertEqual(n_directions, 32)
+
+    def test_flat(self):
+        points = np.zeros((10, 3))
+        points[:, :2] = np.random.default_rng(2).normal(size=(10, 2))
+
+        self.assertEqual(
+            radial_volume(points, 1.0, 100, 0.95,
+                          np.random.default_rng(0)),
+            (0.0, 0.0, 0.0, 0))
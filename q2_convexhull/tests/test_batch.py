@@ -0,0 +1,53 @@
+from unittest import TestCase
+import numpy as np
+from scipy.spatial import ConvexHull
+from q2_convexhull._batch import batch_hull_measures
+
+
+class TestBatchHullMeasures(TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def assert_matches_qhull(self, points):
+        volumes, areas, ok = batch_hull_measures(points)
+        self.assertTrue(ok.all())
+        for i, coords in enumerate(points):
+            c_hull = ConvexHull(coords)
+            self.assertAlmostEqual(volumes[i], c_hull.volume, places=9)
+            self.assertAlmostEqual(areas[i], c_hull.area, places=9)
+
+    def test_2d(self):
+        for n_points in range(3, 15):
+            self.assert_matches_qhull(
+                self.rng.normal(size=(25, n_points, 2)))
+
+    def test_3d(self):
+        for n_points in range(4, 10):
+            self.assert_matches_qhull(
+                self.rng.normal(size=(25, n_points, 3)))
+
+    def test_degenerate_left_to_qhull(self):
+        cube = np.array([[x, y, z] for x in (0, 1)
+                         for y in (0, 1) for z in (0, 1)], dtype=float)
+        square = np.array([[0, 0], [0, 1], [1, 0],
+                           [1, 1], [0.5, 0]], dtype=float)
+        duplicate = np.array([[0, 0], [0, 1], [1, 0], [1, 0]],
+                             dtype=float)
+
+        _, _, ok = batch_hull_measures(cube[None])
+        self.assertFalse(ok[0])
+        _, _, ok = batch_hull_measures(square[None])
+        self.assertFalse(ok[0])
+        _, _, ok = batch_hull_measures(duplicate[None])
+        self.assertFalse(ok[0])
+
+    def test_too_few_points(self):
+        _, _, ok = batch_hull_measures(np.zeros((2, 3, 3)))
+        self.assertFalse(ok.any())
+
+    def test_bad_dimensions(self):
+        with self.assertRaisesRegex(
+                ValueError,
+                'Batched hulls are only supported for 2 or 3 dimensions.'):
+            batch_hull_measures(np.zeros((2, 6, 4)))
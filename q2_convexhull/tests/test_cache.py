@@ -0,0 +1,51 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+import numpy as np
+from q2_convexhull._cache import HullCache
+
+
+class TestHullCache(TestCase):
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        rng = np.random.default_rng(3)
+        self.blocks = [rng.normal(size=(8, 3)) for _ in range(4)]
+
+    def test_key(self):
+        block = self.blocks[0]
+        self.assertEqual(HullCache.key(block), HullCache.key(block.copy()))
+        self.assertNotEqual(HullCache.key(block),
+                            HullCache.key(block[:, :2]))
+        self.assertNotEqual(HullCache.key(block),
+                            HullCache.key(block.reshape(6, 4)))
+
+    def test_get_put(self):
+        keys = [HullCache.key(block) for block in self.blocks]
+
+        with HullCache(self.tempdir.name) as cache:
+            _, _, found = cache.get(keys)
+            self.assertFalse(found.any())
+            cache.put(keys[:2], [1.0, 2.0], [3.0, 4.0])
+
+        with HullCache(self.tempdir.name) as cache:
+            volumes, areas, found = cache.get(keys)
+            self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+        np.testing.assert_array_equal(found, [True, True, False, False])
+        np.testing.assert_array_equal(volumes[:2], [1.0, 2.0])
+        np.testing.assert_array_equal(areas[:2], [3.0, 4.0])
+        self.assertTrue(np.isnan(volumes[2:]).all())
+
+    def test_lru_eviction(self):
+        keys = [HullCache.key(block) for block in self.blocks]
+
+        with HullCache(self.tempdir.name, size=3) as cache:
+            cache.put(keys[:3], [1.0] * 3, [1.0] * 3)
+        with HullCache(self.tempdir.name, size=3) as cache:
+            cache.get(keys[1:3])
+            cache.put(keys[3:], [1.0], [1.0])
+        with HullCache(self.tempdir.name, size=3) as cache:
+            _, _, found = cache.get(keys)
+
+        np.testing.assert_array_equal(found, [False, True, True, True])
@@ -0,0 +1,31 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+import os
+import numpy as np
+from skbio import DistanceMatrix
+from q2_convexhull._distance import Distances
+
+
+class TestDistances(TestCase):
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, 'distance-matrix.tsv')
+
+    def test_read(self):
+        # numeric looking IDs stay strings
+        data = np.array([[0, 1, 2], [1, 0, 3], [2, 3, 0]], dtype=float)
+        DistanceMatrix(data, ['10', 'a', '3']).write(self.path)
+
+        distances = Distances.read(self.path)
+
+        self.assertEqual(distances.ids, ['10', 'a', '3'])
+        np.testing.assert_array_equal(distances.data, data)
+
+    def test_not_square(self):
+        with open(self.path, 'w') as fh:
+            fh.write('\ta\tb\na\t0\t1\n')
+
+        with self.assertRaisesRegex(ValueError, 'should be square'):
+            Distances.read(self.path)
@@ -0,0 +1,247 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+import os
+import numpy as np
+import pandas as pd
+from qiime2.plugin import ValidationError
+from q2_convexhull._format import (HullsFormat, HullsNPZFormat,
+                                   HullSignificanceFormat, HullOverlapFormat,
+                                   HullGeometryFormat)
+from q2_convexhull._geometry import HullSurfaces
+
+
+class TestHullsFormat(TestCase):
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.header = 'id\tunique_id\tconvexhull_volume\tconvexhull_area\n'
+
+    def hulls(self, body, header=None):
+        path = os.path.join(self.tempdir.name, 'hulls.tsv')
+        with open(path, 'w') as fh:
+            fh.write(header or self.header)
+            fh.write(body)
+        return HullsFormat(path, mode='r')
+
+    def test_valid(self):
+        ff = self.hulls('0\ts1\t1.0\t6.0\n1\ts2\tnan\t 2e3\n2\ts3\tinf\t1\n')
+
+        for level in ('min', 'max'):
+            ff.validate(level)
+
+    def test_extra_measures(self):
+        ff = self.hulls('0\ts1\t1.0\t6.0\t0.5\n',
+                        self.header.replace(
+                            '\n', '\tconvexhull_volume_lower\n'))
+        ff.validate('max')
+
+        ff = self.hulls('0\ts1\t1.0\t6.0\t0.5\n',
+                        self.header.replace('\n', '\tother\n'))
+        with self.assertRaisesRegex(
+                ValidationError,
+                'Additional columns should be convexhull_ measures.'):
+            ff.validate('max')
+
+    def test_key_columns(self):
+        header = 'id\tunique_id\twindow_start\tconvexhull_volume\t' \
+                 'convexhull_area\n'
+        ff = self.hulls('0\ts1\t0.5\t1.0\t6.0\n1\ts1\t1.5\tnan\tabc\n',
+                        header)
+        with self.assertRaisesRegex(
+                ValidationError,
+                "Non float value 'abc' in convexhull_area on line 3."):
+            ff.validate('max')
+
+        # wide tables of several ordinations
+        header = 'id\tunique_id\tconvexhull_volume_unifrac_2d\t' \
+                 'convexhull_area_unifrac_2d\tconvexhull_volume_jaccard_2d\n'
+        self.hulls('0\ts1\t1.0\t6.0\t2.0\n', header).validate('max')
+
+        for columns, message in (
+                ('convexhull_volume\tunique_id\tconvexhull_area',
+                 'The volume should be the first measure'),
+                ('unique_id\tconvexhull_volume\tconvexhull_other',
+                 'The area should follow the volume.'),
+                ('unique_id\tconvexhull_volume_a\tconvexhull_area_b',
+                 'The area should follow the volume.')):
+            ff = self.hulls('0\ts1\t1.0\t6.0\n', f'id\t{columns}\n')
+            with self.assertRaisesRegex(ValidationError, message):
+                ff.validate('min')
+
+    def test_bad_header(self):
+        ff = self.hulls('0\ts1\t1.0\n',
+                        'id\tunique_id\tconvexhull_volume\n')
+
+        with self.assertRaisesRegex(
+                ValidationError,
+                'There should be at least three columns'):
+            ff.validate('min')
+
+    def test_bad_value_line(self):
+        body = ''.join(f'{i}\ts{i}\t1.0\t2.0\n' for i in range(300))
+        ff = self.hulls(body + '300\ts300\t1.0\tabc\n')
+
+        # the minimal level only looks at the first records
+        ff.validate('min')
+        with self.assertRaisesRegex(
+                ValidationError,
+                "Non float value 'abc' in convexhull_area on line 302."):
+            ff.validate('max')
+
+    def test_empty_value(self):
+        ff = self.hulls('0\ts1\t\t6.0\n')
+
+        for level in ('min', 'max'):
+            with self.assertRaisesRegex(
+                    ValidationError,
+                    "Non float value '' in convexhull_volume on line 2."):
+                ff.validate(level)
+
+
+class TestHullsNPZFormat(TestCase):
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.columns = ['unique_id', 'convexhull_volume', 'convexhull_area']
+
+    def hulls(self, columns=None, **arrays):
+        columns = columns or self.columns
+        values = {'index': np.array(['0', '1']),
+                  'index_name': np.array('id'),
+                  'columns': np.array(columns),
+                  'column_0': np.array(['s1', 's2']),
+                  'column_1': np.array([1.0, np.nan]),
+                  'column_2': np.array([6.0, 2.0])}
+        values.update(arrays)
+        path = os.path.join(self.tempdir.name, 'hulls.npz')
+        np.savez(path, **values)
+        return HullsNPZFormat(path, mode='r')
+
+    def test_valid(self):
+        self.hulls().validate('max')
+
+    def test_bad_columns(self):
+        ff = self.hulls(['unique_id', 'convexhull_area', 'convexhull_volume'])
+        with self.assertRaisesRegex(ValidationError,
+                                    'The volume should be the first '
+                                    'measure'):
+            ff.validate('max')
+
+    def test_bad_values(self):
+        with self.assertRaisesRegex(ValidationError,
+                                    'convexhull_area should be floats.'):
+            self.hulls(column_2=np.array(['6.0', '2.0'])).validate('max')
+        with self.assertRaisesRegex(ValidationError,
+                                    'should have 2 values.'):
+            self.hulls(column_1=np.array([1.0])).validate('max')
+
+    def test_not_an_archive(self):
+        path = os.path.join(self.tempdir.name, 'hulls.npz')
+        with open(path, 'w') as fh:
+            fh.write('id\tunique_id\n')
+        with self.assertRaisesRegex(ValidationError,
+                                    'Not a valid hulls archive'):
+            HullsNPZFormat(path, mode='r').validate('max')
+
+
+class TestHullSignificanceFormat(TestCase):
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def significance(self, text):
+        path = os.path.join(self.tempdir.name, 'significance.tsv')
+        with open(path, 'w') as fh:
+            fh.write(text)
+        return HullSignificanceFormat(path, mode='r')
+
+    def test_valid(self):
+        ff = self.significance('id\ttest statistic\tp-value\n'
+                               'convexhull_volume\t3.2\t0.001\n'
+                               'convexhull_area\t0.1\tnan\n')
+        ff.validate('max')
+
+    def test_bad_p_value(self):
+        ff = self.significance('id\ttest statistic\tp-value\n'
+                               'convexhull_volume\t3.2\t1.5\n')
+        with self.assertRaisesRegex(
+                ValidationError,
+                'p-value on line 2 should be between 0 and 1.'):
+            ff.validate('max')
+
+    def test_missing_column(self):
+        ff = self.significance('id\ttest statistic\n')
+        with self.assertRaisesRegex(ValidationError,
+                                    'There should be a p-value column.'):
+            ff.validate('min')
+
+
+class TestHullOverlapFormat(TestCase):
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def overlap(self, text):
+        path = os.path.join(self.tempdir.name, 'overlap.tsv')
+        with open(path, 'w') as fh:
+            fh.write(text)
+        return HullOverlapFormat(path, mode='r')
+
+    def test_valid(self):
+        ff = self.overlap('id\tunique_id_1\tunique_id_2\toverlap_volume\t'
+                          'overlap_jaccard\n'
+                          '0\ts1\ts2\t0.5\t0.25\n')
+        ff.validate('max')
+
+    def test_bad_jaccard(self):
+        ff = self.overlap('id\tunique_id_1\tunique_id_2\toverlap_volume\t'
+                          'overlap_jaccard\n'
+                          '0\ts1\ts2\t0.5\t2\n')
+        with self.assertRaisesRegex(
+                ValidationError,
+                'overlap_jaccard on line 2 should be between 0 and 1.'):
+            ff.validate('max')
+
+
+def triangles():
+    return HullSurfaces(
+        pd.DataFrame({'unique_id': ['s1', 's2']}),
+        np.array([0, 3, 6]),
+        np.array(['a', 'b', 'c', 'd', 'e', 'f'], dtype=object),
+        np.arange(12, dtype=float).reshape(6, 2),
+        np.array([0, 3, 6]),
+        np.array([[0, 1], [1, 2], [2, 0], [3, 4], [4, 5], [5, 3]]))
+
+
+class TestHullGeometryFormat(TestCase):
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, 'hull_geometry.npz')
+
+    def write(self, geometry):
+        with open(self.path, 'wb') as fh:
+            geometry.write(fh)
+        return HullGeometryFormat(self.path, mode='r')
+
+    def test_valid(self):
+        self.write(triangles()).validate('max')
+
+    def test_simplex_of_other_hull(self):
+        geometry = triangles()
+        geometry.simplices[0, 0] = 4
+        with self.assertRaisesRegex(ValidationError,
+                                    'vertices of their own hull'):
+            self.write(geometry).validate('max')
+
+    def test_bad_offsets(self):
+        geometry = triangles()
+        geometry.vertex_offsets = np.array([0, 4, 3])
+        with self.assertRaisesRegex(ValidationError,
+                                    'vertex offsets should start at 0'):
+            self.write(geometry).validate('max')
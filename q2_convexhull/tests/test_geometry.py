@@ -0,0 +1,45 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+import os
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from q2_convexhull._geometry import HullSurfaces
+
+
+def triangles():
+    # a failed hull between two triangles
+    return HullSurfaces(
+        pd.DataFrame({'unique_id': ['s1', 's2', 's3']}),
+        np.array([0, 3, 3, 6]),
+        np.array(['a', 'b', 'c', 'd', 'e', 'f'], dtype=object),
+        np.arange(12, dtype=float).reshape(6, 2),
+        np.array([0, 3, 3, 6]),
+        np.array([[0, 1], [1, 2], [2, 0], [3, 4], [4, 5], [5, 3]]))
+
+
+class TestHullSurfaces(TestCase):
+
+    def test_hull(self):
+        ids, coordinates, simplices = triangles().hull(2)
+
+        self.assertEqual(list(ids), ['d', 'e', 'f'])
+        np.testing.assert_array_equal(coordinates[0], [6, 7])
+        np.testing.assert_array_equal(simplices, [[0, 1], [1, 2], [2, 0]])
+        self.assertEqual(len(triangles().hull(1)[0]), 0)
+
+    def test_round_trip(self):
+        expected = triangles()
+        with TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'hull_geometry.npz')
+            with open(path, 'wb') as fh:
+                expected.write(fh)
+            geometry = HullSurfaces.read(path)
+
+        assert_frame_equal(geometry.subjects, expected.subjects)
+        self.assertEqual(list(geometry.vertex_ids),
+                         list(expected.vertex_ids))
+        for name in ('vertex_offsets', 'vertex_coordinates',
+                     'simplex_offsets', 'simplices'):
+            np.testing.assert_array_equal(getattr(geometry, name),
+                                          getattr(expected, name))
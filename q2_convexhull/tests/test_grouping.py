@@ -0,0 +1,55 @@
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from q2_convexhull._grouping import group_subjects
+
+
+class TestGroupSubjects(TestCase):
+
+    def setUp(self):
+        self.subject_ids = pd.Series(
+            ['b', 'a', 'b', None, 'c', 'a', 'b'],
+            index=pd.Index([f'x{i}' for i in range(7)], name='sampleid'))
+        self.coords = np.arange(14, dtype=float).reshape(7, 2)
+
+    def test_groups(self):
+        groups = group_subjects(self.subject_ids, self.coords)
+
+        self.assertEqual(list(groups.subjects), ['a', 'b', 'c'])
+        self.assertEqual(list(groups.sizes), [2, 3, 1])
+        self.assertEqual(list(groups.sample_ids),
+                         ['x1', 'x5', 'x0', 'x2', 'x6', 'x4'])
+        np.testing.assert_array_equal(groups.block(1),
+                                      self.coords[[0, 2, 6]])
+        self.assertTrue(groups.coords.flags['C_CONTIGUOUS'])
+        self.assertEqual(groups.coords.dtype, np.float64)
+
+    def test_blocks_are_views(self):
+        groups = group_subjects(self.subject_ids, self.coords)
+
+        for block in groups.blocks():
+            self.assertTrue(np.shares_memory(block, groups.coords))
+        self.assertEqual(len(groups.blocks([0, 2])), 2)
+
+    def test_matches_groupby(self):
+        frame = pd.DataFrame({'subject': self.subject_ids})
+        groups = group_subjects(self.subject_ids, self.coords)
+
+        for i, (person, group) in enumerate(frame.groupby('subject')):
+            self.assertEqual(groups.subjects[i], person)
+            np.testing.assert_array_equal(
+                groups.block(i),
+                self.coords[self.subject_ids.index.get_indexer(group.index)])
+
+    def test_several_columns(self):
+        keys = pd.DataFrame({'subject': self.subject_ids,
+                             'site': ['gut', 'gut', 'skin', 'gut', 'gut',
+                                      None, 'gut']})
+        groups = group_subjects(keys, self.coords)
+
+        self.assertEqual(list(groups.subjects),
+                         [('a', 'gut'), ('b', 'gut'), ('b', 'skin'),
+                          ('c', 'gut')])
+        self.assertEqual(list(groups.sizes), [1, 2, 1, 1])
+        self.assertEqual(list(groups.sample_ids),
+                         ['x1', 'x0', 'x6', 'x2', 'x4'])
@@ -0,0 +1,21 @@
+from unittest import TestCase
+import subprocess
+import sys
+
+
+class TestLazyImports(TestCase):
+
+    def test_no_heavy_imports(self):
+        # every qiime command loads the plugin, so its modules must not
+        # pull in the geometry and ordination libraries until used
+        modules = ['q2_convexhull.convexhull', 'q2_convexhull._format',
+                   'q2_convexhull._ordination', 'q2_convexhull._distance',
+                   'q2_convexhull._overlap', 'q2_convexhull._geometry']
+        heavy = ['scipy.spatial', 'scipy.optimize', 'scipy.stats', 'skbio']
+        code = (f'import sys\n'
+                f'for module in {modules!r}:\n'
+                f'    __import__(module)\n'
+                f'print(",".join(m for m in {heavy!r} if m in sys.modules))')
+        loaded = subprocess.run([sys.executable, '-c', code],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(loaded.stdout.strip(), '')
@@ -1,9 +1,33 @@
 from unittest import TestCase
+from unittest.mock import patch
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+import json
+import os
+import warnings
 import pandas as pd
 import numpy as np
-from skbio import OrdinationResults
+from scipy.spatial import ConvexHull
+from scipy.spatial.distance import pdist, squareform
+from skbio import OrdinationResults, DistanceMatrix
+from skbio.stats import ordination
 from q2_convexhull.convexhull import convex_hull
 from q2_convexhull.convexhull import validate
+from q2_convexhull.convexhull import hull_measures
+from q2_convexhull.convexhull import update_convex_hull
+from q2_convexhull.convexhull import approximate_convex_hull
+from q2_convexhull.convexhull import bootstrap_convex_hull
+from q2_convexhull.convexhull import hull_permutation_test
+from q2_convexhull.convexhull import sliding_window_convex_hull
+from q2_convexhull.convexhull import multi_convex_hull
+from q2_convexhull.convexhull import chunked_convex_hull
+from q2_convexhull.convexhull import distance_convex_hull
+from q2_convexhull.convexhull import hull_overlap
+from q2_convexhull.convexhull import convex_hull_geometry
+from q2_convexhull._distance import Distances
+from q2_convexhull._ordination import (OrdinationCoordinates,
+                                       MappedOrdinationCoordinates)
 from pandas.testing import assert_frame_equal
 from qiime2 import Metadata
 
@@ -239,6 +263,28 @@ class TestConvexHull(TestCase):
             self.individual_id_column)
 
         assert(meta.index.equals(self.pcoa.samples.index))
+        self.assertEqual(list(meta.columns), [self.individual_id_column])
+        self.assertEqual(list(meta[self.individual_id_column]),
+                         ['s1'] * 8 + ['s2'] * 8)
+
+    def test_meta_missing_samples_listed(self):
+
+        samples_df = self.pcoa.samples.rename(
+            index={'i3': 'missing1', 'x7': 'missing2'})
+        pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            self.pcoa.eigvals,
+            samples_df)
+
+        with self.assertRaisesRegex(
+                KeyError,
+                'Missing sample IDs: missing1, missing2'):
+
+            validate(
+                self.metadata,
+                pcoa,
+                self.individual_id_column)
 
     def test_n_timepoints(self):
 
@@ -282,11 +328,1017 @@ class TestConvexHull(TestCase):
         with self.assertWarnsRegex(
             Warning,
             ('Number of timepoints less than '
-             'number of dimensions.'
-             'Skipping individual s2')):
+             'number of dimensions. '
+             'Skipping 1 individual\\(s\\): s2')):
 
             convex_hull(
                 metadata,
                 pcoa,
                 self.individual_id_column,
                 self.number_of_dimensions)
+
+    def test_batched_matches_qhull(self):
+
+        rng = np.random.default_rng(0)
+        sizes = [4, 5, 9, 12, 30, 4, 7]
+        index = pd.Index([f'i{i}' for i in range(sum(sizes))],
+                         name='sampleid')
+        samples_df = pd.DataFrame(rng.normal(size=(len(index), 3)),
+                                  index=index,
+                                  columns=['PC1', 'PC2', 'PC3'])
+        pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series([0.5, 0.3, 0.2], index=['PC1', 'PC2', 'PC3']),
+            samples_df)
+        people = [f's{i}' for i, size in enumerate(sizes)
+                  for _ in range(size)]
+        metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: people}, index=index))
+
+        for number_of_dimensions in (2, 3):
+            hulls = convex_hull(metadata,
+                                pcoa,
+                                self.individual_id_column,
+                                number_of_dimensions)
+            for _, row in hulls.iterrows():
+                person = row[self.individual_id_column]
+                coords = samples_df.values[
+                    [p == person for p in people], :number_of_dimensions]
+                c_hull = ConvexHull(coords)
+                self.assertAlmostEqual(row['convexhull_volume'],
+                                       c_hull.volume)
+                self.assertAlmostEqual(row['convexhull_area'],
+                                       c_hull.area)
+
+    def test_n_jobs_deterministic(self):
+
+        rng = np.random.default_rng(1)
+        blocks = [rng.normal(size=(size, 3))
+                  for size in rng.integers(4, 40, size=50)]
+
+        expected = hull_measures(blocks, 3)
+        for n_jobs in (2, 3, 8):
+            observed = hull_measures(blocks, 3, n_jobs=n_jobs,
+                                     chunk_size=4)
+            np.testing.assert_array_equal(observed[0], expected[0])
+            np.testing.assert_array_equal(observed[1], expected[1])
+
+        hulls = convex_hull(self.metadata,
+                            self.pcoa,
+                            self.individual_id_column,
+                            self.number_of_dimensions,
+                            n_jobs=4)
+        assert_frame_equal(
+            hulls,
+            convex_hull(self.metadata,
+                        self.pcoa,
+                        self.individual_id_column,
+                        self.number_of_dimensions))
+
+    def test_ordination_coordinates(self):
+
+        pcoa = OrdinationCoordinates(self.pcoa.samples.iloc[:, :2], 5)
+
+        with self.assertWarnsRegex(
+                Warning,
+                "PCoA result has 5 dimensions. Truncating to 3 PC's"):
+            hulls = convex_hull(self.metadata,
+                                pcoa,
+                                self.individual_id_column,
+                                2)
+        expected = pd.DataFrame(
+            {self.individual_id_column: ['s1', 's2'],
+             'convexhull_volume': [1.0, 1.0],
+             'convexhull_area': [4.0, 4.0]})
+        assert_frame_equal(hulls, expected)
+
+    def test_cache(self):
+
+        expected = convex_hull(self.metadata,
+                               self.pcoa,
+                               self.individual_id_column,
+                               self.number_of_dimensions)
+        with TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, 'profile.json')
+            for cache in ({'hits': 0, 'misses': 2},
+                          {'hits': 2, 'misses': 0}):
+                output = StringIO()
+                with patch.dict(os.environ,
+                                {'Q2_CONVEXHULL_PROFILE': path}), \
+                        redirect_stdout(output):
+                    hulls = convex_hull(self.metadata,
+                                        self.pcoa,
+                                        self.individual_id_column,
+                                        self.number_of_dimensions,
+                                        cache_dir=os.path.join(cache_dir,
+                                                               'cache'))
+                assert_frame_equal(hulls, expected)
+                self.assertEqual(output.getvalue(), '')
+                with open(path) as fh:
+                    self.assertEqual(json.load(fh)['cache'], cache)
+
+    def test_strata(self):
+
+        metadata = self.metadata.to_dataframe()
+        metadata['site'] = ['gut', 'skin'] * 8
+        metadata = Metadata(metadata)
+        hulls = convex_hull(metadata,
+                            self.pcoa,
+                            self.individual_id_column,
+                            2,
+                            strata_columns=['site'])
+
+        self.assertEqual(list(hulls.columns),
+                         [self.individual_id_column, 'site',
+                          'convexhull_volume', 'convexhull_area'])
+        self.assertEqual(list(zip(hulls[self.individual_id_column],
+                                  hulls['site'])),
+                         [('s1', 'gut'), ('s1', 'skin'),
+                          ('s2', 'gut'), ('s2', 'skin')])
+        samples = self.pcoa.samples.values[:, :2]
+        for _, row in hulls.iterrows():
+            people = metadata.to_dataframe()
+            inside = ((people[self.individual_id_column] ==
+                       row[self.individual_id_column]) &
+                      (people['site'] == row['site'])).to_numpy()
+            c_hull = ConvexHull(samples[inside])
+            self.assertAlmostEqual(row['convexhull_volume'], c_hull.volume)
+            self.assertAlmostEqual(row['convexhull_area'], c_hull.area)
+
+        with self.assertRaisesRegex(
+                ValueError,
+                'Strata column phase not found in metadata columns.'):
+            convex_hull(metadata,
+                        self.pcoa,
+                        self.individual_id_column,
+                        strata_columns=['phase'])
+
+    def test_extended_metrics(self):
+
+        for number_of_dimensions in (2, 3):
+            hulls = convex_hull(self.metadata,
+                                self.pcoa,
+                                self.individual_id_column,
+                                number_of_dimensions,
+                                extended_metrics=True)
+            pcs = ['PC1', 'PC2', 'PC3'][:number_of_dimensions]
+            self.assertEqual(
+                list(hulls.columns),
+                [self.individual_id_column, 'convexhull_volume',
+                 'convexhull_area', 'convexhull_n_vertices'] +
+                [f'convexhull_centroid_{pc}' for pc in pcs] +
+                ['convexhull_diameter', 'convexhull_density'])
+            np.testing.assert_allclose(
+                hulls[[f'convexhull_centroid_{pc}' for pc in pcs]],
+                [[0.5] * number_of_dimensions,
+                 [3.5] * number_of_dimensions])
+            np.testing.assert_allclose(hulls['convexhull_n_vertices'],
+                                       2 ** number_of_dimensions)
+            np.testing.assert_allclose(hulls['convexhull_diameter'],
+                                       np.sqrt(number_of_dimensions))
+            np.testing.assert_allclose(hulls['convexhull_density'], 8)
+
+    def test_extended_centroid(self):
+
+        # a right triangle, its centroid is the mean of the corners
+        # while the mean of the points is pulled to the dense corner
+        points = np.array([[0, 0], [3, 0], [0, 3], [0.1, 0.1],
+                           [0.2, 0.1], [0.1, 0.2]])
+        index = pd.Index([f'i{i}' for i in range(6)], name='sampleid')
+        pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series([0.6, 0.4], index=['PC1', 'PC2']),
+            pd.DataFrame(points, index=index, columns=['PC1', 'PC2']))
+        metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: ['s1'] * 6}, index=index))
+
+        hulls = convex_hull(metadata, pcoa, self.individual_id_column, 2,
+                            extended_metrics=True)
+        np.testing.assert_allclose(
+            hulls[['convexhull_centroid_PC1', 'convexhull_centroid_PC2']],
+            [[1, 1]])
+        self.assertEqual(hulls['convexhull_n_vertices'][0], 3)
+        self.assertAlmostEqual(hulls['convexhull_diameter'][0],
+                               np.sqrt(18))
+
+    def test_failed_subjects(self):
+
+        samples_df = self.pcoa.samples.copy()
+        # s1 becomes flat, which Qhull can not hull in 3 dimensions
+        samples_df.iloc[:8, 2] = 0
+        pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            self.pcoa.eigvals,
+            samples_df)
+
+        with self.assertWarnsRegex(
+                Warning,
+                'Qhull failed, volume and area are NaN for '
+                '1 individual\\(s\\): s1'):
+            hulls = convex_hull(self.metadata,
+                                pcoa,
+                                self.individual_id_column,
+                                self.number_of_dimensions)
+        self.assertTrue(np.isnan(hulls['convexhull_volume'][0]))
+        self.assertEqual(hulls['convexhull_volume'][1], 1.0)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            hulls = convex_hull(self.metadata,
+                                pcoa,
+                                self.individual_id_column,
+                                self.number_of_dimensions,
+                                joggle=True)
+        self.assertAlmostEqual(hulls['convexhull_volume'][0], 0, places=6)
+        self.assertAlmostEqual(hulls['convexhull_area'][0], 2, places=6)
+
+    def test_many_skipped_subjects(self):
+
+        index = pd.Index([f'i{i}' for i in range(40)], name='sampleid')
+        pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            self.pcoa.eigvals,
+            pd.DataFrame(np.random.default_rng(0).normal(size=(40, 3)),
+                         index=index, columns=['PC1', 'PC2', 'PC3']))
+        metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: [f's{i // 2:02d}'
+                                         for i in range(40)]},
+            index=index))
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            convex_hull(metadata, pcoa, self.individual_id_column, 3)
+        self.assertEqual(len(caught), 1)
+        self.assertIn('Skipping 20 individual(s): s00, s01',
+                      str(caught[0].message))
+
+        with patch('q2_convexhull.convexhull.WARN_MAX_SUBJECTS', 3):
+            with self.assertWarnsRegex(Warning,
+                                       's00, s01, s02 and 17 more'):
+                convex_hull(metadata, pcoa, self.individual_id_column, 3)
+
+        # the profile lists every one of them
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            with patch.dict(os.environ, {'Q2_CONVEXHULL_PROFILE': path}), \
+                    patch('q2_convexhull.convexhull.WARN_MAX_SUBJECTS', 3), \
+                    self.assertWarns(Warning):
+                convex_hull(metadata, pcoa, self.individual_id_column, 3)
+            with open(path) as fh:
+                report = json.load(fh)
+        self.assertEqual(
+            report['excluded'],
+            [{'reason': 'Number of timepoints less than number of '
+                        'dimensions. Skipping',
+              'n_subjects': 20,
+              'subjects': [f's{i:02d}' for i in range(20)]}])
+
+    def test_profile(self):
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            with patch.dict(os.environ, {'Q2_CONVEXHULL_PROFILE': path}):
+                convex_hull(self.metadata,
+                            self.pcoa,
+                            self.individual_id_column,
+                            self.number_of_dimensions)
+            with open(path) as fh:
+                report = json.load(fh)
+
+        self.assertEqual([stage['stage'] for stage in report['stages']],
+                         ['validate', 'group', 'hulls', 'assemble'])
+        # the cubes are coplanar, so the batched engine leaves them
+        # to Qhull
+        self.assertEqual(sorted(subject['subject']
+                                for subject in report['subjects']),
+                         ['s1', 's2'])
+        self.assertEqual(report['slowest_subjects'][0]['n_vertices'], 8)
+        self.assertEqual(report['excluded'], [])
+
+    def test_geometry(self):
+        hulls, geometry = convex_hull_geometry(self.metadata,
+                                               self.pcoa,
+                                               self.individual_id_column,
+                                               self.number_of_dimensions)
+
+        assert_frame_equal(hulls, convex_hull(self.metadata,
+                                              self.pcoa,
+                                              self.individual_id_column,
+                                              self.number_of_dimensions))
+        assert_frame_equal(geometry.subjects,
+                           hulls[[self.individual_id_column]])
+        samples = self.pcoa.samples
+        for i, prefix in enumerate(['i', 'x']):
+            ids, coordinates, simplices = geometry.hull(i)
+            # every corner of the cube, and two triangles per face
+            self.assertEqual(sorted(ids), [f'{prefix}{j}'
+                                           for j in range(1, 9)])
+            np.testing.assert_array_equal(coordinates,
+                                          samples.loc[ids].to_numpy())
+            self.assertEqual(simplices.shape, (12, 3))
+            self.assertEqual(set(simplices.ravel()), set(range(8)))
+
+
+class TestUpdateConvexHull(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        rng = np.random.default_rng(7)
+        sizes = {'s1': 12, 's2': 20, 's3': 6}
+        self.people = [person for person, size in sizes.items()
+                       for _ in range(size)]
+        index = pd.Index([f'i{i}' for i in range(len(self.people))],
+                         name='sampleid')
+        self.samples_df = pd.DataFrame(
+            rng.normal(size=(len(index), 3)),
+            index=index,
+            columns=['PC1', 'PC2', 'PC3'])
+        self.metadata_df = pd.DataFrame(
+            {self.individual_id_column: self.people}, index=index)
+
+    def subset(self, keep):
+        samples_df = self.samples_df[keep]
+        pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series([0.5, 0.3, 0.2], index=['PC1', 'PC2', 'PC3']),
+            samples_df)
+        return Metadata(self.metadata_df[keep]), pcoa
+
+    def test_degenerate_subject(self):
+        # s3 is flat, it fails without stopping the others
+        flat = np.array(self.people) == 's3'
+        self.samples_df.loc[flat, 'PC3'] = 0.0
+        metadata, pcoa = self.subset(np.ones(len(self.people), dtype=bool))
+
+        with self.assertWarnsRegex(
+                Warning,
+                'Qhull failed, volume and area are NaN for 1 '
+                'individual\\(s\\): s3'):
+            hulls, hull_vertices = update_convex_hull(
+                metadata, pcoa, self.individual_id_column)
+
+        self.assertTrue(np.isnan(hulls['convexhull_volume'][2]))
+        self.assertFalse(hull_vertices['hull_vertex'][flat].any())
+        self.assertTrue(np.isfinite(hulls['convexhull_volume'][:2]).all())
+        self.assertTrue(hull_vertices['hull_vertex'][~flat].any())
+
+    def test_without_previous(self):
+        metadata, pcoa = self.subset(np.ones(len(self.people), dtype=bool))
+
+        hulls, hull_vertices = update_convex_hull(
+            metadata, pcoa, self.individual_id_column)
+
+        assert_frame_equal(hulls, convex_hull(metadata, pcoa,
+                                              self.individual_id_column))
+        self.assertTrue(hull_vertices.index.equals(
+            pd.Index(self.samples_df.index, name='id')))
+        for person in ['s1', 's2', 's3']:
+            rows = hull_vertices[self.individual_id_column] == person
+            c_hull = ConvexHull(self.samples_df.values[rows.values])
+            self.assertEqual(
+                list(np.flatnonzero(hull_vertices['hull_vertex'][rows])),
+                sorted(c_hull.vertices))
+
+    def test_new_samples(self):
+        people = np.array(self.people)
+        before = ~((people == 's2') & (np.arange(len(people)) % 3 == 0))
+        metadata, pcoa = self.subset(before)
+        previous_hulls, previous_hull_vertices = update_convex_hull(
+            metadata, pcoa, self.individual_id_column)
+        # an unchanged subject is carried over without recomputation
+        previous_hulls.loc[previous_hulls[self.individual_id_column] ==
+                           's1', 'convexhull_volume'] = 42.0
+
+        metadata, pcoa = self.subset(np.ones(len(people), dtype=bool))
+        hulls, hull_vertices = update_convex_hull(
+            metadata, pcoa, self.individual_id_column,
+            previous_hulls=previous_hulls,
+            previous_hull_vertices=previous_hull_vertices)
+
+        expected_hulls, expected_vertices = update_convex_hull(
+            metadata, pcoa, self.individual_id_column)
+        expected_hulls.loc[0, 'convexhull_volume'] = 42.0
+        assert_frame_equal(hulls, expected_hulls)
+        assert_frame_equal(hull_vertices, expected_vertices)
+
+    def test_removed_samples(self):
+        metadata, pcoa = self.subset(np.ones(len(self.people), dtype=bool))
+        previous_hulls, previous_hull_vertices = update_convex_hull(
+            metadata, pcoa, self.individual_id_column)
+        previous_hulls['convexhull_volume'] = 42.0
+
+        keep = np.arange(len(self.people)) != 0
+        metadata, pcoa = self.subset(keep)
+        hulls, _ = update_convex_hull(
+            metadata, pcoa, self.individual_id_column,
+            previous_hulls=previous_hulls,
+            previous_hull_vertices=previous_hull_vertices)
+
+        self.assertNotEqual(hulls['convexhull_volume'][0], 42.0)
+        self.assertEqual(list(hulls['convexhull_volume'][1:]), [42.0, 42.0])
+
+    def test_numeric_subject_ids(self):
+        # Metadata reads the subject column of stored outputs as numbers
+        # when every ID looks like one
+        self.people = [{'s1': '001', 's2': '002', 's3': '010'}[person]
+                       for person in self.people]
+        self.metadata_df[self.individual_id_column] = self.people
+        metadata, pcoa = self.subset(np.ones(len(self.people), dtype=bool))
+        previous_hulls, previous_hull_vertices = update_convex_hull(
+            metadata, pcoa, self.individual_id_column)
+        for previous in (previous_hulls, previous_hull_vertices):
+            previous[self.individual_id_column] = \
+                previous[self.individual_id_column].astype(float)
+
+        with patch('q2_convexhull.convexhull._qhull') as qhull:
+            hulls, hull_vertices = update_convex_hull(
+                metadata, pcoa, self.individual_id_column,
+                previous_hulls=previous_hulls,
+                previous_hull_vertices=previous_hull_vertices)
+
+        qhull.assert_not_called()
+        np.testing.assert_array_equal(hulls['convexhull_volume'],
+                                      previous_hulls['convexhull_volume'])
+        np.testing.assert_array_equal(
+            hull_vertices['hull_vertex'],
+            previous_hull_vertices['hull_vertex'])
+
+    def test_previous_outputs_together(self):
+        metadata, pcoa = self.subset(np.ones(len(self.people), dtype=bool))
+        previous_hulls, _ = update_convex_hull(
+            metadata, pcoa, self.individual_id_column)
+
+        with self.assertRaisesRegex(
+                ValueError,
+                'previous_hulls and previous_hull_vertices '
+                'must be given together.'):
+            update_convex_hull(metadata, pcoa, self.individual_id_column,
+                               previous_hulls=previous_hulls)
+
+
+class TestApproximateConvexHull(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        rng = np.random.default_rng(5)
+        self.people = ['s1'] * 40 + ['s2'] * 30 + ['s3'] * 3
+        index = pd.Index([f'i{i}' for i in range(len(self.people))],
+                         name='sampleid')
+        columns = [f'PC{i}' for i in range(1, 7)]
+        self.samples_df = pd.DataFrame(
+            rng.normal(size=(len(index), len(columns))),
+            index=index,
+            columns=columns)
+        self.pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series(np.ones(len(columns)), index=columns),
+            self.samples_df)
+        self.metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: self.people}, index=index))
+
+    def test_exact(self):
+        hulls = approximate_convex_hull(self.metadata,
+                                        self.pcoa,
+                                        self.individual_id_column,
+                                        4)
+
+        self.assertEqual(list(hulls[self.individual_id_column]),
+                         ['s1', 's2'])
+        for i, person in enumerate(['s1', 's2']):
+            c_hull = ConvexHull(self.samples_df.values[
+                [p == person for p in self.people], :4])
+            self.assertAlmostEqual(hulls['convexhull_volume'][i],
+                                   c_hull.volume)
+            self.assertAlmostEqual(hulls['convexhull_area'][i],
+                                   c_hull.area)
+        for bound in ('convexhull_volume_lower', 'convexhull_volume_upper'):
+            np.testing.assert_array_equal(hulls[bound],
+                                          hulls['convexhull_volume'])
+
+    def test_estimated(self):
+        hulls = approximate_convex_hull(self.metadata,
+                                        self.pcoa,
+                                        self.individual_id_column,
+                                        5,
+                                        exact_max_dimensions=4,
+                                        time_budget=0.2,
+                                        max_directions=500,
+                                        confidence=0.999)
+
+        self.assertTrue(hulls['convexhull_area'].isna().all())
+        for i, person in enumerate(['s1', 's2']):
+            exact = ConvexHull(self.samples_df.values[
+                [p == person for p in self.people], :5]).volume
+            self.assertLessEqual(hulls['convexhull_volume_lower'][i], exact)
+            self.assertGreaterEqual(hulls['convexhull_volume_upper'][i],
+                                    exact)
+
+    def test_too_few_dimensions(self):
+        with self.assertRaisesRegex(
+                ValueError,
+                'PCoA result has fewer than 7 dimensions.'):
+            approximate_convex_hull(self.metadata,
+                                    self.pcoa,
+                                    self.individual_id_column,
+                                    7)
+
+
+class TestBootstrapConvexHull(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        rng = np.random.default_rng(11)
+        self.people = ['s1'] * 30 + ['s2'] * 8 + ['s3'] * 5
+        index = pd.Index([f'i{i}' for i in range(len(self.people))],
+                         name='sampleid')
+        columns = ['PC1', 'PC2', 'PC3']
+        self.samples_df = pd.DataFrame(
+            rng.normal(size=(len(index), len(columns))),
+            index=index,
+            columns=columns)
+        self.pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series(np.ones(len(columns)), index=columns),
+            self.samples_df)
+        self.metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: self.people}, index=index))
+
+    def test_bootstrap(self):
+        with self.assertWarnsRegex(
+                Warning,
+                'Number of timepoints less than n_timepoints. '
+                'Skipping 1 individual\\(s\\): s3'):
+            hulls = bootstrap_convex_hull(self.metadata,
+                                          self.pcoa,
+                                          self.individual_id_column,
+                                          8,
+                                          n_replicates=200)
+
+        self.assertEqual(list(hulls[self.individual_id_column]),
+                         ['s1', 's2'])
+        full = ConvexHull(self.samples_df.values[:30])
+        s1 = hulls.iloc[0]
+        self.assertLessEqual(s1['convexhull_volume_lower'],
+                             s1['convexhull_volume'])
+        self.assertLessEqual(s1['convexhull_volume'],
+                             s1['convexhull_volume_upper'])
+        self.assertLess(s1['convexhull_volume_upper'], full.volume)
+        self.assertLess(s1['convexhull_area_upper'], full.area)
+
+        # every replicate of a subject with exactly n_timepoints is the
+        # whole subject
+        exact = ConvexHull(self.samples_df.values[30:38])
+        for column in ('convexhull_volume', 'convexhull_volume_lower',
+                       'convexhull_volume_upper'):
+            self.assertAlmostEqual(hulls.iloc[1][column], exact.volume)
+        self.assertAlmostEqual(hulls.iloc[1]['convexhull_area'], exact.area)
+
+    def test_duplicate_samples(self):
+        # s2 repeats 3 of its 13 samples, so some subsets of 4 are flat
+        samples_df = self.samples_df.copy()
+        samples_df.iloc[40:43] = samples_df.iloc[30:33].to_numpy()
+        people = self.people[:30] + ['s2'] * 13
+        metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: people}, index=samples_df.index))
+        pcoa = OrdinationResults('PCoA',
+                                 'Principal Coordinate Analysis',
+                                 self.pcoa.eigvals,
+                                 samples_df)
+
+        with self.assertWarnsRegex(
+                Warning,
+                'Qhull failed on bootstrap replicates, left out of the '
+                'estimates, for 1 individual\\(s\\): s2 \\(\\d+ of 200\\)'):
+            hulls = bootstrap_convex_hull(metadata,
+                                          pcoa,
+                                          self.individual_id_column,
+                                          4,
+                                          n_replicates=200)
+
+        self.assertFalse(hulls.drop(columns=self.individual_id_column)
+                         .isna().any().any())
+
+    def test_deterministic(self):
+        expected = bootstrap_convex_hull(self.metadata,
+                                         self.pcoa,
+                                         self.individual_id_column,
+                                         6,
+                                         n_replicates=50,
+                                         random_state=3)
+        for n_jobs in (1, 2):
+            hulls = bootstrap_convex_hull(self.metadata,
+                                          self.pcoa,
+                                          self.individual_id_column,
+                                          6,
+                                          n_replicates=50,
+                                          random_state=3,
+                                          n_jobs=n_jobs)
+            assert_frame_equal(hulls, expected)
+
+    def test_too_few_timepoints(self):
+        with self.assertRaisesRegex(
+                ValueError,
+                'n_timepoints must be greater than the number of '
+                'dimensions, got 3.'):
+            bootstrap_convex_hull(self.metadata,
+                                  self.pcoa,
+                                  self.individual_id_column,
+                                  3)
+
+
+class TestHullPermutationTest(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        rng = np.random.default_rng(2)
+        subjects = [f's{i}' for i in range(60)]
+        self.hulls = pd.DataFrame({
+            self.individual_id_column: subjects,
+            'convexhull_volume': np.r_[rng.normal(1, 0.1, 30),
+                                       rng.normal(2, 0.1, 30)],
+            'convexhull_area': rng.normal(size=60)})
+        index = pd.Index([f'i{i}' for i in range(120)], name='sampleid')
+        self.metadata_df = pd.DataFrame(
+            {self.individual_id_column: subjects * 2,
+             'arm': (['a'] * 30 + ['b'] * 30) * 2},
+            index=index)
+
+    def test_permutation_test(self):
+        metadata = Metadata(self.metadata_df)
+        volume = hull_permutation_test(self.hulls, metadata,
+                                       self.individual_id_column, 'arm',
+                                       permutations=99)
+        area = hull_permutation_test(self.hulls, metadata,
+                                     self.individual_id_column, 'arm',
+                                     measure='convexhull_area',
+                                     permutations=99)
+
+        self.assertEqual(list(volume.index), ['convexhull_volume'])
+        self.assertEqual(volume['sample size'].iloc[0], 60)
+        self.assertEqual(volume['number of groups'].iloc[0], 2)
+        self.assertEqual(volume['p-value'].iloc[0], 0.01)
+        self.assertGreater(area['p-value'].iloc[0], 0.01)
+
+    def test_subject_in_two_groups(self):
+        self.metadata_df.loc['i0', 'arm'] = 'b'
+        with self.assertRaisesRegex(
+                ValueError,
+                'Subjects in more than one group: s0'):
+            hull_permutation_test(self.hulls, Metadata(self.metadata_df),
+                                  self.individual_id_column, 'arm')
+
+    def test_one_group(self):
+        self.metadata_df['arm'] = 'a'
+        with self.assertRaisesRegex(
+                ValueError,
+                'At least two groups'):
+            hull_permutation_test(self.hulls, Metadata(self.metadata_df),
+                                  self.individual_id_column, 'arm')
+
+    def test_numeric_subject_ids(self):
+        # hulls read back from a file have 1.0 where the metadata has
+        # '001'
+        self.metadata_df[self.individual_id_column] = [
+            f'{i:03d}' for i in range(60)] * 2
+        self.hulls[self.individual_id_column] = np.arange(60.0)
+        result = hull_permutation_test(self.hulls,
+                                       Metadata(self.metadata_df),
+                                       self.individual_id_column, 'arm',
+                                       permutations=99)
+
+        self.assertEqual(result['sample size'].iloc[0], 60)
+        self.assertEqual(result['p-value'].iloc[0], 0.01)
+
+    def test_subjects_not_in_metadata(self):
+        self.hulls[self.individual_id_column] = [f'x{i}' for i in range(60)]
+        with self.assertRaisesRegex(
+                ValueError,
+                'None of the subjects in hulls were found in the '
+                'unique_id column of metadata.'):
+            hull_permutation_test(self.hulls, Metadata(self.metadata_df),
+                                  self.individual_id_column, 'arm')
+
+
+class TestSlidingWindowConvexHull(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        rng = np.random.default_rng(4)
+        self.people = ['s1'] * 60 + ['s2'] * 25
+        index = pd.Index([f'i{i}' for i in range(len(self.people))],
+                         name='sampleid')
+        self.samples_df = pd.DataFrame(
+            rng.normal(size=(len(index), 3)),
+            index=index,
+            columns=['PC1', 'PC2', 'PC3'])
+        self.pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series(np.ones(3), index=['PC1', 'PC2', 'PC3']),
+            self.samples_df)
+        self.metadata_df = pd.DataFrame(
+            {self.individual_id_column: self.people,
+             'day': np.r_[rng.permutation(60), rng.uniform(10, 40, 25)]},
+            index=index)
+
+    def test_windows(self):
+        metadata = Metadata(self.metadata_df)
+        for number_of_dimensions, window_size, step in ((3, 20, 5),
+                                                        (2, 10, None)):
+            hulls = sliding_window_convex_hull(metadata,
+                                               self.pcoa,
+                                               self.individual_id_column,
+                                               'day',
+                                               window_size,
+                                               step,
+                                               number_of_dimensions)
+
+            self.assertEqual(list(hulls.columns),
+                             [self.individual_id_column, 'window_start',
+                              'window_end', 'convexhull_volume',
+                              'convexhull_area'])
+            self.assertGreater(len(hulls), 4)
+            days = self.metadata_df['day'].to_numpy()
+            people = np.array(self.people)
+            for _, row in hulls.iterrows():
+                inside = ((people == row[self.individual_id_column]) &
+                          (days >= row['window_start']) &
+                          (days < row['window_end']))
+                c_hull = ConvexHull(self.samples_df.values[
+                    inside, :number_of_dimensions])
+                self.assertAlmostEqual(row['convexhull_volume'],
+                                       c_hull.volume)
+                self.assertAlmostEqual(row['convexhull_area'],
+                                       c_hull.area)
+
+        # windows start from the earliest sample of any subject
+        self.assertEqual(hulls['window_start'].min(), 0)
+
+    def test_time_not_numeric(self):
+        self.metadata_df['day'] = 'monday'
+        with self.assertRaisesRegex(
+                ValueError,
+                'Time column day should be numeric.'):
+            sliding_window_convex_hull(Metadata(self.metadata_df),
+                                       self.pcoa,
+                                       self.individual_id_column,
+                                       'day',
+                                       10)
+
+
+class TestMultiConvexHull(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        rng = np.random.default_rng(8)
+        people = ['s1'] * 12 + ['s2'] * 3 + ['s3'] * 7 + ['s4'] * 2
+        index = pd.Index([f'i{i}' for i in range(len(people))],
+                         name='sampleid')
+        columns = ['PC1', 'PC2', 'PC3', 'PC4']
+        self.pcoas = {}
+        for name in ('unifrac', 'jaccard'):
+            samples_df = pd.DataFrame(
+                rng.normal(size=(len(index), len(columns))),
+                index=index,
+                columns=columns)
+            # ordinations need not list the samples in the same order
+            self.pcoas[name] = OrdinationResults(
+                'PCoA',
+                'Principal Coordinate Analysis',
+                pd.Series(np.ones(len(columns)), index=columns),
+                samples_df.sample(frac=1, random_state=1))
+        self.metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: people}, index=index))
+
+    def test_matches_convex_hull(self):
+        with self.assertWarnsRegex(Warning,
+                                   'Skipping 1 individual\\(s\\): s4'):
+            hulls = multi_convex_hull(self.metadata,
+                                      self.pcoas,
+                                      self.individual_id_column,
+                                      [3, 2])
+
+        self.assertEqual(list(hulls[self.individual_id_column]),
+                         ['s1', 's2', 's3'])
+        for name, pcoa in self.pcoas.items():
+            for d in (2, 3):
+                expected = convex_hull(self.metadata,
+                                       pcoa,
+                                       self.individual_id_column,
+                                       d).set_index(self.individual_id_column)
+                measures = hulls.set_index(self.individual_id_column)[
+                    [f'convexhull_volume_{name}_{d}d',
+                     f'convexhull_area_{name}_{d}d']]
+                expected = expected.reindex(measures.index).to_numpy()
+                np.testing.assert_allclose(measures.to_numpy(), expected)
+        # s2 has 3 timepoints, enough for a 2D hull only
+        self.assertTrue(np.isnan(hulls['convexhull_volume_jaccard_3d'][1]))
+
+    def test_failed_subject(self):
+        # s3 is flat in the first 3 PCs of unifrac only
+        samples = self.pcoas['unifrac'].samples
+        samples.loc[[f'i{i}' for i in range(15, 22)], 'PC3'] = 0.0
+
+        with self.assertWarnsRegex(
+                Warning,
+                'Qhull failed, volume and area are NaN for 1 '
+                'individual\\(s\\): s3'):
+            hulls = multi_convex_hull(self.metadata,
+                                      self.pcoas,
+                                      self.individual_id_column)
+
+        self.assertTrue(np.isnan(hulls['convexhull_volume_unifrac_3d'][2]))
+        self.assertFalse(np.isnan(hulls['convexhull_volume_jaccard_3d'][2]))
+
+    def test_different_samples(self):
+        pcoa = self.pcoas['jaccard']
+        self.pcoas['jaccard'] = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pcoa.eigvals,
+            pcoa.samples.iloc[1:])
+        with self.assertRaisesRegex(
+                ValueError,
+                'PCoA result jaccard does not have the same samples'):
+            multi_convex_hull(self.metadata,
+                              self.pcoas,
+                              self.individual_id_column)
+
+
+class TestChunkedConvexHull(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        rng = np.random.default_rng(5)
+        people = (['s3'] * 6 + ['s1'] * 9 + ['s4'] * 2 + ['s2'] * 5 +
+                  ['s5'] * 4)
+        people = list(rng.permutation(people))
+        index = pd.Index([f'i{i}' for i in range(len(people))],
+                         name='sampleid')
+        columns = ['PC1', 'PC2', 'PC3', 'PC4']
+        self.pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series(np.ones(len(columns)), index=columns),
+            pd.DataFrame(rng.normal(size=(len(index), len(columns))),
+                         index=index, columns=columns))
+        self.metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: people}, index=index))
+        self.tmp = TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'ordination.txt')
+        self.pcoa.write(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_convex_hull(self):
+        pcoa = MappedOrdinationCoordinates.read(self.path, 3)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            expected = convex_hull(self.metadata, self.pcoa,
+                                   self.individual_id_column)
+        # batches of one or two subjects, and everything at once
+        for max_samples in (1, 10, 1000):
+            with self.assertWarnsRegex(Warning,
+                                       'Skipping 1 individual\\(s\\): s4'):
+                ff = chunked_convex_hull(self.metadata, pcoa,
+                                         self.individual_id_column,
+                                         max_samples=max_samples)
+            hulls = pd.read_csv(str(ff), sep='\t', index_col=0)
+            hulls.index.name = None
+            assert_frame_equal(hulls, expected)
+
+    def test_mapped(self):
+        pcoa = MappedOrdinationCoordinates.read(self.path, 3)
+
+        coords = pcoa.samples.to_numpy()
+        while not isinstance(coords, np.memmap):
+            coords = coords.base
+        self.assertEqual(coords.shape, (26, 3))
+        self.assertEqual(list(pcoa.samples.columns), ['PC1', 'PC2', 'PC3'])
+
+
+class TestDistanceConvexHull(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        rng = np.random.default_rng(2)
+        people = ['s1'] * 10 + ['s2'] * 8 + ['s3'] * 2
+        self.ids = [f'i{i}' for i in range(len(people))]
+        # points in 3 dimensions, recovered exactly by the top 3 PCs
+        self.points = rng.normal(size=(len(people), 3))
+        self.metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: people},
+            index=pd.Index(self.ids, name='sampleid')))
+
+    def test_matches_points(self):
+        distances = Distances(self.ids, squareform(pdist(self.points)))
+
+        with self.assertWarnsRegex(Warning,
+                                   'Skipping 1 individual\\(s\\): s3'):
+            hulls = distance_convex_hull(self.metadata,
+                                         distances,
+                                         self.individual_id_column)
+
+        self.assertEqual(list(hulls[self.individual_id_column]),
+                         ['s1', 's2'])
+        for i, (start, end) in enumerate([(0, 10), (10, 18)]):
+            expected = ConvexHull(self.points[start:end])
+            self.assertAlmostEqual(hulls['convexhull_volume'][i],
+                                   expected.volume)
+            self.assertAlmostEqual(hulls['convexhull_area'][i],
+                                   expected.area)
+
+
+class TestHullOverlap(TestCase):
+
+    def setUp(self):
+        self.individual_id_column = 'unique_id'
+        cube = np.array([[x, y, z] for x in (0, 1) for y in (0, 1)
+                         for z in (0, 1)], dtype=float)
+        # s1 and s2 overlap in half a cube, s3 is far from both, and
+        # the late period of s1 overlaps its early one in a quarter
+        points = np.vstack([cube, cube + [0.5, 0, 0], cube + [5, 5, 5],
+                            cube + [0.5, 0.5, 0]])
+        people = ['s1'] * 8 + ['s2'] * 8 + ['s3'] * 8 + ['s1'] * 8
+        periods = ['early'] * 24 + ['late'] * 8
+        index = pd.Index([f'i{i}' for i in range(len(people))],
+                         name='sampleid')
+        self.pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series(np.ones(3), index=['PC1', 'PC2', 'PC3']),
+            pd.DataFrame(points, index=index,
+                         columns=['PC1', 'PC2', 'PC3']))
+        self.metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: people, 'period': periods},
+            index=index))
+
+    def test_subjects(self):
+        # without the late period of s1
+        early = self.pcoa.samples.index[:24]
+        pcoa = OrdinationResults('PCoA',
+                                 'Principal Coordinate Analysis',
+                                 self.pcoa.eigvals,
+                                 self.pcoa.samples.loc[early])
+
+        overlap = hull_overlap(self.metadata, pcoa,
+                               self.individual_id_column)
+
+        expected = pd.DataFrame({'unique_id_1': ['s1'],
+                                 'unique_id_2': ['s2'],
+                                 'overlap_volume': [0.5],
+                                 'overlap_jaccard': [0.5 / 1.5]})
+        assert_frame_equal(overlap, expected)
+
+    def test_within_subject(self):
+        overlap = hull_overlap(self.metadata,
+                               self.pcoa,
+                               self.individual_id_column,
+                               strata_columns=['period'],
+                               within_subject=True)
+
+        self.assertEqual(len(overlap), 1)
+        self.assertEqual(list(overlap.iloc[0, :4]),
+                         ['s1', 'early', 's1', 'late'])
+        self.assertAlmostEqual(overlap['overlap_volume'][0], 0.25)
+
+    def test_within_subject_needs_strata(self):
+        with self.assertRaisesRegex(ValueError, 'needs strata_columns'):
+            hull_overlap(self.metadata,
+                         self.pcoa,
+                         self.individual_id_column,
+                         within_subject=True)
+
+    def test_full_rank(self):
+        # a full-rank matrix, where the randomized PCoA is not exact,
+        # with eigenvalues decaying geometrically
+        rng = np.random.default_rng(6)
+        n_samples = 200
+        points = (rng.normal(size=(n_samples, n_samples)) *
+                  0.8 ** np.arange(n_samples))
+        ids = [f'i{i}' for i in range(n_samples)]
+        people = [f's{i // 10:02d}' for i in range(n_samples)]
+        metadata = Metadata(pd.DataFrame(
+            {self.individual_id_column: people},
+            index=pd.Index(ids, name='sampleid')))
+        distances = Distances(ids, squareform(pdist(points)))
+
+        hulls = distance_convex_hull(metadata, distances,
+                                     self.individual_id_column)
+
+        assert_frame_equal(hulls, distance_convex_hull(
+            metadata, distances, self.individual_id_column))
+        exact = ordination.pcoa(DistanceMatrix(distances.data, ids),
+                                'eigh', 3)
+        expected = convex_hull(metadata, exact, self.individual_id_column)
+        np.testing.assert_allclose(
+            hulls[['convexhull_volume', 'convexhull_area']],
+            expected[['convexhull_volume', 'convexhull_area']], rtol=1e-3)
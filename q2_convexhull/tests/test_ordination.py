@@ -0,0 +1,77 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+import os
+import numpy as np
+import pandas as pd
+from skbio import OrdinationResults
+from q2_convexhull._ordination import (OrdinationCoordinates,
+                                       AllOrdinationCoordinates,
+                                       n_components)
+
+
+class TestOrdinationCoordinates(TestCase):
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, 'ordination.txt')
+
+        columns = ['PC1', 'PC2', 'PC3', 'PC4', 'PC5']
+        self.samples_df = pd.DataFrame(
+            np.random.default_rng(0).normal(size=(7, 5)),
+            index=[f's{i}' for i in range(7)],
+            columns=columns)
+        self.pcoa = OrdinationResults(
+            'PCoA',
+            'Principal Coordinate Analysis',
+            pd.Series(np.arange(5, 0, -1, dtype=float), index=columns),
+            self.samples_df,
+            proportion_explained=pd.Series(np.full(5, 0.2),
+                                           index=columns))
+        self.pcoa.write(self.path)
+
+    def test_read_all(self):
+        coords = AllOrdinationCoordinates.read(self.path, None)
+
+        self.assertIsInstance(coords, AllOrdinationCoordinates)
+        np.testing.assert_allclose(coords.samples.to_numpy(),
+                                   self.samples_df.to_numpy())
+
+    def test_read(self):
+        coords = OrdinationCoordinates.read(self.path, 3)
+
+        self.assertEqual(coords.n_components, 5)
+        self.assertEqual(n_components(coords), 5)
+        self.assertEqual(list(coords.samples.index),
+                         list(self.samples_df.index))
+        np.testing.assert_allclose(coords.samples.to_numpy(),
+                                   self.samples_df.to_numpy()[:, :3])
+
+    def test_read_all_columns(self):
+        coords = OrdinationCoordinates.read(self.path, 10)
+
+        self.assertEqual(coords.samples.shape, (7, 5))
+        np.testing.assert_allclose(coords.samples.to_numpy(),
+                                   self.samples_df.to_numpy())
+
+    def test_read_memmap(self):
+        memmap = os.path.join(self.tempdir.name, 'coords.npy')
+
+        coords = OrdinationCoordinates.read(self.path, 2, memmap=memmap)
+
+        np.testing.assert_allclose(np.load(memmap),
+                                   self.samples_df.to_numpy()[:, :2])
+        np.testing.assert_allclose(coords.samples.to_numpy(),
+                                   self.samples_df.to_numpy()[:, :2])
+
+    def test_n_components(self):
+        self.assertEqual(n_components(self.pcoa), 5)
+
+    def test_no_samples_section(self):
+        with open(self.path, 'w') as fh:
+            fh.write('Eigvals\t0\n\n')
+
+        with self.assertRaisesRegex(
+                ValueError,
+                'Ordination file has no sample coordinates.'):
+            OrdinationCoordinates.read(self.path, 3)
@@ -0,0 +1,59 @@
+from unittest import TestCase
+from itertools import product
+import numpy as np
+from scipy.spatial import ConvexHull
+from q2_convexhull._overlap import candidate_pairs, intersection_volume
+
+
+class TestCandidatePairs(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.lower = rng.uniform(0, 10, size=(300, 3))
+        self.upper = self.lower + rng.uniform(0, 2, size=(300, 3))
+
+    def brute_force(self, partitions):
+        first, second = [], []
+        for i in range(len(self.lower)):
+            for j in range(i + 1, len(self.lower)):
+                if (partitions[i] == partitions[j] and
+                        np.all(self.lower[i] <= self.upper[j]) and
+                        np.all(self.lower[j] <= self.upper[i])):
+                    first.append(i)
+                    second.append(j)
+        return first, second
+
+    def test_pairs(self):
+        first, second = candidate_pairs(self.lower, self.upper)
+
+        expected = self.brute_force(np.zeros(len(self.lower)))
+        self.assertGreater(len(first), 0)
+        self.assertEqual((list(first), list(second)), expected)
+
+    def test_partitions(self):
+        partitions = np.arange(len(self.lower)) % 3
+
+        first, second = candidate_pairs(self.lower, self.upper, partitions)
+
+        self.assertEqual((list(first), list(second)),
+                         self.brute_force(partitions))
+
+
+class TestIntersectionVolume(TestCase):
+
+    def cube(self, shift):
+        return ConvexHull(np.array(list(product((0, 1), repeat=3)),
+                                   dtype=float) + shift)
+
+    def test_overlap(self):
+        volume = intersection_volume(self.cube([0, 0, 0]),
+                                     self.cube([0.5, 0.5, 0]))
+        self.assertAlmostEqual(volume, 0.25)
+
+    def test_disjoint(self):
+        self.assertEqual(intersection_volume(self.cube([0, 0, 0]),
+                                             self.cube([2, 0, 0])), 0.0)
+
+    def test_touching(self):
+        self.assertEqual(intersection_volume(self.cube([0, 0, 0]),
+                                             self.cube([1, 0, 0])), 0.0)
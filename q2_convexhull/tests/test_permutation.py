@@ -0,0 +1,41 @@
+from unittest import TestCase
+from unittest.mock import patch
+import numpy as np
+from scipy.stats import f_oneway
+from q2_convexhull._permutation import permutation_f_test
+
+
+class TestPermutationFTest(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.codes = rng.integers(0, 3, 200)
+        self.values = rng.normal(size=200)
+
+    def test_statistic(self):
+        statistic, p_value = permutation_f_test(self.values, self.codes, 0)
+
+        expected = f_oneway(*[self.values[self.codes == code]
+                              for code in range(3)])
+        self.assertAlmostEqual(statistic, expected.statistic)
+        self.assertTrue(np.isnan(p_value))
+
+    def test_p_value(self):
+        _, p_value = permutation_f_test(self.values, self.codes, 999)
+        expected = f_oneway(*[self.values[self.codes == code]
+                              for code in range(3)])
+        self.assertAlmostEqual(p_value, expected.pvalue, delta=0.05)
+
+        shifted = self.values + 2 * self.codes
+        _, p_value = permutation_f_test(shifted, self.codes, 999)
+        self.assertEqual(p_value, 1 / 1000)
+
+    def test_n_jobs_deterministic(self):
+        # small blocks spread the permutations over several threads
+        with patch('q2_convexhull._permutation.PERMUTATION_CHUNK_ELEMENTS',
+                   2000):
+            expected = permutation_f_test(self.values, self.codes, 999)
+            for n_jobs in (2, 3):
+                self.assertEqual(permutation_f_test(self.values, self.codes,
+                                                    999, n_jobs=n_jobs),
+                                 expected)
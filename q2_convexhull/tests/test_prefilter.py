@@ -0,0 +1,38 @@
+from unittest import TestCase
+import numpy as np
+from scipy.spatial import ConvexHull
+from q2_convexhull._prefilter import hull_candidates
+
+
+class TestHullCandidates(TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(11)
+
+    def test_hull_unchanged(self):
+        for n_dimensions in (2, 3):
+            for points in (self.rng.normal(size=(5000, n_dimensions)),
+                           self.rng.uniform(size=(5000, n_dimensions))):
+                candidates = hull_candidates(points)
+                self.assertLess(len(candidates), len(points) // 4)
+
+                expected = ConvexHull(points)
+                observed = ConvexHull(points[candidates])
+                self.assertTrue(set(expected.vertices) <=
+                                set(candidates))
+                self.assertAlmostEqual(observed.volume, expected.volume,
+                                       places=12)
+                self.assertAlmostEqual(observed.area, expected.area,
+                                       places=12)
+
+    def test_boundary_points_kept(self):
+        square = np.array([[0, 0], [0, 1], [1, 0], [1, 1],
+                           [0.5, 0], [0.5, 0.5]], dtype=float)
+        np.testing.assert_array_equal(hull_candidates(square),
+                                      [0, 1, 2, 3, 4])
+
+    def test_degenerate_keeps_everything(self):
+        line = np.zeros((50, 3))
+        line[:, 0] = np.arange(50)
+        np.testing.assert_array_equal(hull_candidates(line),
+                                      np.arange(50))
@@ -0,0 +1,63 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+import json
+import os
+import numpy as np
+from scipy.spatial import ConvexHull
+from q2_convexhull._profile import Profile
+
+
+class TestProfile(TestCase):
+
+    def test_stages(self):
+        with Profile() as profile:
+            with profile.stage('allocate'):
+                data = np.ones(1000000)
+            with profile.stage('nothing'):
+                pass
+        del data
+
+        stages = {record['stage']: record for record in profile.stages}
+        self.assertEqual(list(stages), ['allocate', 'nothing'])
+        self.assertGreaterEqual(stages['allocate']['peak_bytes'], 8000000)
+        self.assertLess(stages['nothing']['peak_bytes'], 8000000)
+
+    def test_slowest_subjects(self):
+        cube = np.array([[x, y, z] for x in (0, 1)
+                         for y in (0, 1) for z in (0, 1)], dtype=float)
+        c_hull = ConvexHull(cube)
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            with Profile(path, n_slowest=2) as profile:
+                for subject, seconds in (('s1', 0.1), ('s2', 0.3),
+                                         ('s3', 0.2)):
+                    profile.subject(subject, seconds, 8, c_hull)
+                profile.batch(5, 4, 0.01)
+            with open(path) as fh:
+                report = json.load(fh)
+
+        self.assertEqual([record['subject']
+                          for record in report['slowest_subjects']],
+                         ['s2', 's3'])
+        self.assertEqual(report['subjects'][0],
+                         {'subject': 's1', 'seconds': 0.1, 'n_points': 8,
+                          'n_vertices': 8, 'n_facets': 12})
+        self.assertEqual(report['qhull']['n_subjects'], 3)
+        self.assertIsNone(report['cache'])
+        self.assertEqual(report['batched'],
+                         {'n_subjects': 5, 'seconds': 0.01})
+
+    def test_excluded(self):
+        with Profile() as profile:
+            profile.exclude('Skipping', np.array(['s1', 's2'], dtype=object))
+            profile.exclude('Qhull failed for', [('s3', 'gut')])
+
+        self.assertEqual(profile.report()['excluded'],
+                         [{'reason': 'Skipping', 'n_subjects': 2,
+                           'subjects': ['s1', 's2']},
+                          {'reason': 'Qhull failed for', 'n_subjects': 1,
+                           'subjects': ["('s3', 'gut')"]}])
+
+    def test_from_environment(self):
+        os.environ.pop('Q2_CONVEXHULL_PROFILE', None)
+        self.assertIsNone(Profile.from_environment())
@@ -0,0 +1,71 @@
+from unittest import TestCase
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from qiime2 import Metadata
+from skbio import OrdinationResults
+from q2_convexhull._format import (HullsFormat, HullsNPZFormat,
+                                   HullsDirectoryFormat)
+from q2_convexhull._transformer import _1, _2, _4, _5, _8, _10, _22, _23
+from q2_convexhull.convexhull import update_convex_hull
+
+
+class TestHullsTransformers(TestCase):
+
+    def setUp(self):
+        self.hulls = pd.DataFrame(
+            {'unique_id': np.array(['001', '010', 's3'], dtype=object),
+             'convexhull_volume': [1.0, np.nan, 3.0],
+             'convexhull_area': [6.0, 2.0, 1.0]},
+            index=pd.Index(['0', '1', '2'], dtype=object, name='id'))
+
+    def test_tsv_to_npz(self):
+        npz = _22(_1(self.hulls))
+
+        assert_frame_equal(_8(npz.file.view(HullsNPZFormat)), self.hulls)
+
+    def test_tsv_artifact_to_npz(self):
+        tsv = HullsDirectoryFormat()
+        tsv.file.write_data(self.hulls, pd.DataFrame)
+        npz = _10(tsv)
+
+        assert_frame_equal(_8(npz.file.view(HullsNPZFormat)), self.hulls)
+
+    def test_npz_to_tsv(self):
+        tsv = _23(_22(_1(self.hulls)))
+
+        with open(str(tsv.file.view(HullsFormat))) as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(lines[0],
+                         'id\tunique_id\tconvexhull_volume\tconvexhull_area')
+        self.assertEqual(lines[1:], ['0\t001\t1.0\t6.0', '1\t010\tnan\t2.0',
+                                     '2\ts3\t3.0\t1.0'])
+
+
+class TestUpdateRoundTrip(TestCase):
+
+    def test_numeric_subject_ids(self):
+        # the subject IDs look numeric, so the stored hulls come back
+        # with 1.0 where the metadata has '001'
+        people = [f'{i // 10:03d}' for i in range(50)]
+        index = pd.Index([f'i{i}' for i in range(50)], name='sampleid')
+        pcoa = OrdinationResults(
+            'PCoA', 'Principal Coordinate Analysis',
+            pd.Series([0.5, 0.3, 0.2], index=['PC1', 'PC2', 'PC3']),
+            pd.DataFrame(np.random.default_rng(0).normal(size=(50, 3)),
+                         index=index, columns=['PC1', 'PC2', 'PC3']))
+        metadata = Metadata(pd.DataFrame({'unique_id': people},
+                                         index=index))
+        hulls, hull_vertices = update_convex_hull(metadata, pcoa,
+                                                  'unique_id')
+        previous_hulls = _2(_1(hulls))
+        previous_hull_vertices = _5(_4(hull_vertices))
+
+        with patch('q2_convexhull.convexhull._qhull') as qhull:
+            update, _ = update_convex_hull(
+                metadata, pcoa, 'unique_id', previous_hulls=previous_hulls,
+                previous_hull_vertices=previous_hull_vertices)
+
+        qhull.assert_not_called()
+        assert_frame_equal(update, hulls)